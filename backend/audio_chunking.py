@@ -0,0 +1,70 @@
+"""
+Energy-based silence detection for splitting long audio into chunks.
+
+Chunks end in the quietest gaps near a target length so each one can be
+transcribed independently (and in parallel) without cutting words in half.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+FRAME_SECONDS = 0.03
+
+
+def frame_energy(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames"""
+    frame_length = max(1, int(sample_rate * FRAME_SECONDS))
+    frame_count = len(audio) // frame_length
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:frame_count * frame_length].reshape(frame_count, frame_length)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def silence_midpoints(energy: np.ndarray, min_silence_frames: int) -> np.ndarray:
+    """Frame indices at the middle of every silent run of at least min_silence_frames"""
+    if len(energy) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Adaptive threshold: 20dB below the loud parts of this recording, with an absolute floor
+    threshold = max(float(np.percentile(energy, 95)) * 0.1, 1e-4)
+    silent = np.concatenate(([False], energy < threshold, [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    long_enough = (ends - starts) >= min_silence_frames
+    return ((starts + ends) // 2)[long_enough]
+
+
+def split_on_silence(
+    audio: np.ndarray,
+    sample_rate: int,
+    target_seconds: float = 30.0,
+    max_seconds: float = 60.0,
+    min_silence_seconds: float = 0.3,
+) -> List[Tuple[int, int]]:
+    """Split audio into (start, end) sample ranges, cutting at silences near target_seconds"""
+    total = len(audio)
+    max_samples = int(max_seconds * sample_rate)
+    if total <= max_samples:
+        return [(0, total)]
+
+    frame_length = max(1, int(sample_rate * FRAME_SECONDS))
+    energy = frame_energy(audio, sample_rate)
+    cuts = silence_midpoints(energy, max(1, int(min_silence_seconds / FRAME_SECONDS))) * frame_length
+
+    target_samples = int(target_seconds * sample_rate)
+    min_samples = target_samples // 2
+    chunks = []
+    start = 0
+    while total - start > max_samples:
+        # Silence closest to the target length, within [target/2, max] of the chunk start
+        window = cuts[(cuts >= start + min_samples) & (cuts <= start + max_samples)]
+        if len(window):
+            end = int(window[np.argmin(np.abs(window - (start + target_samples)))])
+        else:
+            end = start + max_samples
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, total))
+    return chunks
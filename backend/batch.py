@@ -0,0 +1,166 @@
+"""
+Bulk ingestion of video URLs.
+
+`POST /api/process-videos/batch` (and `cli.py batch`) take a list of links or
+a playlist/channel URL, run every video through the regular pipeline with a
+per-platform concurrency limit on top of the global worker limit, buffer the
+resulting documents into `insert_many` writes and stream NDJSON progress.
+A document's `on_saved` callback (the result cache) runs only once
+`insert_many` has written it, so cached results never point at ids that are
+still sitting in the buffer.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_TIMEOUT_SECONDS = 120
+
+SavedCallback = Callable[[], Awaitable[None]]
+DocumentSaver = Callable[[Dict[str, Any], Optional[SavedCallback]], Awaitable[None]]
+VideoProcessor = Callable[[str, DocumentSaver], Awaitable[Dict[str, Any]]]
+
+
+async def expand_playlist(ytdlp_bin: str, url: str, limit: Optional[int] = None) -> List[str]:
+    """Video URLs of a playlist or channel, listed without downloading anything"""
+    args = [ytdlp_bin, "--flat-playlist", "--print", "url", "--no-warnings"]
+    if limit:
+        args += ["--playlist-end", str(limit)]
+    process = await asyncio.create_subprocess_exec(
+        *args, url,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=PLAYLIST_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise RuntimeError(f"Timed out listing playlist {url}")
+
+    if process.returncode != 0:
+        raise RuntimeError(f"yt-dlp could not list {url}: {stderr.decode(errors='replace').strip()[-300:]}")
+    return [line.strip() for line in stdout.decode().splitlines() if line.strip().startswith("http")]
+
+
+class BatchWriter:
+    """Buffers video documents and writes them with insert_many"""
+
+    def __init__(self, collection, batch_size: int = 100):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self._buffer: List[Tuple[Dict[str, Any], Optional[SavedCallback]]] = []
+        self._lock = asyncio.Lock()
+        self.inserted = 0
+        self.failed = 0
+
+    async def add(self, document: Dict[str, Any], on_saved: Optional[SavedCallback] = None) -> None:
+        """Buffer `document`; `on_saved` is awaited after it has been written"""
+        self._buffer.append((document, on_saved))
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            entries, self._buffer = self._buffer, []
+            if not entries:
+                return
+            if self.collection is not None:
+                try:
+                    result = await self.collection.insert_many([document for document, _ in entries], ordered=False)
+                    self.inserted += len(result.inserted_ids)
+                except Exception as e:
+                    logger.error(f"Batch insert of {len(entries)} videos failed: {e}")
+                    self.failed += len(entries)
+                    return
+            for _, on_saved in entries:
+                if on_saved is not None:
+                    try:
+                        await on_saved()
+                    except Exception as e:
+                        logger.error(f"Post-insert callback failed: {e}")
+
+
+async def run_batch(
+    urls: List[str],
+    process: VideoProcessor,
+    platform_of: Callable[[str], str],
+    writer: BatchWriter,
+    workers: int,
+    platform_limits: Dict[str, int],
+) -> AsyncIterator[Dict[str, Any]]:
+    """Process every URL and yield a progress event as each one finishes"""
+    total = len(urls)
+    started = time.perf_counter()
+    worker_slots = asyncio.Semaphore(max(1, workers))
+    default_limit = platform_limits.get("default", workers)
+    platform_slots: Dict[str, asyncio.Semaphore] = {}
+    events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+    async def process_one(index: int, url: str) -> None:
+        platform = platform_of(url)
+        slots = platform_slots.setdefault(platform, asyncio.Semaphore(platform_limits.get(platform, default_limit)))
+        # Wait for the platform slot first so a saturated platform does not hold worker slots
+        async with slots, worker_slots:
+            video_started = time.perf_counter()
+            event = {"type": "video", "index": index, "url": url, "platform": platform}
+            try:
+                result = await process(url, writer.add)
+                event.update({
+                    "status": "done",
+                    "id": result["id"],
+                    "transcribed": result.get("transcription_tier") is not None,
+                })
+            except Exception as e:
+                logger.error(f"Batch video {url} failed: {e}")
+                event.update({"status": "failed", "error": str(e)})
+            event["seconds"] = round(time.perf_counter() - video_started, 3)
+        await events.put(event)
+
+    tasks = [asyncio.create_task(process_one(index, url)) for index, url in enumerate(urls)]
+    yield {"type": "start", "total": total}
+
+    completed = failed = 0
+    try:
+        for _ in range(total):
+            event = await events.get()
+            if event["status"] == "done":
+                completed += 1
+            else:
+                failed += 1
+            elapsed = time.perf_counter() - started
+            event.update({
+                "completed": completed,
+                "failed": failed,
+                "total": total,
+                "videos_per_minute": round(60.0 * (completed + failed) / max(elapsed, 1e-9), 2),
+            })
+            yield event
+    finally:
+        # A disconnected client cancels whatever is still running. Starlette
+        # cancels the response through an anyio cancel scope, which would also
+        # interrupt these awaits, so the cleanup is shielded: documents of the
+        # videos that did finish must still be written
+        with anyio.CancelScope(shield=True):
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await writer.flush()
+
+    elapsed = time.perf_counter() - started
+    yield {
+        "type": "summary",
+        "total": total,
+        "completed": completed,
+        "failed": failed,
+        "inserted": writer.inserted,
+        "insert_failures": writer.failed,
+        "elapsed_seconds": round(elapsed, 3),
+        "videos_per_minute": round(60.0 * total / max(elapsed, 1e-9), 2),
+    }
+
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the analysis functions and the HTTP API.
+
+Micro benchmarks time `detect_platform`, the keyword extractors, hook
+generation and summarisation over synthetic small (1 min), medium (10 min)
+and hour-long transcripts. The load benchmark drives `POST /api/process-video`
+in-process through httpx and reports throughput and p50/p95/p99 latency.
+Downloads go through the offline fixture downloader, which decodes
+generated audio files, so nothing touches the network. Whisper is stubbed
+unless `--whisper` is given and the models are available locally.
+
+Results are compared with a stored baseline from the same machine; any
+metric that got worse by more than the tolerance fails the run:
+
+    python benchmark.py run --save-baseline     # record a baseline
+    python benchmark.py run                     # compare against it
+    python benchmark.py run --only micro --tolerance 0.5
+    python benchmark.py run --only load --whisper --fixture-seconds 120
+    python benchmark.py fixtures --count 4 --seconds 600 --directory fixtures/
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import platform
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+# Benchmarks run without MongoDB and keep stored transcripts in a scratch directory
+os.environ.setdefault("MONGO_URL", "none")
+os.environ.setdefault("TRANSCRIPT_DIR", tempfile.mkdtemp(prefix="ayovirals_bench_"))
+os.environ.setdefault("LOG_FORMAT", "text")
+os.environ.setdefault("DOWNLOADER", "fixture")
+
+import numpy as np
+import typer
+
+app = typer.Typer(help="AyoVirals performance benchmarks")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+WORDS_PER_MINUTE = 150
+SEGMENT_SECONDS = 4.0
+TRANSCRIPT_SIZES = {"small": 1, "medium": 10, "hour": 60}
+
+# Vocabulary for synthetic transcripts: a mix of filler, topical nouns and viral trigger phrases
+FILLER = "so the thing is that we were just really trying to get this right and it kind of worked out".split()
+TOPICS = [
+    "budget", "kitchen", "recipe", "startup", "marketing", "fitness", "travel", "camera", "editing",
+    "algorithm", "creator", "audience", "product", "launch", "workout", "morning", "routine", "money",
+]
+PHRASES = [
+    "you won't believe what happened next",
+    "this changed everything for me",
+    "nobody talks about this secret",
+    "here is the mistake everyone makes",
+    "I tried this for thirty days",
+    "wait until the end",
+    "Sarah from Google told me",
+    "we drove all the way to Paris",
+]
+SAMPLE_URLS = [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ",
+    "https://www.tiktok.com/@creator/video/7212345678901234567",
+    "https://www.instagram.com/reel/Cabc123/",
+    "https://x.com/someone/status/1234567890",
+    "https://www.facebook.com/watch/?v=123456789",
+    "https://vimeo.com/123456",
+]
+
+
+def synthetic_transcript(minutes: float, seed: int = 7) -> Dict[str, Any]:
+    """Deterministic transcript of roughly `minutes` of speech, with Whisper-like segments"""
+    rng = random.Random(seed)
+    words_per_segment = int(WORDS_PER_MINUTE * SEGMENT_SECONDS / 60)
+    segments = []
+    for index in range(int(minutes * 60 / SEGMENT_SECONDS)):
+        words = [rng.choice(TOPICS) if rng.random() < 0.25 else rng.choice(FILLER) for _ in range(words_per_segment)]
+        if rng.random() < 0.2:
+            words += rng.choice(PHRASES).split()
+        text = " ".join(words).capitalize() + rng.choice([".", ".", "!", "?"])
+        start = index * SEGMENT_SECONDS
+        segments.append({"start": round(start, 2), "end": round(start + SEGMENT_SECONDS, 2), "text": text})
+    return {
+        "title": f"Synthetic {minutes:g} minute video",
+        "description": "Benchmark transcript",
+        "transcription": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+    }
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": round(p50 * 1000, 4),
+        "p95_ms": round(p95 * 1000, 4),
+        "p99_ms": round(p99 * 1000, 4),
+        "mean_ms": round(float(values.mean()) * 1000, 4),
+        "runs": len(samples),
+    }
+
+
+def time_calls(func: Callable[[], Any], min_seconds: float, max_runs: int, warmup: int = 2) -> Dict[str, float]:
+    """Call `func` repeatedly for at least `min_seconds` (and at least 5 times) and summarise the timings"""
+    for _ in range(warmup):
+        func()
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_seconds
+    while len(samples) < max_runs and (len(samples) < 5 or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def micro_benchmarks(server, min_seconds: float, max_runs: int) -> Dict[str, Dict[str, float]]:
+    results = {"detect_platform": time_calls(lambda: [server.detect_platform(url) for url in SAMPLE_URLS], min_seconds, max_runs)}
+
+    for size, minutes in TRANSCRIPT_SIZES.items():
+        transcript = synthetic_transcript(minutes)
+        text, segments = server.transcript_content(transcript), transcript["segments"]
+        cases = {
+            "enhanced_keyword_extraction": lambda: server.enhanced_keyword_extraction(text),
+            "basic_keyword_extraction": lambda: server.basic_keyword_extraction(text),
+            "generate_enhanced_hooks": lambda: server.generate_enhanced_hooks(text, "viral-trends", ["budget", "kitchen"]),
+            "generate_enhanced_summary": lambda: server.generate_enhanced_summary(text, segments),
+        }
+        for name, func in cases.items():
+            results[f"{name}[{size}]"] = time_calls(func, min_seconds, max_runs)
+            typer.echo(f"  {name}[{size}]: p50 {results[f'{name}[{size}]']['p50_ms']:.3f}ms", err=True)
+    return results
+
+
+def stub_whisper(server, transcript: Dict[str, Any], transcribe_latency: float) -> None:
+    """Replace Whisper with a local stub that returns `transcript`'s segments after a fixed delay"""
+    def transcribe_audio_sync(audio, on_segment=None, offset=0.0, model_size="base", beam_size=5):
+        time.sleep(transcribe_latency)
+        for segment in transcript["segments"]:
+            if on_segment is not None:
+                on_segment(segment)
+        return [dict(segment) for segment in transcript["segments"]]
+
+    server.transcribe_audio_sync = transcribe_audio_sync
+
+
+async def load_benchmark(server, requests: int, concurrency: int, fixture_seconds: float) -> Dict[str, float]:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = fallbacks = 0
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        async def one(index: int) -> None:
+            nonlocal errors, fallbacks
+            # A distinct video per request, so every request runs the full pipeline
+            video_url = f"https://www.youtube.com/watch?v=bench{index:07d}&fixture_seconds={fixture_seconds:g}"
+            payload = {"video_url": video_url, "persona": "viral-trends"}
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/process-video", json=payload)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+                elif response.json().get("transcription_tier") is None:
+                    # Download or transcription failed and the mock content was analysed
+                    fallbacks += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(index) for index in range(requests)])
+        elapsed = time.perf_counter() - started
+    await server.background_writes.drain()
+
+    return {
+        **percentiles(latencies),
+        "throughput_rps": round(requests / elapsed, 3),
+        "errors": errors,
+        "fallbacks": fallbacks,
+        "concurrency": concurrency,
+    }
+
+
+def environment(server) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "spacy": server.nlp is not None,
+        "downloader": type(server.downloader).__name__,
+    }
+
+
+# Metric, and whether higher is better, checked for each kind of result
+REGRESSION_METRICS = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "throughput_rps": True}
+MICRO_METRICS = ("p50_ms",)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Human-readable regressions of `results` against `baseline`"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        metrics = REGRESSION_METRICS if name.startswith("load") else {metric: False for metric in MICRO_METRICS}
+        for metric, higher_is_better in metrics.items():
+            if metric not in result or not reference.get(metric):
+                continue
+            change = (result[metric] - reference[metric]) / reference[metric]
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name} {metric}: {reference[metric]} -> {result[metric]} ({change:+.0%})")
+    return regressions
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> None:
+    typer.echo(f"{'benchmark':48} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'baseline p50':>13}")
+    for name, result in results.items():
+        reference = baseline.get(name, {}).get("p50_ms")
+        typer.echo(
+            f"{name:48} {result['p50_ms']:10.3f} {result['p95_ms']:10.3f} {result['p99_ms']:10.3f} "
+            f"{reference if reference is not None else '-':>13}"
+        )
+        if "throughput_rps" in result:
+            typer.echo(f"{'':48} {result['throughput_rps']:.1f} req/s, {result['errors']} errors, {result['fallbacks']} fallbacks, concurrency {result['concurrency']}")
+
+
+@app.callback()
+def main():
+    """AyoVirals performance benchmarks"""
+
+
+@app.command()
+def run(
+    only: Optional[str] = typer.Option(None, "--only", help="Run only 'micro' or 'load'"),
+    baseline_path: str = typer.Option(DEFAULT_BASELINE, "--baseline", help="Baseline JSON file"),
+    save_baseline: bool = typer.Option(False, "--save-baseline", help="Write these results as the new baseline"),
+    tolerance: float = typer.Option(0.25, "--tolerance", help="Allowed slowdown before a metric counts as a regression"),
+    min_seconds: float = typer.Option(0.5, "--min-seconds", help="Minimum time spent on each micro benchmark"),
+    max_runs: int = typer.Option(1000, "--max-runs", help="Maximum calls per micro benchmark"),
+    requests: int = typer.Option(200, "--requests", help="Requests sent by the load benchmark"),
+    concurrency: int = typer.Option(16, "--concurrency", help="Concurrent requests in the load benchmark"),
+    fixture_seconds: float = typer.Option(30.0, "--fixture-seconds", help="Length of the generated audio per video"),
+    whisper: bool = typer.Option(False, "--whisper", help="Transcribe with the real Whisper models instead of a stub"),
+    transcribe_latency: float = typer.Option(0.0, "--transcribe-latency", help="Seconds the stub transcription takes"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Also write the results to this JSON file"),
+):
+    """Run the benchmarks and compare them with the stored baseline"""
+    if only not in (None, "micro", "load"):
+        typer.echo("--only must be 'micro' or 'load'", err=True)
+        raise typer.Exit(code=2)
+
+    import server
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results: Dict[str, Dict[str, float]] = {}
+    if only in (None, "micro"):
+        typer.echo("Micro benchmarks", err=True)
+        results.update(micro_benchmarks(server, min_seconds, max_runs))
+    if only in (None, "load"):
+        typer.echo(f"Load benchmark: {requests} requests, concurrency {concurrency}", err=True)
+        if not whisper:
+            stub_whisper(server, synthetic_transcript(TRANSCRIPT_SIZES["medium"]), transcribe_latency)
+        name = f"load:/api/process-video[c={concurrency},{fixture_seconds:g}s{',whisper' if whisper else ''}]"
+        results[name] = asyncio.run(load_benchmark(server, requests, concurrency, fixture_seconds))
+
+    stored: Dict[str, Any] = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as handle:
+            stored = json.load(handle)
+    report(results, stored.get("results", {}))
+
+    document = {"environment": environment(server), "results": results}
+    if output:
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(document, handle, indent=2)
+
+    if save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as handle:
+            json.dump(document, handle, indent=2)
+        typer.echo(f"Baseline saved to {baseline_path}")
+        return
+
+    if not stored:
+        typer.echo(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+        return
+    if stored.get("environment") != document["environment"]:
+        typer.echo(f"Warning: baseline recorded on {stored.get('environment')}, now {document['environment']}", err=True)
+
+    regressions = compare(results, stored.get("results", {}), tolerance)
+    if regressions:
+        typer.echo(f"{len(regressions)} regression(s) beyond {tolerance:.0%}:", err=True)
+        for regression in regressions:
+            typer.echo(f"  {regression}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"No regressions beyond {tolerance:.0%}")
+
+
+@app.command()
+def fixtures(
+    directory: str = typer.Option("fixtures", "--directory", "-d", help="Where to write the WAV files"),
+    count: int = typer.Option(4, "--count", "-n", help="Number of fixtures"),
+    seconds: float = typer.Option(60.0, "--seconds", "-s", help="Length of each fixture"),
+):
+    """Write generated speech-like WAV fixtures, usable as file:// video URLs with DOWNLOADER=fixture
+
+    The backend only reads local files inside FIXTURE_ROOT, so point it at `directory`.
+    """
+    from downloaders import synthetic_speech, write_wav
+
+    os.makedirs(directory, exist_ok=True)
+    for index in range(count):
+        path = os.path.join(directory, f"fixture-{index}-{seconds:g}s.wav")
+        write_wav(path, synthetic_speech(seconds, seed=index))
+        typer.echo(f"file://{os.path.abspath(path)}")
+
+
+if __name__ == "__main__":
+    app()
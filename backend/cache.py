@@ -0,0 +1,360 @@
+"""
+Result and transcript caching for the video pipeline.
+
+Viral links are submitted many times over, so the expensive parts of the
+pipeline are cached under a normalized form of the video URL. Transcripts are
+cached per URL (independent of persona) and full analysis results per
+URL + persona. Each cache keeps a TTL/LRU tier in memory in front of an
+optional MongoDB tier that survives restarts, and concurrent misses for the
+same key are coalesced into a single pipeline execution.
+"""
+
+import re
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change which video a link points to
+# Click ids are tracking on any host; the short, generic names below only
+# mean tracking on the platforms we know, and may identify the video elsewhere
+CLICK_ID_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "igsh", "mibextid"}
+TRACKING_PARAMS = CLICK_ID_PARAMS | {
+    "si", "feature", "pp", "ab_channel", "app",
+    "is_from_webapp", "sender_device", "sender_web_id", "share_app_id", "share_link_id",
+    "ref", "ref_src", "ref_url", "s", "t", "rdid", "source",
+}
+
+HOST_PREFIXES = ("www.", "m.", "mobile.", "music.")
+
+# Hosts of each platform; their subdomains (www., m., vm.) belong to it too
+PLATFORM_HOSTS = {
+    "youtube": ("youtube.com", "youtu.be"),
+    "tiktok": ("tiktok.com",),
+    "instagram": ("instagram.com",),
+    "twitter": ("twitter.com", "x.com"),
+    "facebook": ("facebook.com", "fb.com"),
+}
+
+
+def _with_scheme(url: str) -> str:
+    url = url.strip()
+    return url if "://" in url else "https://" + url
+
+
+def _hostname(netloc: str) -> str:
+    return netloc.lower().split("@")[-1].split(":")[0]
+
+
+def detect_platform(url: str) -> str:
+    """Platform of a video URL, matched on the exact hostname or a subdomain of it
+
+    Matching the hostname rather than a substring of the URL keeps hosts such
+    as box.com or netflix.com from being taken for x.com.
+    """
+    host = _hostname(urlsplit(_with_scheme(url)).netloc)
+    for platform, domains in PLATFORM_HOSTS.items():
+        if any(host == domain or host.endswith("." + domain) for domain in domains):
+            return platform
+    return "unknown"
+
+
+def _is_tracking_param(name: str, platform: str) -> bool:
+    name = name.lower()
+    if name.startswith("utm_") or name in CLICK_ID_PARAMS:
+        return True
+    return platform != "unknown" and name in TRACKING_PARAMS
+
+
+def normalize_video_url(url: str, platform: str) -> str:
+    """Canonical form of a video URL so equivalent links share cache entries"""
+    parts = urlsplit(_with_scheme(url))
+    host = _hostname(parts.netloc)
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = parts.path.rstrip("/")
+    segments = [segment for segment in path.split("/") if segment]
+    query = [(name, value) for name, value in parse_qsl(parts.query) if not _is_tracking_param(name, platform)]
+
+    if platform == "youtube":
+        video_id = None
+        if host == "youtu.be" and segments:
+            video_id = segments[0]
+        elif segments and segments[0] in ("shorts", "embed", "live", "v") and len(segments) > 1:
+            video_id = segments[1]
+        else:
+            video_id = dict(query).get("v")
+        if video_id:
+            return f"https://www.youtube.com/watch?v={video_id}"
+
+    elif platform == "tiktok":
+        return f"https://www.tiktok.com{path}" if host == "tiktok.com" else f"https://{host}{path}"
+
+    elif platform == "instagram":
+        if len(segments) >= 2 and segments[0] in ("p", "reel", "reels", "tv"):
+            return f"https://www.instagram.com/p/{segments[1]}/"
+
+    elif platform == "twitter":
+        if "status" in segments:
+            index = segments.index("status")
+            if index + 1 < len(segments):
+                return f"https://twitter.com/i/status/{segments[index + 1]}"
+
+    elif platform == "facebook":
+        if host == "fb.com":
+            host = "facebook.com"
+        keep = [(name, value) for name, value in query if name in ("v", "story_fbid", "id")]
+        return urlunsplit(("https", host, path, urlencode(sorted(keep)), ""))
+
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+class TTLLRUCache:
+    """In-memory cache with per-entry expiry and least-recently-used eviction"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard_prefixes(self, prefixes: Iterable[str]) -> int:
+        prefixes = tuple(prefixes)
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefixes)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+cache_lookups = registry.counter(
+    "ayovirals_cache_lookups_total",
+    "Cache lookups by cache and the tier that answered (memory, mongo or miss)",
+    ("cache", "result"),
+)
+
+
+class TieredCache:
+    """TTL/LRU memory tier backed by an optional MongoDB (motor) collection"""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, collection=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLLRUCache(max_entries, ttl_seconds)
+        self.collection = collection
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+
+    async def setup(self) -> None:
+        """Create the lookup and expiry indexes for the MongoDB tier"""
+        if self.collection is None:
+            return
+        try:
+            await self.collection.create_index("key", unique=True)
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            logger.error(f"Failed to create {self.name} cache indexes: {e}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            cache_lookups.inc(cache=self.name, result="memory")
+            return value
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one(
+                    {"key": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+                )
+            except Exception as e:
+                logger.warning(f"{self.name} cache lookup failed: {e}")
+                doc = None
+            if doc is not None:
+                self.mongo_hits += 1
+                cache_lookups.inc(cache=self.name, result="mongo")
+                self.memory.set(key, doc["value"])
+                return doc["value"]
+
+        self.misses += 1
+        cache_lookups.inc(cache=self.name, result="miss")
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.collection is None:
+            return
+        try:
+            await self.collection.update_one(
+                {"key": key},
+                {"$set": {
+                    "value": value,
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"{self.name} cache write failed: {e}")
+
+    async def invalidate(self, prefixes: Iterable[str]) -> None:
+        """Drop every entry whose key starts with one of the prefixes, in both tiers"""
+        prefixes = list(prefixes)
+        if not prefixes:
+            return
+        self.memory.discard_prefixes(prefixes)
+        if self.collection is None:
+            return
+        try:
+            # Anchored patterns are answered from the unique key index
+            patterns = [re.compile("^" + re.escape(prefix)) for prefix in prefixes]
+            await self.collection.delete_many({"key": {"$in": patterns}})
+        except Exception as e:
+            logger.warning(f"{self.name} cache invalidation failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.mongo_hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.mongo_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations,
+        }
+
+
+flight_calls = registry.counter(
+    "ayovirals_single_flight_calls_total",
+    "Calls into a single-flight group, by whether they started the execution or joined one in flight",
+    ("flight", "outcome"),
+)
+
+
+Reporter = Callable[[str], Awaitable[None]]
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        # Progress of the execution, forwarded to every caller still waiting
+        self.stage: Optional[str] = None
+        self.reporters: List[Reporter] = []
+        self._reporting = asyncio.Lock()
+
+    async def report(self, stage: str) -> None:
+        async with self._reporting:
+            self.stage = stage
+            for report in list(self.reporters):
+                try:
+                    await report(stage)
+                except Exception as e:
+                    logger.warning(f"Stage report failed: {e}")
+
+    async def join(self, report: Reporter) -> None:
+        """Subscribe a caller to later stages, after telling it the stage reached so far"""
+        async with self._reporting:
+            if self.stage is not None:
+                try:
+                    await report(self.stage)
+                except Exception as e:
+                    logger.warning(f"Stage report failed: {e}")
+            self.reporters.append(report)
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one shared execution
+
+    The execution runs as its own task, so a caller that is cancelled (say,
+    a disconnected client) does not cancel it for everyone else; it is only
+    cancelled once every caller waiting on it has gone.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, _Flight] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[..., Awaitable[Any]], report: Optional[Reporter] = None) -> Any:
+        """Await func() for the first caller of `key`; later callers share its result
+
+        With `report`, func is called as func(reporter): each stage it reports
+        reaches every caller waiting on the execution, and a caller that joins
+        late first hears the stage it has reached.
+        """
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            flight_calls.inc(flight=self.name, outcome="coalesced")
+        else:
+            flight = self._inflight[key] = _Flight()
+            flight.task = asyncio.ensure_future(func(flight.report) if report is not None else func())
+            self.executions += 1
+            flight_calls.inc(flight=self.name, outcome="executed")
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+
+        flight.waiters += 1
+        try:
+            if report is not None:
+                await flight.join(report)
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+            if report is not None and report in flight.reporters:
+                flight.reporters.remove(report)
+
+    def _finished(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case nobody else is waiting
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Command line client for bulk video ingestion.
+
+Sends a list of links (arguments, a file, or stdin) and/or a playlist URL to
+`POST /api/process-videos/batch` and prints progress as results stream back:
+
+    python cli.py batch --persona storytime --file urls.txt
+    python cli.py batch --persona viral-trends --playlist "https://www.youtube.com/playlist?list=..."
+"""
+
+import os
+import sys
+import json
+from typing import List, Optional
+
+import requests
+import typer
+
+app = typer.Typer(help="AyoVirals bulk video ingestion")
+
+DEFAULT_API_URL = os.environ.get("AYOVIRALS_API_URL", "http://localhost:8001/api")
+
+
+@app.callback()
+def main():
+    """AyoVirals bulk video ingestion"""
+
+
+def read_urls(path: str) -> List[str]:
+    """One URL per line; blank lines and # comments are skipped"""
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in handle if line.strip() and not line.strip().startswith("#")]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+@app.command()
+def batch(
+    urls: Optional[List[str]] = typer.Argument(None, help="Video URLs"),
+    persona: str = typer.Option(..., "--persona", "-p", help="Persona id, see /api/personas"),
+    file: Optional[str] = typer.Option(None, "--file", "-f", help="File with one URL per line, '-' for stdin"),
+    playlist: Optional[str] = typer.Option(None, "--playlist", help="Playlist or channel URL to expand"),
+    quality: str = typer.Option("balanced", "--quality", "-q", help="fast, balanced or accurate"),
+    max_seconds: Optional[float] = typer.Option(None, "--max-seconds", help="Only transcribe the first N seconds"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Write every progress event to this NDJSON file"),
+    api_url: str = typer.Option(DEFAULT_API_URL, "--api-url", help="Backend API base URL"),
+):
+    """Process many videos in one batch and stream progress"""
+    video_urls = list(urls or [])
+    if file:
+        video_urls += read_urls(file)
+    if not video_urls and not playlist:
+        typer.echo("Nothing to process: pass URLs, --file or --playlist", err=True)
+        raise typer.Exit(code=2)
+
+    payload = {
+        "video_urls": video_urls,
+        "playlist_url": playlist,
+        "persona": persona,
+        "quality": quality,
+        "max_seconds": max_seconds,
+    }
+    response = requests.post(f"{api_url.rstrip('/')}/process-videos/batch", json=payload, stream=True, timeout=(10, None))
+    if response.status_code != 200:
+        typer.echo(f"Batch rejected (HTTP {response.status_code}): {response.text}", err=True)
+        raise typer.Exit(code=1)
+
+    sink = open(output, "w", encoding="utf-8") if output else None
+    summary = None
+    try:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if sink:
+                sink.write(json.dumps(event) + "\n")
+
+            if event["type"] == "start":
+                typer.echo(f"Processing {event['total']} videos")
+            elif event["type"] == "video":
+                status = event["status"] if event["status"] == "failed" else ("done" if event["transcribed"] else "fallback")
+                typer.echo(
+                    f"[{event['completed'] + event['failed']}/{event['total']}] {status:8} "
+                    f"{event['seconds']:7.1f}s  {event['videos_per_minute']:6.1f} videos/min  {event['url']}"
+                )
+                if event["status"] == "failed":
+                    typer.echo(f"    {event['error']}", err=True)
+            elif event["type"] == "summary":
+                summary = event
+    finally:
+        if sink:
+            sink.close()
+
+    if summary is None:
+        typer.echo("Batch stream ended early", err=True)
+        raise typer.Exit(code=1)
+
+    typer.echo(
+        f"Done: {summary['completed']} processed, {summary['failed']} failed, {summary['inserted']} saved "
+        f"in {summary['elapsed_seconds']:.1f}s ({summary['videos_per_minute']:.1f} videos/min)"
+    )
+    if summary["failed"]:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
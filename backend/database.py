@@ -0,0 +1,208 @@
+"""
+Async MongoDB access.
+
+All database paths share one motor client configured with explicit pool
+sizing, timeouts and write concern from the environment. Result documents
+are written in the background so responses never wait on a Mongo
+round-trip; pending writes are drained on shutdown.
+
+The videos collection gets its indexes at startup, and older documents are
+migrated in place: string `created_at` values become BSON dates and missing
+`normalized_url` fields are backfilled. Both steps are idempotent.
+"""
+
+import os
+import json
+import base64
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+def _write_concern(value: str) -> Any:
+    return int(value) if value.isdigit() else value
+
+
+def client_options() -> Dict[str, Any]:
+    """Pool, timeout and write concern settings for the motor client"""
+    return {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_MS", "300000")),
+        "waitQueueTimeoutMS": int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+        "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "socketTimeoutMS": int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", "30000")),
+        "w": _write_concern(os.environ.get("MONGO_WRITE_CONCERN", "1")),
+        "journal": os.environ.get("MONGO_JOURNAL", "false").lower() == "true",
+        "retryWrites": True,
+        "tz_aware": True,
+    }
+
+
+def create_client(url: Optional[str]) -> AsyncIOMotorClient:
+    """Motor client for MONGO_URL; the connection pool is opened lazily on first use"""
+    return AsyncIOMotorClient(url, **client_options())
+
+
+class BackgroundWriter:
+    """Runs database writes as tracked background tasks"""
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max(1, max_pending)
+        self._tasks: Set[asyncio.Task] = set()
+        self.completed = 0
+        self.failed = 0
+
+    async def submit(self, write: Callable[[], Awaitable[Any]], description: str = "write") -> None:
+        """Start `write()` without waiting for it, unless too many writes are already pending"""
+        if len(self._tasks) >= self.max_pending:
+            # Backpressure: a slow or unreachable database must not grow memory without bound
+            await self._run(write, description)
+            return
+        task = asyncio.create_task(self._run(write, description))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, write: Callable[[], Awaitable[Any]], description: str) -> None:
+        try:
+            await write()
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Background {description} failed: {e}")
+
+    async def drain(self) -> None:
+        """Wait for every pending write to finish"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._tasks), "completed": self.completed, "failed": self.failed}
+
+
+# Lookups by id, "latest analysis of this link for this persona", and
+# time-range listings per platform/persona/keyword all stay on an index; the
+# listings end in (created_at, id) to serve the history API's keyset order
+HISTORY_ORDER = [("created_at", DESCENDING), ("id", DESCENDING)]
+VIDEO_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    IndexModel(
+        [("normalized_url", ASCENDING), ("persona", ASCENDING), ("created_at", DESCENDING)],
+        name="normalized_url_persona_created_at",
+    ),
+    IndexModel([("platform", ASCENDING), *HISTORY_ORDER], name="platform_created_at_id"),
+    IndexModel([("persona", ASCENDING), *HISTORY_ORDER], name="persona_created_at_id"),
+    IndexModel([("keywords", ASCENDING), *HISTORY_ORDER], name="keywords_created_at_id"),
+    IndexModel(HISTORY_ORDER, name="created_at_id"),
+]
+
+# Placeholder timestamp written by older versions of store_result
+LEGACY_CREATED_AT = "2024-01-01T00:00:00Z"
+MIGRATION_BATCH_SIZE = 500
+
+
+async def ensure_video_indexes(collection) -> List[str]:
+    """Create the videos collection indexes (a no-op for indexes that already exist)"""
+    return await collection.create_indexes(VIDEO_INDEXES)
+
+
+async def migrate_created_at(collection) -> int:
+    """Convert string created_at values to BSON dates; the placeholder becomes the ObjectId's timestamp"""
+    inserted_at = {"$toDate": "$_id"}
+    result = await collection.update_many(
+        {"created_at": {"$type": "string"}},
+        [{"$set": {"created_at": {"$cond": [
+            {"$eq": ["$created_at", LEGACY_CREATED_AT]},
+            inserted_at,
+            {"$dateFromString": {"dateString": "$created_at", "onError": inserted_at}},
+        ]}}}],
+    )
+    return result.modified_count
+
+
+async def backfill_normalized_urls(collection, normalize: Callable[[str], str]) -> int:
+    """Fill in normalized_url for documents saved before it was recorded"""
+    updated = 0
+    operations = []
+    cursor = collection.find({"normalized_url": {"$exists": False}, "url": {"$type": "string"}}, {"url": 1})
+    async for document in cursor:
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"normalized_url": normalize(document["url"])}}))
+        if len(operations) >= MIGRATION_BATCH_SIZE:
+            updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+            operations = []
+    if operations:
+        updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+    return updated
+
+
+async def migrate_videos(collection, normalize: Callable[[str], str]) -> Dict[str, int]:
+    """Bring existing video documents up to the current schema"""
+    migrated: Dict[str, int] = {}
+    try:
+        migrated["created_at"] = await migrate_created_at(collection)
+        migrated["normalized_url"] = await backfill_normalized_urls(collection, normalize)
+        logger.info(f"Video migration finished: {migrated}")
+    except Exception as e:
+        logger.error(f"Video migration failed after {migrated}: {e}")
+    return migrated
+
+
+def encode_cursor(created_at: datetime, video_id: str) -> str:
+    """Opaque keyset cursor pointing just past (created_at, id)"""
+    payload = json.dumps({"t": created_at.isoformat(), "id": video_id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, id) from a cursor; raises ValueError when it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at = datetime.fromisoformat(payload["t"])
+        return created_at, str(payload["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def video_history_filter(
+    platform: Optional[str] = None,
+    persona: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    keyword: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Mongo filter for a page of the video history, newest first"""
+    clauses: List[Dict[str, Any]] = []
+    if platform:
+        clauses.append({"platform": platform})
+    if persona:
+        clauses.append({"persona": persona})
+    if keyword:
+        clauses.append({"keywords": "#" + keyword.lower().lstrip("#")})
+    if since or until:
+        created_at: Dict[str, datetime] = {}
+        if since:
+            created_at["$gte"] = _utc(since)
+        if until:
+            created_at["$lt"] = _utc(until)
+        clauses.append({"created_at": created_at})
+    if cursor:
+        after_at, after_id = decode_cursor(cursor)
+        clauses.append({"$or": [
+            {"created_at": {"$lt": after_at}},
+            {"created_at": after_at, "id": {"$lt": after_id}},
+        ]})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
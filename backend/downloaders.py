@@ -0,0 +1,317 @@
+"""
+Video downloaders.
+
+`download_video` delegates to a downloader chosen by the DOWNLOADER setting.
+Every downloader returns `(audio, title, description)`, where `audio` is
+16kHz mono float32 PCM, or `(None, None, None)` when the video cannot be
+fetched.
+
+- ytdlp: the production path, yt-dlp piped into ffmpeg, fully in memory.
+- fixture: no network. `file://` URLs and local paths are read from disk,
+  but only from inside FIXTURE_ROOT (FIXTURE_DIR by default). Any other URL
+  maps to a generated speech-like WAV fixture in FIXTURE_DIR. The URL hash
+  picks one of FIXTURE_VARIANTS fixtures, and its length comes from a
+  `fixture_seconds` query parameter or FIXTURE_SECONDS, capped at
+  FIXTURE_MAX_SECONDS. Fixtures are generated once and reused. This lets the
+  download, transcribe and analyse path run on an air-gapped machine.
+"""
+
+import os
+import json
+import time
+import wave
+import asyncio
+import hashlib
+import logging
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse, unquote
+
+import numpy as np
+
+from tracing import record_span
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+DownloadResult = Tuple[Optional[np.ndarray], Optional[str], Optional[str]]
+FAILED: DownloadResult = (None, None, None)
+
+
+def pcm16_to_float(pcm: bytes) -> np.ndarray:
+    """16-bit PCM -> float32 in [-1, 1], the input format faster-whisper expects"""
+    return np.frombuffer(pcm[:len(pcm) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def parse_ytdlp_info(stderr: str) -> Dict[str, Any]:
+    """Pick the JSON metadata line printed by yt-dlp out of its stderr"""
+    for line in stderr.splitlines():
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+    return {}
+
+
+async def kill_process(process) -> None:
+    if process.returncode is None:
+        process.kill()
+        await process.wait()
+
+
+def decode_command(ffmpeg_bin: str, source: str, max_seconds: Optional[float] = None) -> list:
+    """ffmpeg arguments decoding `source` to 16kHz mono s16le on stdout"""
+    command = [
+        ffmpeg_bin,
+        "-nostdin",
+        "-loglevel", "error",
+        "-i", source,
+        "-f", "s16le",
+        "-ac", "1",
+        "-ar", str(SAMPLE_RATE),
+        "pipe:1"
+    ]
+    if max_seconds:
+        # Stop decoding after the first max_seconds
+        command[-1:-1] = ["-t", f"{max_seconds:g}"]
+    return command
+
+
+class YtDlpDownloader:
+    """Fetch metadata and decode the audio in memory with a single yt-dlp run piped into ffmpeg"""
+
+    def __init__(self, ytdlp_bin: str, ffmpeg_bin: str = "ffmpeg", timeout: float = 150.0):
+        self.ytdlp_bin = ytdlp_bin
+        self.ffmpeg_bin = ffmpeg_bin
+        self.timeout = timeout
+
+    async def fetch(self, url: str, max_seconds: Optional[float] = None) -> DownloadResult:
+        # yt-dlp writes the bestaudio stream to stdout, which is piped straight
+        # into ffmpeg; with "-o -" its --print output goes to stderr instead
+        cmd_download = [
+            self.ytdlp_bin,
+            "-f", "bestaudio/best",
+            "--no-playlist",
+            "--no-simulate",
+            "--print", "%(.{title,duration,description})j",
+            "-o", "-",
+            url
+        ]
+        # yt-dlp exits on the closed pipe once ffmpeg stops at max_seconds
+        cmd_decode = decode_command(self.ffmpeg_bin, "pipe:0", max_seconds)
+
+        ytdlp = ffmpeg = None
+        read_fd, write_fd = os.pipe()
+        try:
+            try:
+                ytdlp = await asyncio.create_subprocess_exec(*cmd_download, stdout=write_fd, stderr=asyncio.subprocess.PIPE)
+                ffmpeg = await asyncio.create_subprocess_exec(
+                    *cmd_decode, stdin=read_fd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+            finally:
+                # The child processes hold their own copies of the pipe ends
+                os.close(read_fd)
+                os.close(write_fd)
+
+            spawned = time.perf_counter()
+
+            async def traced_exit(name: str, process, waiting) -> Any:
+                # Each process gets a span from spawn to exit
+                result = await waiting
+                record_span(name, spawned, time.perf_counter(), returncode=process.returncode)
+                return result
+
+            (pcm, decode_errors), download_errors, _ = await asyncio.wait_for(
+                asyncio.gather(
+                    traced_exit("ffmpeg", ffmpeg, ffmpeg.communicate()),
+                    ytdlp.stderr.read(),
+                    traced_exit("yt-dlp", ytdlp, ytdlp.wait()),
+                ),
+                timeout=self.timeout,
+            )
+            download_errors = download_errors.decode(errors="replace")
+
+            truncated = bool(max_seconds) and ffmpeg.returncode == 0 and bool(pcm)
+            if ytdlp.returncode != 0 and not truncated:
+                logger.error(f"yt-dlp download failed: {download_errors}")
+                return FAILED
+
+            if ffmpeg.returncode != 0 or not pcm:
+                logger.error(f"Audio decoding failed: {decode_errors.decode(errors='replace')}")
+                return FAILED
+
+            info = parse_ytdlp_info(download_errors)
+            audio = pcm16_to_float(pcm)
+            if max_seconds:
+                audio = audio[:int(max_seconds * SAMPLE_RATE)]
+            return audio, info.get("title") or "Unknown", info.get("description") or ""
+
+        except asyncio.TimeoutError:
+            logger.error("yt-dlp timed out")
+            return FAILED
+        except Exception as e:
+            logger.error(f"Video download error: {str(e)}")
+            return FAILED
+        finally:
+            for process in (ytdlp, ffmpeg):
+                if process is not None:
+                    await kill_process(process)
+
+
+def synthetic_speech(seconds: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Speech-like test audio: voiced 'words' of harmonic tones with short gaps and longer pauses"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = np.zeros(total, dtype=np.float32)
+    position = 0
+    next_pause = rng.uniform(3.0, 8.0)
+    while position < total:
+        length = int(rng.uniform(0.2, 0.5) * sample_rate)
+        t = np.arange(min(length, total - position), dtype=np.float32) / sample_rate
+        pitch = rng.uniform(100.0, 250.0)
+        voiced = sum(np.sin(2 * np.pi * pitch * harmonic * t) / harmonic for harmonic in (1, 2, 3, 4))
+        # Rise and fall within each word
+        envelope = np.sin(np.pi * np.arange(len(t)) / max(1, len(t)))
+        audio[position:position + len(t)] = 0.3 * envelope * voiced
+        position += len(t)
+
+        if position / sample_rate >= next_pause:
+            # Sentence pause, where long recordings can be split
+            position += int(rng.uniform(0.5, 0.9) * sample_rate)
+            next_pause = position / sample_rate + rng.uniform(3.0, 8.0)
+        else:
+            position += int(rng.uniform(0.05, 0.15) * sample_rate)
+    audio += rng.normal(0.0, 0.003, total).astype(np.float32)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def write_wav(path: str, audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+    """16-bit mono WAV, written then renamed so readers never see a partial file"""
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+    with wave.open(temporary, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(sample_rate)
+        handle.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+    os.replace(temporary, path)
+
+
+def read_wav(path: str, max_seconds: Optional[float] = None) -> np.ndarray:
+    """16-bit PCM WAV as 16kHz mono float32, mixing channels down and resampling linearly"""
+    with wave.open(path, "rb") as handle:
+        if handle.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        rate, channels = handle.getframerate(), handle.getnchannels()
+        frames = handle.getnframes()
+        if max_seconds:
+            frames = min(frames, int(max_seconds * rate))
+        audio = pcm16_to_float(handle.readframes(frames))
+    if channels > 1:
+        audio = audio[:len(audio) // channels * channels].reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE and len(audio):
+        positions = np.arange(int(len(audio) * SAMPLE_RATE / rate)) * (rate / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+class FixtureDownloader:
+    """Offline downloader: local media files, or generated fixtures for any other URL"""
+
+    def __init__(
+        self,
+        directory: str,
+        default_seconds: float = 60.0,
+        variants: int = 8,
+        ffmpeg_bin: str = "ffmpeg",
+        max_fixture_seconds: float = 600.0,
+        local_root: Optional[str] = None,
+    ):
+        self.directory = directory
+        self.max_fixture_seconds = max_fixture_seconds
+        self.default_seconds = min(default_seconds, max_fixture_seconds)
+        self.variants = max(1, variants)
+        self.ffmpeg_bin = ffmpeg_bin
+        os.makedirs(directory, exist_ok=True)
+        self.local_root = os.path.realpath(local_root or directory)
+
+    def fixture_for(self, url: str) -> Tuple[int, float]:
+        """(variant, seconds) of the generated fixture standing in for `url`, capped at max_fixture_seconds"""
+        values = parse_qs(urlparse(url).query).get("fixture_seconds")
+        seconds = float(values[-1]) if values else self.default_seconds
+        if not seconds > 0:
+            raise ValueError(f"fixture_seconds must be positive, got {seconds:g}")
+        variant = int.from_bytes(hashlib.sha256(url.encode()).digest()[:4], "big") % self.variants
+        return variant, min(seconds, self.max_fixture_seconds)
+
+    def local_path(self, path: str) -> str:
+        """The real path of a local media file; raises ValueError outside local_root"""
+        resolved = os.path.realpath(path)
+        if os.path.commonpath([resolved, self.local_root]) != self.local_root:
+            raise ValueError(f"{path} is outside the fixture root {self.local_root}")
+        return resolved
+
+    def ensure_fixture(self, variant: int, seconds: float) -> str:
+        path = os.path.join(self.directory, f"fixture-{variant}-{seconds:g}s.wav")
+        if not os.path.exists(path):
+            write_wav(path, synthetic_speech(seconds, seed=variant))
+        return path
+
+    async def decode_file(self, path: str, max_seconds: Optional[float]) -> np.ndarray:
+        if path.lower().endswith(".wav"):
+            return await asyncio.to_thread(read_wav, path, max_seconds)
+        process = await asyncio.create_subprocess_exec(
+            *decode_command(self.ffmpeg_bin, path, max_seconds),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        pcm, errors = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"Audio decoding failed: {errors.decode(errors='replace')}")
+        return pcm16_to_float(pcm)
+
+    async def fetch(self, url: str, max_seconds: Optional[float] = None) -> DownloadResult:
+        try:
+            parsed = urlparse(url)
+            if parsed.scheme == "file" or (not parsed.scheme and os.path.exists(url)):
+                path = self.local_path(unquote(parsed.path) if parsed.scheme == "file" else url)
+                title = os.path.splitext(os.path.basename(path))[0]
+            else:
+                variant, seconds = self.fixture_for(url)
+                path = await asyncio.to_thread(self.ensure_fixture, variant, seconds)
+                title = f"Fixture {variant} ({seconds:g}s)"
+
+            started = time.perf_counter()
+            audio = await self.decode_file(path, max_seconds)
+            record_span("fixture-decode", started, time.perf_counter(), seconds=round(len(audio) / SAMPLE_RATE, 2))
+            if not len(audio):
+                logger.error(f"Fixture audio is empty: {path}")
+                return FAILED
+            return audio, title, f"Local fixture {path}"
+        except Exception as e:
+            logger.error(f"Fixture download error: {str(e)}")
+            return FAILED
+
+
+def create_downloader(
+    kind: str,
+    ytdlp_bin: str,
+    ffmpeg_bin: str = "ffmpeg",
+    timeout: float = 150.0,
+    fixture_dir: Optional[str] = None,
+    fixture_seconds: float = 60.0,
+    fixture_variants: int = 8,
+    fixture_max_seconds: float = 600.0,
+    fixture_root: Optional[str] = None,
+):
+    """The downloader selected by the DOWNLOADER setting"""
+    if kind == "ytdlp":
+        return YtDlpDownloader(ytdlp_bin, ffmpeg_bin, timeout)
+    if kind == "fixture":
+        if not fixture_dir:
+            raise ValueError("The fixture downloader needs a fixture directory")
+        return FixtureDownloader(
+            fixture_dir, fixture_seconds, fixture_variants, ffmpeg_bin, fixture_max_seconds, fixture_root
+        )
+    raise ValueError(f"Unknown DOWNLOADER {kind!r}, expected 'ytdlp' or 'fixture'")
@@ -0,0 +1,175 @@
+"""
+Content-aware hook ranking.
+
+Candidate hooks come from three places: the persona's templates, the hooks of
+every trigger category found in the content, and entity templates filled with
+topics and numbers from the transcript. Each candidate is scored against the
+content by cosine similarity over (trigger category, template vocabulary)
+features plus a small per-source prior. Feature vectors of all fixed
+candidates are built once at startup, so ranking a request is one scan of
+the content and a single small matrix-vector product.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from spacy.lang.en.stop_words import STOP_WORDS
+
+from triggers import TriggerMatcher, TriggerScan
+
+WORD_PATTERN = re.compile(r"[a-z][a-z']+")
+NUMBER_PATTERN = re.compile(
+    r"\$\d[\d,.]*[kmb]?\b|\b\d+(?:\.\d+)?%|\b\d+\s+(?:seconds|minutes|hours|days|weeks|months|years)\b",
+    re.IGNORECASE,
+)
+PLACEHOLDER_PATTERN = re.compile(r"\{\w+\}")
+
+# How much trigger category overlap counts relative to shared vocabulary
+CATEGORY_FEATURE_WEIGHT = 2.0
+
+# Score bonus per candidate source
+SOURCE_PRIORS = {"persona": 0.1, "trigger": 0.2, "entity": 0.25}
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+def extract_numbers(text: str, limit: int = 2) -> List[str]:
+    """Most frequently mentioned amounts, percentages and durations"""
+    counts = Counter(match.group(0) for match in NUMBER_PATTERN.finditer(text))
+    return [number for number, _ in counts.most_common(limit)]
+
+
+class HookRanker:
+    """Scores candidate hooks against video content with precomputed feature vectors"""
+
+    def __init__(
+        self,
+        matcher: TriggerMatcher,
+        persona_templates: Dict[str, Iterable[str]],
+        trigger_hooks: Dict[str, Iterable[str]],
+        entity_templates: Dict[str, Iterable[str]],
+    ):
+        self.matcher = matcher
+
+        # Fixed candidates: (hook, source, trigger category id or None)
+        self.hooks: List[str] = []
+        self.sources: List[str] = []
+        self.persona_rows: Dict[str, np.ndarray] = {}
+        self.trigger_rows: Dict[int, np.ndarray] = {}
+        trigger_ids: List[Optional[int]] = []
+
+        for persona, templates in persona_templates.items():
+            start = len(self.hooks)
+            for template in templates:
+                self.hooks.append(template)
+                self.sources.append("persona")
+                trigger_ids.append(None)
+            self.persona_rows[persona] = np.arange(start, len(self.hooks))
+
+        for category, hooks in trigger_hooks.items():
+            category_id = matcher.category_index[category]
+            start = len(self.hooks)
+            for hook in hooks:
+                self.hooks.append(hook)
+                self.sources.append("trigger")
+                trigger_ids.append(category_id)
+            self.trigger_rows[category_id] = np.arange(start, len(self.hooks))
+
+        self.entity_templates = [
+            (kind, template) for kind, templates in entity_templates.items() for template in templates
+        ]
+
+        # Vocabulary: every content word used by any candidate
+        vocabulary = set()
+        for text in self.hooks + [template for _, template in self.entity_templates]:
+            vocabulary.update(self._words(PLACEHOLDER_PATTERN.sub(" ", text)))
+        self.vocabulary = {word: index for index, word in enumerate(sorted(vocabulary))}
+        self.category_count = len(matcher.categories)
+
+        self.matrix = _normalize_rows(np.stack([
+            self._features(hook, trigger_id) for hook, trigger_id in zip(self.hooks, trigger_ids)
+        ]))
+        self.priors = np.array([SOURCE_PRIORS[source] for source in self.sources])
+        self.entity_matrix = _normalize_rows(np.stack([
+            self._features(PLACEHOLDER_PATTERN.sub(" ", template)) for _, template in self.entity_templates
+        ])) if self.entity_templates else np.zeros((0, self.category_count + len(self.vocabulary)))
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return [word for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+
+    def _features(self, text: str, trigger_id: Optional[int] = None, scan: Optional[TriggerScan] = None) -> np.ndarray:
+        vector = np.zeros(self.category_count + len(self.vocabulary), dtype=np.float64)
+        scan = scan or self.matcher.scan(text)
+        for category, count in scan.counts.items():
+            vector[self.matcher.category_index[category]] = CATEGORY_FEATURE_WEIGHT * np.log1p(count)
+        if trigger_id is not None:
+            vector[trigger_id] = max(vector[trigger_id], CATEGORY_FEATURE_WEIGHT)
+
+        vocabulary = self.vocabulary
+        word_ids = [vocabulary[word] for word in self._words(text) if word in vocabulary]
+        if word_ids:
+            counts = np.bincount(word_ids, minlength=len(vocabulary))
+            vector[self.category_count:] = np.log1p(counts)
+        return vector
+
+    def rank(
+        self,
+        content: str,
+        persona: str,
+        topics: Iterable[str] = (),
+        scan: Optional[TriggerScan] = None,
+        top_k: int = 8,
+    ) -> List[Dict[str, Any]]:
+        """Top-k candidate hooks for the content as {"hook", "score", "source"}, best first"""
+        scan = scan or self.matcher.scan(content)
+        content_vector = self._features(content, scan=scan)
+        content_vector /= max(float(np.linalg.norm(content_vector)), 1e-9)
+
+        # Persona templates plus the hooks of every trigger category present in the content
+        rows = [self.persona_rows.get(persona, np.zeros(0, dtype=np.int64))]
+        for category in scan.counts:
+            category_rows = self.trigger_rows.get(self.matcher.category_index[category])
+            if category_rows is not None:
+                rows.append(category_rows)
+        rows = np.concatenate(rows)
+        scores = self.matrix[rows] @ content_vector + self.priors[rows]
+        ranked = [
+            {"hook": self.hooks[row], "score": float(score), "source": self.sources[row]}
+            for row, score in zip(rows, scores)
+        ]
+
+        # Entity templates filled with the content's own topics and numbers
+        fillers = {"topic": [topic for topic in topics if topic][:2], "number": extract_numbers(content)}
+        if self.entity_templates:
+            entity_scores = self.entity_matrix @ content_vector + SOURCE_PRIORS["entity"]
+            used = Counter()
+            for (kind, template), score in zip(self.entity_templates, entity_scores):
+                values = fillers.get(kind)
+                if not values:
+                    continue
+                # Rotate through the fillers so each template uses a different one
+                value = values[used[kind] % len(values)]
+                used[kind] += 1
+                ranked.append({
+                    "hook": template.replace("{" + kind + "}", value),
+                    "score": float(score),
+                    "source": "entity",
+                })
+
+        ranked.sort(key=lambda candidate: candidate["score"], reverse=True)
+        top, seen = [], set()
+        for candidate in ranked:
+            if candidate["hook"] in seen:
+                continue
+            seen.add(candidate["hook"])
+            candidate["score"] = round(candidate["score"], 4)
+            top.append(candidate)
+            if len(top) >= top_k:
+                break
+        return top
@@ -0,0 +1,279 @@
+"""
+Background job queue for video processing.
+
+`POST /api/jobs` stores a job and returns immediately; a fixed pool of worker
+tasks drains the queue and records each pipeline stage with its timing so
+clients can poll `GET /api/jobs/{id}` or receive a webhook when it finishes.
+"""
+
+import json
+import time
+import uuid
+import socket
+import asyncio
+import logging
+import sqlite3
+import threading
+import ipaddress
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Job stages, in pipeline order
+STAGE_QUEUED = "queued"
+STAGE_DOWNLOADING = "downloading"
+STAGE_TRANSCRIBING = "transcribing"
+STAGE_ANALYSING = "analysing"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+
+FINAL_STAGES = {STAGE_DONE, STAGE_FAILED}
+
+StageReporter = Callable[[str], Awaitable[None]]
+JobRunner = Callable[[Dict[str, Any], StageReporter], Awaitable[Dict[str, Any]]]
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MongoJobStore:
+    """Job documents kept in a MongoDB collection (motor)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def setup(self) -> None:
+        await self.collection.create_index("id", unique=True)
+
+    async def create(self, job: Dict[str, Any]) -> None:
+        await self.collection.insert_one(dict(job))
+
+    async def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        await self.collection.update_one({"id": job_id}, {"$set": fields})
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": job_id}, {"_id": 0})
+
+    async def pending(self) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"stage": {"$nin": list(FINAL_STAGES)}}, {"_id": 0}).sort("created_at", 1)
+        return await cursor.to_list(length=None)
+
+
+class SQLiteJobStore:
+    """Local SQLite stand-in used when MongoDB is unavailable"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = cursor.fetchall()
+            self._conn.commit()
+            return rows
+
+    async def setup(self) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, stage TEXT NOT NULL, created_at TEXT NOT NULL, doc TEXT NOT NULL)",
+        )
+
+    async def create(self, job: Dict[str, Any]) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO jobs (id, stage, created_at, doc) VALUES (?, ?, ?, ?)",
+            (job["id"], job["stage"], job["created_at"], json.dumps(job)),
+        )
+
+    async def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        def apply():
+            with self._lock:
+                row = self._conn.execute("SELECT doc FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    return
+                job = json.loads(row[0])
+                job.update(fields)
+                self._conn.execute(
+                    "UPDATE jobs SET stage = ?, doc = ? WHERE id = ?",
+                    (job["stage"], json.dumps(job), job_id),
+                )
+                self._conn.commit()
+        await asyncio.to_thread(apply)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(self._execute, "SELECT doc FROM jobs WHERE id = ?", (job_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    async def pending(self) -> List[Dict[str, Any]]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT doc FROM jobs WHERE stage NOT IN (?, ?) ORDER BY created_at",
+            (STAGE_DONE, STAGE_FAILED),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+
+class JobQueue:
+    """In-process queue of job ids drained by a fixed pool of worker tasks"""
+
+    def __init__(self, store, runner: JobRunner, workers: int = 2, webhook_hosts: Collection[str] = ()):
+        self.store = store
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.webhook_hosts = webhook_hosts
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._active = 0
+
+    async def start(self) -> None:
+        await self.store.setup()
+
+        # Jobs interrupted by a restart are picked up again from the start
+        for job in await self.store.pending():
+            await self.store.update(job["id"], {"stage": STAGE_QUEUED, "stage_timings": {}})
+            self._queue.put_nowait(job["id"])
+
+        for index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(index)))
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    def active(self) -> int:
+        """Number of jobs currently being processed"""
+        return self._active
+
+    async def submit(self, video_url: str, persona: str, webhook_url: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        now = utc_now()
+        job = {
+            "id": str(uuid.uuid4()),
+            "video_url": video_url,
+            "persona": persona,
+            "options": options or {},
+            "webhook_url": webhook_url,
+            "stage": STAGE_QUEUED,
+            "stage_timings": {},
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        await self.store.create(job)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(job_id)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._active += 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Job worker {index} failed on {job_id}: {e}")
+            finally:
+                self._active -= 1
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await self.store.get(job_id)
+        if job is None:
+            return
+
+        # Time spent waiting in the queue counts towards the "queued" stage
+        queued_for = (datetime.now(timezone.utc) - datetime.fromisoformat(job["created_at"])).total_seconds()
+        timings: Dict[str, float] = {}
+        current = {"stage": STAGE_QUEUED, "started": time.perf_counter() - max(0.0, queued_for)}
+
+        async def report(stage: str, fields: Optional[Dict[str, Any]] = None) -> None:
+            now = time.perf_counter()
+            previous = current["stage"]
+            timings[previous] = round(timings.get(previous, 0.0) + now - current["started"], 4)
+            current["stage"], current["started"] = stage, now
+            await self.store.update(job_id, {
+                "stage": stage,
+                "stage_timings": dict(timings),
+                "updated_at": utc_now(),
+                **(fields or {}),
+            })
+
+        await self.store.update(job_id, {"started_at": utc_now()})
+        # The final stage is written together with the result or error, so a
+        # poller never sees a finished job without them
+        try:
+            result = await self.runner(job, report)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await report(STAGE_FAILED, {"error": str(e), "finished_at": utc_now()})
+        else:
+            await report(STAGE_DONE, {"result": result, "finished_at": utc_now()})
+
+        if job.get("webhook_url"):
+            finished = await self.store.get(job_id)
+            await asyncio.to_thread(send_webhook, job["webhook_url"], finished, self.webhook_hosts)
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def validate_webhook_url(url: str, allowed_hosts: Collection[str] = ()) -> str:
+    """Raise ValueError unless `url` is an http(s) URL the server may POST to
+
+    With `allowed_hosts` only those hosts are accepted; otherwise the host
+    must resolve exclusively to public addresses, so callers cannot point
+    webhooks at loopback, link-local or private services.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        raise ValueError("Webhook URL must use http or https")
+    host = (parsed.hostname or "").lower()
+    if not host:
+        raise ValueError("Webhook URL has no host")
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"Webhook host {host} is not allowed")
+        return url
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or None, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"Webhook host {host} cannot be resolved")
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        raise ValueError(f"Webhook host {host} resolves to a non-public address")
+    return url
+
+
+def send_webhook(url: str, job: Dict[str, Any], allowed_hosts: Collection[str] = ()) -> None:
+    """POST the finished job document to the caller's webhook"""
+    try:
+        # Checked again at delivery: the host may resolve differently by now
+        validate_webhook_url(url, allowed_hosts)
+        response = requests.post(url, json=job, timeout=10, allow_redirects=False)
+        if response.status_code >= 400:
+            logger.warning(f"Webhook {url} returned HTTP {response.status_code}")
+    except Exception as e:
+        logger.warning(f"Webhook delivery to {url} failed: {e}")
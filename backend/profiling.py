@@ -0,0 +1,376 @@
+"""
+On-demand profiling of the analysis hot paths.
+
+Profiling is off until an admin asks for it, either for a single request
+(`X-Profile: cprofile|sampling` or `?profile=cprofile|sampling`, together
+with the admin token) or for a time window started with
+`POST /api/admin/profile`. Only code wrapped in `profiled(scope)` is
+captured: spaCy keyword extraction, hook ranking, summarisation and viral
+scoring under the "analysis" scope, Whisper decoding under "transcription",
+and the whole `process_video` pipeline under "process_video".
+
+Two modes:
+
+- cprofile: deterministic call statistics for synchronous blocks, returned
+  as a binary pstats file (`python -m pstats`, snakeviz) or as text. One
+  block is profiled at a time; concurrent blocks run unprofiled and are
+  counted as skipped.
+- sampling: a background thread samples the stacks of threads that are
+  inside a profiled block, returned as a speedscope file. It adds no
+  per-call overhead and can also cover the async `process_video` scope,
+  where the event loop thread is sampled (including other requests it
+  interleaves).
+"""
+
+import io
+import sys
+import json
+import time
+import uuid
+import marshal
+import pstats
+import cProfile
+import threading
+import contextlib
+import contextvars
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+MODES = ("cprofile", "sampling")
+SCOPES = ("process_video", "analysis", "transcription")
+DEFAULT_INTERVAL_SECONDS = 0.005
+MAX_STACK_DEPTH = 128
+MAX_SESSIONS = 20
+
+Frame = Tuple[str, str, int]
+
+
+class ProfileSession:
+    """Profile data collected for one request or one time window"""
+
+    def __init__(
+        self,
+        mode: str,
+        scopes: Optional[Sequence[str]] = None,
+        seconds: Optional[float] = None,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        label: str = "",
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}, expected one of {', '.join(MODES)}")
+        unknown = set(scopes or ()) - set(SCOPES)
+        if unknown:
+            raise ValueError(f"Unknown profile scopes {sorted(unknown)}, expected {', '.join(SCOPES)}")
+
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.scopes = frozenset(scopes or SCOPES)
+        self.interval = max(0.001, interval)
+        self.label = label
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.monotonic()
+        self.ends = self.started + seconds if seconds else None
+        self.stopped_at: Optional[datetime] = None
+        self.blocks = 0
+        self.skipped = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        return self.stopped_at is None and (self.ends is None or time.monotonic() < self.ends)
+
+    def start(self) -> "ProfileSession":
+        if self.mode == "sampling":
+            self._sampler = threading.Thread(target=self._sample_loop, name=f"profile-sampler-{self.id}", daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self) -> "ProfileSession":
+        # The sampler thread sees the event within one interval; not joined, so stopping never blocks the loop
+        if self.stopped_at is None:
+            self.stopped_at = datetime.now(timezone.utc)
+            self._stop.set()
+        return self
+
+    def add_profile(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self.blocks += 1
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.ends is not None and time.monotonic() >= self.ends:
+                break
+            frames = sys._current_frames()
+            for thread_id in _sampled_threads_of(self):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = _stack(frame)
+                    with self._lock:
+                        self._stacks[stack] += 1
+        if self.stopped_at is None:
+            self.stopped_at = datetime.now(timezone.utc)
+
+    def pstats_bytes(self) -> bytes:
+        """The profile in the binary format written by pstats.Stats.dump_stats"""
+        with self._lock:
+            return marshal.dumps(self._stats.stats if self._stats else {})
+
+    def pstats_text(self, sort: str = "cumulative", limit: int = 60) -> str:
+        with self._lock:
+            if self._stats is None:
+                return "No profiled calls\n"
+            stream = io.StringIO()
+            self._stats.stream = stream
+            self._stats.sort_stats(sort).print_stats(limit)
+            return stream.getvalue()
+
+    def speedscope(self) -> Dict[str, Any]:
+        """The sampled stacks as a speedscope file (https://www.speedscope.app)"""
+        frame_index: Dict[Frame, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        with self._lock:
+            stacks = list(self._stacks.items())
+        for stack, count in stacks:
+            samples.append([frame_index.setdefault(frame, len(frame_index)) for frame in stack])
+            weights.append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"ayovirals {self.label or self.id}",
+            "exporter": "ayovirals-profiling",
+            "shared": {"frames": [{"name": name, "file": file, "line": line} for name, file, line in frame_index]},
+            "profiles": [{
+                "type": "sampled",
+                "name": ", ".join(sorted(self.scopes)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sum(self._stacks.values())
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "label": self.label,
+            "scopes": sorted(self.scopes),
+            "active": self.active,
+            "started_at": self.started_at.isoformat(),
+            "stopped_at": self.stopped_at.isoformat() if self.stopped_at else None,
+            "blocks": self.blocks,
+            "skipped": self.skipped,
+            "samples": samples,
+        }
+
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    """Root-first stack of (function, file, line) for a thread's current frame"""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+# Threads currently inside a profiled block, with the sampling sessions that want them
+_sampled_threads: Dict[int, List[ProfileSession]] = {}
+_sampled_lock = threading.Lock()
+
+# Only one cProfile profiler can run at a time; nested blocks join the running one
+_cprofile_lock = threading.Lock()
+_cprofile_thread = threading.local()
+
+_request_session: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar("profile_session", default=None)
+
+
+def _sampled_threads_of(session: ProfileSession) -> List[int]:
+    with _sampled_lock:
+        return [thread_id for thread_id, sessions in _sampled_threads.items() if session in sessions]
+
+
+class Profiler:
+    """Keeps the profiling window, per-request sessions and recently finished profiles"""
+
+    def __init__(self):
+        self.window: Optional[ProfileSession] = None
+        self._sessions: "OrderedDict[str, ProfileSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _keep(self, session: ProfileSession) -> ProfileSession:
+        with self._lock:
+            self._sessions[session.id] = session
+            while len(self._sessions) > MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+        return session
+
+    def start_window(
+        self,
+        mode: str,
+        seconds: float,
+        scopes: Optional[Sequence[str]] = None,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+    ) -> ProfileSession:
+        """Profile every scoped block for the next `seconds`; raises RuntimeError if a window is running"""
+        if self.window is not None and self.window.active:
+            raise RuntimeError(f"Profiling window {self.window.id} is already running")
+        self.window = self._keep(ProfileSession(mode, scopes, seconds, interval, label="window").start())
+        return self.window
+
+    def stop_window(self) -> Optional[ProfileSession]:
+        window, self.window = self.window, None
+        return window.stop() if window else None
+
+    def start_request(self, mode: str, label: str) -> ProfileSession:
+        return self._keep(ProfileSession(mode, label=label).start())
+
+    def get(self, session_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [session.summary() for session in reversed(sessions)]
+
+    def current(self, scope: str) -> Optional[ProfileSession]:
+        """The session that wants `scope` profiled in this context, if any"""
+        session = _request_session.get()
+        if session is None:
+            session = self.window
+        if session is None or scope not in session.scopes:
+            return None
+        if not session.active:
+            session.stop()
+            return None
+        return session
+
+    @contextlib.contextmanager
+    def profiled(self, scope: str, sampling_only: bool = False) -> Iterator[None]:
+        """Profile the block if a request or window session covers `scope`
+
+        Also usable as a decorator on synchronous functions. Use `sampling_only` for blocks that await: cProfile cannot attribute
+        time across suspension points.
+        """
+        session = self.current(scope)
+        if session is None:
+            yield
+            return
+
+        if session.mode == "sampling":
+            thread_id = threading.get_ident()
+            session.blocks += 1
+            with _sampled_lock:
+                _sampled_threads.setdefault(thread_id, []).append(session)
+            try:
+                yield
+            finally:
+                with _sampled_lock:
+                    sessions = _sampled_threads[thread_id]
+                    sessions.remove(session)
+                    if not sessions:
+                        del _sampled_threads[thread_id]
+            return
+
+        if sampling_only or getattr(_cprofile_thread, "active", False):
+            yield
+            return
+        if not _cprofile_lock.acquire(blocking=False):
+            # Nested in or concurrent with another profiled block
+            session.skipped += 1
+            yield
+            return
+        profile = cProfile.Profile()
+        _cprofile_thread.active = True
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+        finally:
+            _cprofile_thread.active = False
+            _cprofile_lock.release()
+        session.add_profile(profile)
+
+
+@contextlib.contextmanager
+def request_session(session: ProfileSession) -> Iterator[ProfileSession]:
+    """Profile scoped blocks in this context (and its copies) into `session`"""
+    token = _request_session.set(session)
+    try:
+        yield session
+    finally:
+        _request_session.reset(token)
+        session.stop()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware: profile a single request when an admin asks for it"""
+
+    def __init__(self, app, profiler: Profiler, authorized):
+        self.app = app
+        self.profiler = profiler
+        self.authorized = authorized
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers") or []}
+        mode = headers.get("x-profile") or _query_value(scope.get("query_string", b""), "profile")
+        if not mode or mode == "0":
+            await self.app(scope, receive, send)
+            return
+
+        mode = "cprofile" if mode == "1" else mode
+        if not self.authorized(headers.get("x-admin-token")):
+            await _send_json(send, 403, {"detail": "Profiling requires a valid X-Admin-Token"})
+            return
+        try:
+            session = self.profiler.start_request(mode, label=f"{scope['method']} {scope['path']}")
+        except ValueError as e:
+            await _send_json(send, 400, {"detail": str(e)})
+            return
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", session.id.encode())]}
+            await send(message)
+
+        with request_session(session):
+            await self.app(scope, receive, send_with_profile_id)
+
+
+def _query_value(query_string: bytes, name: str) -> Optional[str]:
+    values = parse_qs(query_string.decode("latin-1")).get(name)
+    return values[-1] if values else None
+
+
+async def _send_json(send, status: int, body: Dict[str, Any]) -> None:
+    payload = json.dumps(body).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+profiler = Profiler()
+profiled = profiler.profiled
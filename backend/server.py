@@ -1,22 +1,53 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from pymongo import MongoClient
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 import os
+import hmac
 import logging
-import subprocess
 import tempfile
+import time
 import uuid
+from datetime import datetime, timezone
 import re
 import json
-from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Literal, Set
 import asyncio
+import functools
+import contextvars
+import contextlib
+import threading
 import spacy
+import numpy as np
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from whisper_pool import whisper_models, parse_model_specs
+from audio_chunking import split_on_silence
+from triggers import TriggerMatcher, TriggerScan
+from viral_scoring import ViralScorer
+from hook_ranking import HookRanker
+from summarizer import summarize
+from cache import SingleFlight, TieredCache, detect_platform, normalize_video_url
+from pymongo import UpdateOne
+from database import (
+    BackgroundWriter, HISTORY_ORDER, create_client, encode_cursor, ensure_video_indexes,
+    migrate_videos, video_history_filter,
+)
+from tracing import TracingMiddleware, configure_logging, record_span, span, traced
+from profiling import ProfilingMiddleware, profiled, profiler
+from metrics import registry, pipeline_labels, timed
+from transcript_store import FileTranscriptStore, GridFSTranscriptStore
+from downloaders import create_downloader
+from batch import BatchWriter, DocumentSaver, expand_playlist, run_batch
+from jobs import (
+    JobQueue, MongoJobStore, SQLiteJobStore, StageReporter, validate_webhook_url,
+    STAGE_DOWNLOADING, STAGE_TRANSCRIBING, STAGE_ANALYSING,
+)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: JSON lines tagged with the request id (LOG_FORMAT=text for plain lines);
+# requests slower than SLOW_REQUEST_SECONDS go to the slow log with their span breakdown
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", "30"))
+configure_logging(os.environ.get("LOG_FORMAT", "json"), slow_log_path=os.environ.get("SLOW_LOG_PATH"))
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -29,22 +60,166 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+# Admin API (profiling) is disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+MAX_PROFILE_SECONDS = float(os.environ.get("MAX_PROFILE_SECONDS", "600"))
 
-# MongoDB connection
-try:
-    client = MongoClient(os.environ.get('MONGO_URL'))
-    db = client.ayovirals_db
-    videos_collection = db.videos
-    logger.info("Connected to MongoDB successfully")
-except Exception as e:
-    logger.error(f"Failed to connect to MongoDB: {e}")
-    db = None
+def admin_authorized(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+app.add_middleware(ProfilingMiddleware, profiler=profiler, authorized=admin_authorized)
+app.add_middleware(TracingMiddleware, slow_seconds=SLOW_REQUEST_SECONDS, untraced_paths=("/api/health", "/api/metrics"))
+
+# MongoDB connection (async, pooled; see database.py for the MONGO_* settings).
+# MONGO_URL=none runs without a database: caches stay in memory and transcripts on disk
+client = db = videos_collection = None
+if os.environ.get('MONGO_URL') == "none":
+    logger.info("MongoDB disabled (MONGO_URL=none)")
+else:
+    try:
+        client = create_client(os.environ.get('MONGO_URL'))
+        db = client.ayovirals_db
+        videos_collection = db.videos
+        logger.info("Connected to MongoDB successfully")
+    except Exception as e:
+        logger.error(f"Failed to connect to MongoDB: {e}")
+        client = None
+        db = None
+
+# Result documents are inserted in the background so responses don't wait on Mongo
+background_writes = BackgroundWriter(int(os.environ.get("MONGO_MAX_PENDING_WRITES", "1000")))
+video_migration: Optional[asyncio.Task] = None
+
+# Pipeline concurrency: at most PIPELINE_CONCURRENCY videos are downloaded and
+# transcribed at once, and blocking work runs on a bounded thread pool
+YTDLP_BIN = os.environ.get("YTDLP_BIN", "/root/.venv/bin/yt-dlp")
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+DOWNLOAD_TIMEOUT_SECONDS = float(os.environ.get("DOWNLOAD_TIMEOUT_SECONDS", "150"))
+SAMPLE_RATE = 16000
+
+# DOWNLOADER=fixture replaces yt-dlp with local files and generated audio fixtures,
+# so the whole pipeline runs without network access
+downloader = create_downloader(
+    os.environ.get("DOWNLOADER", "ytdlp"),
+    YTDLP_BIN,
+    FFMPEG_BIN,
+    DOWNLOAD_TIMEOUT_SECONDS,
+    fixture_dir=os.environ.get("FIXTURE_DIR", os.path.join(tempfile.gettempdir(), "ayovirals_fixtures")),
+    fixture_seconds=float(os.environ.get("FIXTURE_SECONDS", "60")),
+    fixture_variants=int(os.environ.get("FIXTURE_VARIANTS", "8")),
+    fixture_max_seconds=float(os.environ.get("FIXTURE_MAX_SECONDS", "600")),
+    # file:// URLs and local paths are only read from inside this directory
+    fixture_root=os.environ.get("FIXTURE_ROOT") or None,
+)
+PIPELINE_CONCURRENCY = int(os.environ.get("PIPELINE_CONCURRENCY", "2"))
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+# Whisper runs on its own executor, one thread per pooled model; CTranslate2
+# releases the GIL while decoding, so the threads transcribe in parallel
+transcription_executor = ThreadPoolExecutor(max_workers=whisper_models.max_instances, thread_name_prefix="whisper")
+
+# Audio longer than CHUNKED_TRANSCRIPTION_MIN_SECONDS is split on silences into
+# ~CHUNK_TARGET_SECONDS chunks that are transcribed concurrently
+CHUNKED_TRANSCRIPTION_MIN_SECONDS = float(os.environ.get("CHUNKED_TRANSCRIPTION_MIN_SECONDS", "120"))
+CHUNK_TARGET_SECONDS = float(os.environ.get("CHUNK_TARGET_SECONDS", "30"))
+CHUNK_MAX_SECONDS = float(os.environ.get("CHUNK_MAX_SECONDS", "60"))
+pipeline_semaphore = asyncio.Semaphore(PIPELINE_CONCURRENCY)
+
+# Transcription quality tiers: Whisper model size and beam width per tier
+QUALITY_TIERS = {
+    "fast": {"model": "tiny", "beam_size": 1},
+    "balanced": {"model": "base", "beam_size": 5},
+    "accurate": {"model": "small", "beam_size": 5},
+}
+QUALITY_ORDER = ["fast", "balanced", "accurate"]
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+
+# Under load, drop one tier once QUALITY_DOWNGRADE_DEPTH videos are waiting,
+# and fall back to the fast tier (tiny model, greedy decoding) at QUALITY_FAST_DEPTH
+QUALITY_DOWNGRADE_DEPTH = int(os.environ.get("QUALITY_DOWNGRADE_DEPTH", "4"))
+QUALITY_FAST_DEPTH = int(os.environ.get("QUALITY_FAST_DEPTH", "8"))
+
+# Streaming endpoint: re-run hook/keyword analysis every N decoded segments
+STREAM_ANALYSIS_EVERY = int(os.environ.get("STREAM_ANALYSIS_EVERY", "20"))
+
+# Result caches: transcripts per normalized URL, analysis results per URL + persona
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", str(24 * 3600)))
+transcript_cache = TieredCache(
+    "transcript",
+    int(os.environ.get("TRANSCRIPT_CACHE_MAX_ENTRIES", "256")),
+    CACHE_TTL_SECONDS,
+    db.transcript_cache if db is not None else None,
+)
+result_cache = TieredCache(
+    "result",
+    int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "1024")),
+    CACHE_TTL_SECONDS,
+    db.result_cache if db is not None else None,
+)
+
+# Durable transcript store (GridFS, or local files without a database)
+if db is not None:
+    transcript_store = GridFSTranscriptStore(db)
+else:
+    transcript_store = FileTranscriptStore(
+        os.environ.get("TRANSCRIPT_DIR", os.path.join(tempfile.gettempdir(), "ayovirals_transcripts"))
+    )
+
+# In-flight deduplication of identical submissions
+transcript_flight = SingleFlight("transcript")
+result_flight = SingleFlight("result")
+
+# Pipeline metrics for /api/metrics; stage latencies are recorded with metrics.timed
+videos_total = registry.counter(
+    "ayovirals_videos_total", "Videos run through the pipeline", ("platform", "persona", "outcome")
+)
+fallbacks_total = registry.counter(
+    "ayovirals_mock_fallbacks_total", "Analyses that fell back to mock content", ("platform", "reason")
+)
+pipelines_in_flight = registry.gauge("ayovirals_pipelines_in_flight", "Videos currently in the pipeline")
+
+# Initialize spaCy model once per process. Keyword extraction only needs the
+# tagger and NER, so the dependency parser and lemmatizer are left out
+SPACY_DISABLE = [name.strip() for name in os.environ.get("SPACY_DISABLE", "parser,lemmatizer").split(",") if name.strip()]
+SPACY_BATCH_SIZE = int(os.environ.get("SPACY_BATCH_SIZE", "64"))
+SPACY_N_PROCESS = int(os.environ.get("SPACY_N_PROCESS", "1"))
+MAX_BATCH_TEXTS = int(os.environ.get("MAX_BATCH_TEXTS", "1000"))
 
-# Initialize spaCy model
+# Bulk ingestion: videos processed at once per batch, per platform and per insert_many
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "8"))
+BATCH_PLATFORM_CONCURRENCY = int(os.environ.get("BATCH_PLATFORM_CONCURRENCY", "4"))
+BATCH_INSERT_SIZE = int(os.environ.get("BATCH_INSERT_SIZE", "100"))
+MAX_BATCH_VIDEOS = int(os.environ.get("MAX_BATCH_VIDEOS", "5000"))
+# Per-platform overrides, e.g. "youtube:6,tiktok:2"
+BATCH_PLATFORM_LIMITS = {
+    "default": BATCH_PLATFORM_CONCURRENCY,
+    **{
+        name.strip(): int(limit)
+        for name, limit in (item.split(":", 1) for item in os.environ.get("BATCH_PLATFORM_LIMITS", "").split(",") if ":" in item)
+    },
+}
+
+# Re-analysis of stored videos: videos per nlp.pipe batch and bulk_write
+REANALYZE_BATCH_SIZE = int(os.environ.get("REANALYZE_BATCH_SIZE", "64"))
+
+# Video history API: page sizes and the fields a listing may return
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = int(os.environ.get("HISTORY_MAX_LIMIT", "500"))
+HISTORY_FIELDS = {
+    "id", "url", "normalized_url", "platform", "persona", "summary", "hooks", "hook_scores",
+    "keywords", "transcription_tier", "viral_score", "created_at",
+}
+HISTORY_DEFAULT_FIELDS = "id,url,platform,persona,summary,hooks,keywords,created_at"
+
+# Extractive summary length budget
+SUMMARY_MAX_SENTENCES = int(os.environ.get("SUMMARY_MAX_SENTENCES", "3"))
+SUMMARY_MAX_CHARS = int(os.environ.get("SUMMARY_MAX_CHARS", "400"))
 try:
-    nlp = spacy.load("en_core_web_sm")
-    logger.info("spaCy model loaded successfully")
+    nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLE)
+    logger.info(f"spaCy model loaded successfully (pipeline: {', '.join(nlp.pipe_names)})")
 except Exception as e:
     logger.error(f"Failed to load spaCy model: {e}")
     nlp = None
@@ -53,14 +228,49 @@ except Exception as e:
 class VideoRequest(BaseModel):
     video_url: str
     persona: str
+    quality: Literal["fast", "balanced", "accurate"] = "balanced"
+    max_seconds: Optional[float] = Field(default=None, gt=0)
+
+class JobRequest(VideoRequest):
+    webhook_url: Optional[str] = None
+
+class VideoBatchRequest(BaseModel):
+    video_urls: List[str] = []
+    playlist_url: Optional[str] = None
+    persona: str
+    quality: Literal["fast", "balanced", "accurate"] = "balanced"
+    max_seconds: Optional[float] = Field(default=None, gt=0)
+
+class ReanalyzeRequest(BaseModel):
+    persona: Optional[str] = None
+
+class ReanalyzeBatchRequest(BaseModel):
+    video_ids: List[str] = []
+    platform: Optional[str] = None
+    persona: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    limit: Optional[int] = Field(default=None, gt=0)
+
+class ProfileWindowRequest(BaseModel):
+    mode: Literal["cprofile", "sampling"] = "sampling"
+    seconds: float = Field(default=30.0, gt=0)
+    scopes: Optional[List[str]] = None
+    interval_ms: float = Field(default=5.0, ge=1.0, le=1000.0)
+
+class KeywordBatchRequest(BaseModel):
+    texts: List[str]
 
 class VideoResponse(BaseModel):
     id: str
     summary: str
     hooks: List[str]
+    hook_scores: Optional[List[Dict[str, Any]]] = None
     keywords: List[str]
     platform: str
     persona: str
+    transcription_tier: Optional[Dict[str, Any]] = None
+    viral_score: Optional[Dict[str, Any]] = None
 
 # Enhanced persona configurations with viral patterns
 PERSONAS = {
@@ -204,22 +414,97 @@ VIRAL_PATTERNS = {
     "numbers": ["#1", "5 ways", "10 secrets", "100%", "$1M", "24 hours", "30 days", "one trick"]
 }
 
+# Relative weight of each viral pattern in the composite viral score
+VIRAL_PATTERN_WEIGHTS = {
+    "power_words": 1.0,
+    "urgency_words": 0.5,
+    "emotional_triggers": 1.0,
+    "curiosity_gaps": 2.0,
+    "social_proof": 1.0,
+    "numbers": 1.5,
+}
+PERSONA_TRIGGER_WEIGHT = 1.5
+VIRAL_WINDOW_SECONDS = float(os.environ.get("VIRAL_WINDOW_SECONDS", "30"))
+
+# Content triggers for generate_enhanced_hooks, matched as whole words
+HOOK_TRIGGERS = {
+    "money": ["money", "expensive", "cost", "costs", "price", "prices", "dollar", "dollars"],
+    "secret": ["secret", "secrets", "hidden", "private", "exclusive"],
+    "mistake": ["mistake", "mistakes", "wrong", "failed", "fail", "error", "errors"],
+    "amazing": ["amazing", "incredible", "awesome", "fantastic"],
+    "transform": ["change", "changed", "changes", "transform", "transformed", "transformation", "different", "new"],
+    "time": ["day", "days", "week", "weeks", "month", "months", "year", "years", "time"],
+}
+
+HOOK_TRIGGER_HOOKS = {
+    "money": ["The price of this will shock you...", "I spent HOW MUCH on this?!"],
+    "secret": ["I found a secret that changes everything...", "They don't want you to know this..."],
+    "mistake": ["I made this mistake so you don't have to...", "This common mistake is costing you money..."],
+    "amazing": ["This is absolutely mind-blowing...", "You have to see this to believe it..."],
+    "transform": ["This completely changed my perspective...", "My life before vs after this..."],
+    "time": ["What I learned in 30 days...", "This happened in just 24 hours..."],
+}
+
+# One automaton over every trigger phrase: hook triggers, viral patterns and
+# persona triggers, as "hook:<name>", "viral:<name>" and "persona:<id>" categories
+trigger_matcher = TriggerMatcher({
+    **{f"hook:{name}": words for name, words in HOOK_TRIGGERS.items()},
+    **{f"viral:{name}": words for name, words in VIRAL_PATTERNS.items()},
+    **{f"persona:{key}": value["viral_triggers"] for key, value in PERSONAS.items()},
+})
+
+# Hooks filled in with topics and numbers from the content itself
+ENTITY_HOOK_TEMPLATES = {
+    "topic": [
+        "Nobody talks about this side of {topic}...",
+        "Everything you know about {topic} is about to change...",
+        "I finally understand the hype around {topic}...",
+    ],
+    "number": [
+        "{number} - and that's not even the crazy part...",
+        "Wait until you hear what {number} gets you...",
+    ],
+}
+HOOK_COUNT = 8
+
+hook_ranker = HookRanker(
+    trigger_matcher,
+    {key: value["hook_templates"] for key, value in PERSONAS.items()},
+    {f"hook:{name}": hooks for name, hooks in HOOK_TRIGGER_HOOKS.items()},
+    ENTITY_HOOK_TEMPLATES,
+)
+
+viral_scorer = ViralScorer(
+    trigger_matcher,
+    {f"viral:{name}": weight for name, weight in VIRAL_PATTERN_WEIGHTS.items()},
+    PERSONA_TRIGGER_WEIGHT,
+)
+
 # Utility functions
-def detect_platform(url: str) -> str:
-    """Detect video platform from URL"""
-    url_lower = url.lower()
-    if "youtube.com" in url_lower or "youtu.be" in url_lower:
-        return "youtube"
-    elif "tiktok.com" in url_lower:
-        return "tiktok"
-    elif "instagram.com" in url_lower:
-        return "instagram"
-    elif "twitter.com" in url_lower or "x.com" in url_lower:
-        return "twitter"
-    elif "facebook.com" in url_lower or "fb.com" in url_lower:
-        return "facebook"
-    else:
-        return "unknown"
+def keywords_from_doc(doc) -> List[str]:
+    """Hashtag keywords from a processed spaCy Doc"""
+    # Extract named entities
+    entities = [ent.text.lower() for ent in doc.ents if ent.label_ in ["PERSON", "ORG", "GPE", "PRODUCT"]]
+    
+    # Extract important nouns and adjectives
+    important_words = []
+    for token in doc:
+        if (token.pos_ in ["NOUN", "ADJ"] and 
+            len(token.text) > 3 and 
+            not token.is_stop and 
+            not token.is_punct and
+            token.text.isalpha()):
+            important_words.append(token.text.lower())
+    
+    # Count frequency and get top words
+    word_freq = Counter(important_words)
+    top_words = [word for word, count in word_freq.most_common(10) if count > 1]
+    
+    # Combine all keywords
+    all_keywords = entities + top_words
+    
+    # Add hashtags
+    return [f"#{word}" for word in all_keywords[:8]]
 
 def enhanced_keyword_extraction(text: str) -> List[str]:
     """Enhanced keyword extraction using spaCy NLP"""
@@ -227,38 +512,25 @@ def enhanced_keyword_extraction(text: str) -> List[str]:
         return basic_keyword_extraction(text)
     
     try:
-        doc = nlp(text)
-        keywords = []
-        
-        # Extract named entities
-        entities = [ent.text.lower() for ent in doc.ents if ent.label_ in ["PERSON", "ORG", "GPE", "PRODUCT"]]
-        
-        # Extract important nouns and adjectives
-        important_words = []
-        for token in doc:
-            if (token.pos_ in ["NOUN", "ADJ"] and 
-                len(token.text) > 3 and 
-                not token.is_stop and 
-                not token.is_punct and
-                token.text.isalpha()):
-                important_words.append(token.text.lower())
-        
-        # Count frequency and get top words
-        word_freq = Counter(important_words)
-        top_words = [word for word, count in word_freq.most_common(10) if count > 1]
-        
-        # Combine all keywords
-        all_keywords = entities + top_words
-        
-        # Add hashtags
-        hashtag_keywords = [f"#{word}" for word in all_keywords[:8]]
-        
-        return hashtag_keywords
+        return keywords_from_doc(nlp(text))
     
     except Exception as e:
         logger.error(f"spaCy keyword extraction error: {str(e)}")
         return basic_keyword_extraction(text)
 
+def batch_keyword_extraction(texts: List[str]) -> List[List[str]]:
+    """Keyword extraction for many texts at once using spaCy's batched nlp.pipe"""
+    if not nlp:
+        return [basic_keyword_extraction(text) for text in texts]
+    
+    try:
+        docs = nlp.pipe(texts, batch_size=SPACY_BATCH_SIZE, n_process=SPACY_N_PROCESS)
+        return [keywords_from_doc(doc) for doc in docs]
+    
+    except Exception as e:
+        logger.error(f"spaCy batch keyword extraction error: {str(e)}")
+        return [basic_keyword_extraction(text) for text in texts]
+
 def basic_keyword_extraction(text: str) -> List[str]:
     """Basic keyword extraction fallback"""
     words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
@@ -278,168 +550,330 @@ def extract_keywords_from_text(text: str) -> List[str]:
     """Main keyword extraction function"""
     return enhanced_keyword_extraction(text)
 
-def generate_enhanced_hooks(content: str, persona: str) -> List[str]:
-    """Enhanced hook generation with viral patterns"""
+def rank_hooks(
+    content: str,
+    persona: str,
+    topics: Optional[List[str]] = None,
+    scan: Optional[TriggerScan] = None,
+) -> List[Dict[str, Any]]:
+    """Persona, trigger and entity hooks ranked against the content, with scores"""
     if persona not in PERSONAS:
         persona = "viral-trends"
-    
-    persona_config = PERSONAS[persona]
-    hooks = []
-    
-    # Use persona templates
-    for template in persona_config["hook_templates"]:
-        hooks.append(template)
-    
-    # Add content-specific hooks with viral patterns
-    content_lower = content.lower()
-    
-    # Money/value hooks
-    if any(word in content_lower for word in ["money", "expensive", "cost", "price", "dollar"]):
-        hooks.append("The price of this will shock you...")
-        hooks.append("I spent HOW MUCH on this?!")
-    
-    # Secret/hidden hooks
-    if any(word in content_lower for word in ["secret", "hidden", "private", "exclusive"]):
-        hooks.append("I found a secret that changes everything...")
-        hooks.append("They don't want you to know this...")
-    
-    # Mistake/failure hooks
-    if any(word in content_lower for word in ["mistake", "wrong", "failed", "error"]):
-        hooks.append("I made this mistake so you don't have to...")
-        hooks.append("This common mistake is costing you money...")
-    
-    # Amazing/incredible hooks
-    if any(word in content_lower for word in ["amazing", "incredible", "awesome", "fantastic"]):
-        hooks.append("This is absolutely mind-blowing...")
-        hooks.append("You have to see this to believe it...")
-    
-    # Transform/change hooks
-    if any(word in content_lower for word in ["change", "transform", "different", "new"]):
-        hooks.append("This completely changed my perspective...")
-        hooks.append("My life before vs after this...")
-    
-    # Time-based hooks
-    if any(word in content_lower for word in ["day", "week", "month", "year", "time"]):
-        hooks.append("What I learned in 30 days...")
-        hooks.append("This happened in just 24 hours...")
-    
-    # Return top hooks with variety
-    return hooks[:8]
+    return hook_ranker.rank(content, persona, topics or [], scan=scan, top_k=HOOK_COUNT)
+
+def generate_enhanced_hooks(content: str, persona: str, topics: Optional[List[str]] = None) -> List[str]:
+    """Enhanced hook generation with viral patterns"""
+    return [candidate["hook"] for candidate in rank_hooks(content, persona, topics)]
 
 def generate_hooks(content: str, persona: str) -> List[str]:
     """Generate viral hooks based on content and persona"""
     return generate_enhanced_hooks(content, persona)
 
-def generate_enhanced_summary(text: str) -> str:
+def generate_enhanced_summary(text: str, segments: Optional[List[Dict[str, Any]]] = None) -> str:
     """Enhanced summary generation"""
     if not text or len(text) < 50:
         return "Video content analysis in progress..."
     
-    # Split into sentences
-    sentences = [s.strip() for s in text.split('.') if s.strip()]
+    # Extractive summary: the most central sentences within the length budget,
+    # cut at Whisper segment boundaries when the transcript has them
+    return summarize(text, segments, SUMMARY_MAX_SENTENCES, SUMMARY_MAX_CHARS)
+
+def generate_summary(text: str, segments: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Generate a summary of the video content"""
+    return generate_enhanced_summary(text, segments)
+
+async def run_blocking(func, *args, executor: Optional[ThreadPoolExecutor] = None):
+    """Run CPU-bound or blocking work on a bounded executor (the analysis pool by default)"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor or analysis_executor, functools.partial(context.run, func, *args))
+
+async def download_video(url: str, max_seconds: Optional[float] = None) -> tuple:
+    """Fetch metadata and 16kHz mono audio through the configured downloader (see downloaders.py)"""
+    return await downloader.fetch(url, max_seconds)
+
+MOCK_TRANSCRIPTION = "Mock transcription: Video content analysis. The speaker discusses various topics that can be used for hook generation."
+
+@profiled("transcription")
+def transcribe_audio_sync(
+    audio: np.ndarray,
+    on_segment: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+    offset: float = 0.0,
+    model_size: str = "base",
+    beam_size: int = 5,
+) -> List[Dict[str, Any]]:
+    """Transcribe audio using faster-whisper (blocking, run via run_blocking); offset shifts timestamps
+
+    on_segment is called with each segment as it decodes and may return False to stop decoding early.
+    """
+    segments = []
     
-    if len(sentences) < 3:
-        return text[:300] + "..." if len(text) > 300 else text
+    # Borrow a warm model of the requested size from the shared pool
+    with span("whisper", model=model_size, offset=offset), whisper_models.acquire(model_size, WHISPER_COMPUTE_TYPE) as model:
+        # Transcribe the in-memory audio; segments are decoded lazily, so
+        # they must be consumed while the model is still checked out
+        decoded, info = model.transcribe(audio, beam_size=beam_size)
+        decode_started = time.perf_counter()
+        for segment in decoded:
+            item = {"start": round(segment.start + offset, 2), "end": round(segment.end + offset, 2), "text": segment.text.strip()}
+            record_span("whisper.segment", decode_started, time.perf_counter(), audio_start=item["start"], audio_end=item["end"])
+            segments.append(item)
+            if on_segment is not None and on_segment(item) is False:
+                # The consumer has gone away: stop decoding the rest of the audio
+                break
+            decode_started = time.perf_counter()
+    
+    return segments
+
+async def transcribe_chunked(audio: np.ndarray, tier: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Split long audio on silences and transcribe the chunks in parallel, stitching timestamps back together"""
+    chunks = split_on_silence(audio, SAMPLE_RATE, CHUNK_TARGET_SECONDS, CHUNK_MAX_SECONDS)
+    logger.info(f"Transcribing {len(audio) / SAMPLE_RATE:.0f}s of audio in {len(chunks)} chunks")
+    
+    results = await asyncio.gather(*[
+        run_blocking(
+            transcribe_audio_sync, audio[start:end], None, start / SAMPLE_RATE, tier["model"], tier["beam_size"],
+            executor=transcription_executor,
+        )
+        for start, end in chunks
+    ])
+    return [segment for chunk_segments in results for segment in chunk_segments]
+
+async def transcribe_audio(
+    audio: np.ndarray,
+    on_segment: Optional[Callable[[Dict[str, Any]], Optional[bool]]] = None,
+    tier: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Transcribe audio using faster-whisper; on_segment is called from the worker thread as segments decode"""
+    tier = tier or {"tier": "balanced", **QUALITY_TIERS["balanced"]}
+    try:
+        if on_segment is None and len(audio) > CHUNKED_TRANSCRIPTION_MIN_SECONDS * SAMPLE_RATE:
+            segments = await transcribe_chunked(audio, tier)
+        else:
+            segments = await run_blocking(
+                transcribe_audio_sync, audio, on_segment, 0.0, tier["model"], tier["beam_size"],
+                executor=transcription_executor,
+            )
+        transcription = " ".join(segment["text"] for segment in segments)
+        return {"transcription": transcription.strip(), "segments": segments, "tier": tier}
+        
+    except Exception as e:
+        logger.error(f"Transcription error: {str(e)}")
+        # Fallback to mock transcription if Whisper fails
+        return {"transcription": MOCK_TRANSCRIPTION, "segments": [], "tier": tier}
+
+def pipeline_queue_depth() -> int:
+    """Videos waiting for a download/transcription slot plus jobs waiting for a worker
+
+    Batch videos waiting for a slot are left out: a batch queues up to BATCH_WORKERS
+    videos behind PIPELINE_CONCURRENCY slots by design, which is not load to shed.
+    """
+    return pipeline_waiting + job_queue.depth()
+
+def select_transcription_tier(quality: str, max_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Map the requested quality to a Whisper model and beam width, downgrading when the pipeline is backed up"""
+    depth = pipeline_queue_depth()
+    tier = quality
+    if depth >= QUALITY_FAST_DEPTH:
+        tier = "fast"
+    elif depth >= QUALITY_DOWNGRADE_DEPTH:
+        tier = QUALITY_ORDER[max(0, QUALITY_ORDER.index(quality) - 1)]
     
-    # Try to create a meaningful summary
-    if len(sentences) >= 3:
-        # Take first sentence, a middle one, and last one
-        middle_idx = len(sentences) // 2
-        summary_parts = [sentences[0], sentences[middle_idx], sentences[-1]]
-        summary = ". ".join(summary_parts) + "."
+    return {
+        "tier": tier,
+        "requested": quality,
+        **QUALITY_TIERS[tier],
+        "max_seconds": max_seconds,
+        "downgraded": tier != quality,
+        "queue_depth": depth,
+    }
+
+def transcript_cache_key(normalized_url: str, quality: str, max_seconds: Optional[float]) -> str:
+    return f"{normalized_url}|{quality}|{f'{max_seconds:g}' if max_seconds else 'full'}"
+
+def stored_transcript_covers(info: Optional[Dict[str, Any]], quality: str, max_seconds: Optional[float]) -> bool:
+    """Whether a stored transcript is at least the requested quality and covers the requested length"""
+    if not info or info.get("tier") not in QUALITY_ORDER:
+        return False
+    if QUALITY_ORDER.index(info["tier"]) < QUALITY_ORDER.index(quality):
+        return False
+    stored_limit = info.get("max_seconds")
+    return stored_limit is None or (max_seconds is not None and stored_limit >= max_seconds)
+
+def trim_transcript(transcript: Dict[str, Any], max_seconds: Optional[float]) -> Dict[str, Any]:
+    """A stored transcript cut down to the first max_seconds"""
+    if max_seconds is None or transcript["tier"].get("max_seconds") == max_seconds:
+        return transcript
+    segments = [segment for segment in transcript["segments"] if segment["start"] < max_seconds]
+    return {
+        **transcript,
+        "transcription": " ".join(segment["text"] for segment in segments).strip(),
+        "segments": segments,
+        "tier": {**transcript["tier"], "max_seconds": max_seconds},
+    }
+
+async def load_stored_transcript(normalized_url: str, quality: str, max_seconds: Optional[float]) -> Optional[Dict[str, Any]]:
+    """Stored transcript usable for this request, if any"""
+    try:
+        if not stored_transcript_covers(await transcript_store.info(normalized_url), quality, max_seconds):
+            return None
+        transcript = await transcript_store.get(normalized_url)
+    except Exception as e:
+        logger.warning(f"Transcript store lookup failed: {e}")
+        return None
+    return trim_transcript(transcript, max_seconds) if transcript is not None else None
+
+async def persist_transcript(normalized_url: str, transcript: Dict[str, Any]) -> None:
+    """Keep a new transcript unless the stored one is already at least as good"""
+    tier = transcript["tier"]
+    if stored_transcript_covers(await transcript_store.info(normalized_url), tier["tier"], tier["max_seconds"]):
+        return
+    await transcript_store.put(normalized_url, transcript)
+
+async def save_transcript(normalized_url: str, transcript: Dict[str, Any]) -> None:
+    """Store a freshly transcribed video in the background"""
+    async def persist():
+        with timed("transcript_store"):
+            await persist_transcript(normalized_url, transcript)
+    await background_writes.submit(persist, "transcript save")
+
+pipeline_waiting = 0
+batch_waiting = 0
+# Download/transcription tasks of streaming requests; they outlive a disconnected client until Whisper stops
+stream_transcriptions: Set[asyncio.Task] = set()
+# Set while a batch video runs, so its wait for a slot is counted in batch_waiting
+batch_video: contextvars.ContextVar[bool] = contextvars.ContextVar("batch_video", default=False)
+
+@contextlib.asynccontextmanager
+async def pipeline_slot():
+    """Hold one of the PIPELINE_CONCURRENCY download/transcription slots, counting callers still waiting"""
+    global pipeline_waiting, batch_waiting
+    batch = batch_video.get()
+    if batch:
+        batch_waiting += 1
     else:
-        summary = ". ".join(sentences) + "."
+        pipeline_waiting += 1
+    try:
+        await pipeline_semaphore.acquire()
+    finally:
+        if batch:
+            batch_waiting -= 1
+        else:
+            pipeline_waiting -= 1
+    try:
+        yield
+    finally:
+        pipeline_semaphore.release()
+
+@profiled("analysis")
+def analyze_content(
+    content: str,
+    persona: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    content_keywords: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Run hook, keyword, summary and viral score generation over the content (CPU-bound)"""
+    # Generate enhanced keywords
+    persona_keywords = PERSONAS.get(persona, PERSONAS["viral-trends"])["keywords"]
+    if content_keywords is None:
+        with timed("keywords"):
+            content_keywords = extract_keywords_from_text(content)
+    
+    # One trigger scan serves hook ranking and viral scoring: the content
+    # ends with the joined segment texts the scorer buckets
+    with timed("triggers"):
+        scan = trigger_matcher.scan(content)
+    
+    # Rank hooks, filling entity templates with the content's top keywords
+    with timed("hooks"):
+        hook_scores = rank_hooks(content, persona, [keyword.lstrip("#") for keyword in content_keywords], scan)
+    hooks = [candidate["hook"] for candidate in hook_scores]
+    all_keywords = persona_keywords + content_keywords
+    
+    # Remove duplicates while preserving order
+    unique_keywords = []
+    seen = set()
+    for keyword in all_keywords:
+        if keyword not in seen:
+            unique_keywords.append(keyword)
+            seen.add(keyword)
+    
+    # Generate enhanced summary
+    with timed("summary"):
+        summary = generate_summary(content, segments)
     
-    # Ensure summary is reasonable length
-    if len(summary) > 400:
-        summary = summary[:400] + "..."
+    # Score against viral patterns; without timestamped segments the whole
+    # content is scored as a single segment
+    with timed("viral_score"):
+        viral_score = viral_scorer.score(
+            segments or [{"start": 0.0, "end": 0.0, "text": content}], persona, VIRAL_WINDOW_SECONDS, scan=scan
+        )
     
-    return summary
+    return {
+        "summary": summary,
+        "hooks": hooks,
+        "hook_scores": hook_scores,
+        "keywords": unique_keywords,
+        "viral_score": viral_score,
+    }
 
-def generate_summary(text: str) -> str:
-    """Generate a summary of the video content"""
-    return generate_enhanced_summary(text)
+@profiled("analysis")
+def analyze_contents(items: List[tuple]) -> List[Dict[str, Any]]:
+    """analyze_content over many (content, persona, segments) items with one nlp.pipe keyword pass"""
+    with timed("keywords_batch"):
+        keywords = batch_keyword_extraction([content for content, _, _ in items])
+    return [
+        analyze_content(content, persona, segments, content_keywords)
+        for (content, persona, segments), content_keywords in zip(items, keywords)
+    ]
 
-async def download_video(url: str) -> tuple:
-    """Download video and extract audio using yt-dlp"""
+# Startup
+@app.on_event("startup")
+async def preload_models():
+    """Load Whisper models once so requests never pay the model construction cost"""
+    specs = parse_model_specs(os.environ.get("WHISPER_PRELOAD", "base:int8,tiny:int8"))
+    instances = int(os.environ.get("WHISPER_WARM_INSTANCES", "1"))
+    await asyncio.get_running_loop().run_in_executor(None, whisper_models.preload, specs, instances)
+
+@app.on_event("startup")
+async def setup_video_collection():
+    """Index the videos collection and migrate older documents in the background"""
+    global video_migration
+    if db is None:
+        return
     try:
-        # Create temporary directory
-        temp_dir = tempfile.mkdtemp()
-        
-        # Download video info first
-        cmd_info = [
-            "/root/.venv/bin/yt-dlp",
-            "--print", "title",
-            "--print", "duration",
-            "--print", "description",
-            url
-        ]
-        
-        result = subprocess.run(cmd_info, capture_output=True, text=True, timeout=30)
-        
-        if result.returncode != 0:
-            logger.error(f"yt-dlp info failed: {result.stderr}")
-            return None, None, None
-        
-        output_lines = result.stdout.strip().split('\n')
-        title = output_lines[0] if len(output_lines) > 0 else "Unknown"
-        duration = output_lines[1] if len(output_lines) > 1 else "Unknown"
-        description = output_lines[2] if len(output_lines) > 2 else ""
-        
-        # Download audio only
-        audio_file = os.path.join(temp_dir, "audio.%(ext)s")
-        cmd_download = [
-            "/root/.venv/bin/yt-dlp",
-            "-x",
-            "--audio-format", "wav",
-            "--audio-quality", "0",
-            "-o", audio_file,
-            url
-        ]
-        
-        result = subprocess.run(cmd_download, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode != 0:
-            logger.error(f"yt-dlp download failed: {result.stderr}")
-            return None, None, None
-        
-        # Find the downloaded audio file
-        audio_files = list(Path(temp_dir).glob("audio.*"))
-        if not audio_files:
-            logger.error("No audio file found after download")
-            return None, None, None
-        
-        return str(audio_files[0]), title, description
-        
-    except subprocess.TimeoutExpired:
-        logger.error("yt-dlp timed out")
-        return None, None, None
+        await ensure_video_indexes(videos_collection)
     except Exception as e:
-        logger.error(f"Video download error: {str(e)}")
-        return None, None, None
+        logger.error(f"Failed to create video indexes: {e}")
+    
+    if os.environ.get("MONGO_MIGRATE_ON_STARTUP", "true").lower() == "true":
+        video_migration = asyncio.create_task(
+            migrate_videos(videos_collection, lambda url: normalize_video_url(url, detect_platform(url)))
+        )
 
-async def transcribe_audio(audio_file: str) -> str:
-    """Transcribe audio using faster-whisper"""
+@app.on_event("startup")
+async def setup_caches():
+    await transcript_cache.setup()
+    await result_cache.setup()
+
+@app.on_event("startup")
+async def start_job_queue():
     try:
-        from faster_whisper import WhisperModel
-        
-        # Initialize model (using base model for speed)
-        model = WhisperModel("base", device="cpu", compute_type="int8")
-        
-        # Transcribe the audio file
-        segments, info = model.transcribe(audio_file, beam_size=5)
-        
-        # Extract text from segments
-        transcription = ""
-        for segment in segments:
-            transcription += segment.text + " "
-        
-        return transcription.strip()
-        
+        await job_queue.start()
     except Exception as e:
-        logger.error(f"Transcription error: {str(e)}")
-        # Fallback to mock transcription if Whisper fails
-        return "Mock transcription: Video content analysis. The speaker discusses various topics that can be used for hook generation."
+        logger.error(f"Failed to start job queue: {e}")
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+async def close_database():
+    if video_migration is not None and not video_migration.done():
+        video_migration.cancel()
+    await background_writes.drain()
+    if client is not None:
+        client.close()
 
 # API routes
 @app.get("/")
@@ -451,113 +885,476 @@ async def health_check():
     return {
         "status": "healthy", 
         "database": "connected" if db is not None else "disconnected",
+        "database_writes": background_writes.stats(),
         "nlp": "enabled" if nlp is not None else "disabled",
+        "whisper": whisper_models.stats(),
+        "jobs": {"queued": job_queue.depth(), "active": job_queue.active()},
+        "cache": {"transcripts": transcript_cache.stats(), "results": result_cache.stats()},
+        "coalescing": {"transcripts": transcript_flight.stats(), "results": result_flight.stats()},
         "version": "2.0.0"
     }
 
-@app.post("/api/process-video")
-async def process_video(request: VideoRequest):
-    """Enhanced video processing with AI-powered analysis"""
-    try:
-        # Validate URL
-        if not request.video_url.strip():
-            raise HTTPException(status_code=400, detail="Video URL is required")
+async def fetch_transcript(video_url: str, tier: Dict[str, Any], report: StageReporter) -> Optional[Dict[str, Any]]:
+    """Download and transcribe a video; returns None when the download fails"""
+    # Limit how many downloads/transcriptions run at once so the
+    # event loop stays free for health checks and lookups
+    async with pipeline_slot():
+        # Download video and decode its audio (metadata arrives in the same yt-dlp run)
+        await report(STAGE_DOWNLOADING)
+        with timed("download"):
+            audio, title, description = await download_video(video_url, tier["max_seconds"])
         
-        # Detect platform
-        platform = detect_platform(request.video_url)
+        if audio is None:
+            return None
         
-        # Generate unique ID
-        video_id = str(uuid.uuid4())
+        # Transcribe audio
+        await report(STAGE_TRANSCRIBING)
+        with timed("transcription"):
+            transcribed = await transcribe_audio(audio, tier=tier)
+    
+    logger.info(f"Video processed successfully: {title}")
+    return {"title": title, "description": description, **transcribed}
+
+def is_real_transcript(transcript: Optional[Dict[str, Any]]) -> bool:
+    return transcript is not None and transcript["transcription"] != MOCK_TRANSCRIPTION
+
+def transcript_content(transcript: Dict[str, Any]) -> str:
+    """Text used for content analysis of a transcribed video"""
+    return f"{transcript['title']}. {transcript['description']}. {transcript['transcription']}"
+
+def mock_content(platform: str, persona: str) -> str:
+    """Fallback analysis text when a video cannot be downloaded or transcribed"""
+    return f"Video analysis for {platform} content. Enhanced mock content for {persona} persona hook generation with viral patterns."
+
+async def get_transcript(video_url: str, normalized_url: str, quality: str, max_seconds: Optional[float], report: StageReporter) -> Optional[Dict[str, Any]]:
+    """Cached transcript lookup; concurrent misses for one URL share a single download"""
+    cache_key = transcript_cache_key(normalized_url, quality, max_seconds)
+    transcript = await transcript_cache.get(cache_key)
+    if transcript is not None:
+        logger.info(f"Transcript cache hit: {cache_key}")
+        return transcript
+    
+    async def load(report: StageReporter):
+        # Transcribed before (possibly at a better quality): no download needed
+        transcript = await load_stored_transcript(normalized_url, quality, max_seconds)
+        if transcript is not None:
+            logger.info(f"Transcript store hit: {normalized_url}")
+            await transcript_cache.set(cache_key, transcript)
+            return transcript
+        
+        logger.info(f"Processing video: {video_url}")
+        tier = select_transcription_tier(quality, max_seconds)
+        transcript = await fetch_transcript(video_url, tier, report)
+        if is_real_transcript(transcript):
+            # A downgraded transcript is cached under the tier actually used
+            await transcript_cache.set(transcript_cache_key(normalized_url, tier["tier"], max_seconds), transcript)
+            await save_transcript(normalized_url, transcript)
+        return transcript
+    
+    # Every caller waiting on the download hears its stages, not only the one that started it
+    return await transcript_flight.do(cache_key, load, report)
+
+async def run_video_pipeline(
+    video_url: str,
+    persona: str,
+    report_stage: Optional[StageReporter] = None,
+    quality: str = "balanced",
+    max_seconds: Optional[float] = None,
+    save_document: Optional[DocumentSaver] = None,
+) -> Dict[str, Any]:
+    """Download, transcribe and analyse a video, saving the result when a database is available"""
+    async def report(stage: str):
+        if report_stage is not None:
+            await report_stage(stage)
+    
+    # Detect platform
+    platform = detect_platform(video_url)
+    normalized_url = normalize_video_url(video_url, platform)
+    pipeline_labels(platform, metrics_persona(persona))
+    
+    # Identical link + persona + quality already analysed: reuse the stored result
+    result_key = f"{transcript_cache_key(normalized_url, quality, max_seconds)}|{persona}"
+    with timed("result_cache"):
+        cached_result = await result_cache.get(result_key)
+    if cached_result is not None:
+        logger.info(f"Result cache hit: {result_key}")
+        videos_total.inc(platform=platform, persona=metrics_persona(persona), outcome="cached")
+        return dict(cached_result)
+    
+    # Concurrent submissions of the same link + persona await one execution
+    with pipelines_in_flight.track(), timed("total"), profiled("process_video", sampling_only=True):
+        result = await result_flight.do(
+            result_key,
+            lambda report: process_uncached_video(
+                video_url, persona, platform, normalized_url, quality, max_seconds, result_key, report, save_document
+            ),
+            report,
+        )
+    return dict(result)
+
+def metrics_persona(persona: str) -> str:
+    """Persona metric label; unknown personas share one label to bound cardinality"""
+    return persona if persona in PERSONAS else "other"
+
+def record_outcome(platform: str, persona: str, transcript: Optional[Dict[str, Any]], failed: bool = False) -> None:
+    """Count a finished video, and the reason when it fell back to mock content"""
+    if is_real_transcript(transcript):
+        outcome = "transcribed"
+    else:
+        outcome = "fallback"
+        reason = "error" if failed else ("download_failed" if transcript is None else "transcription_failed")
+        fallbacks_total.inc(platform=platform, reason=reason)
+    videos_total.inc(platform=platform, persona=metrics_persona(persona), outcome=outcome)
+
+async def process_uncached_video(
+    video_url: str,
+    persona: str,
+    platform: str,
+    normalized_url: str,
+    quality: str,
+    max_seconds: Optional[float],
+    result_key: str,
+    report: StageReporter,
+    save_document: Optional[DocumentSaver] = None,
+) -> Dict[str, Any]:
+    """Pipeline body for a result cache miss"""
+    # Generate unique ID
+    video_id = str(uuid.uuid4())
+    
+    # Try to download and process video; transcripts are shared across personas
+    failed = False
+    try:
+        transcript = await get_transcript(video_url, normalized_url, quality, max_seconds, report)
         
-        # Try to download and process video
+        if transcript is not None:
+            # Use real transcription for content analysis
+            content_for_analysis = transcript_content(transcript)
+        else:
+            # Fallback to mock content if download fails
+            logger.warning("Video download failed, using enhanced mock content")
+            content_for_analysis = mock_content(platform, persona)
+            
+    except Exception as e:
+        logger.error(f"Video processing error: {str(e)}")
+        # Fallback to mock content if processing fails
+        transcript = None
+        failed = True
+        content_for_analysis = mock_content(platform, persona)
+    record_outcome(platform, persona, transcript, failed)
+    
+    # Generate hooks, keywords and summary off the event loop
+    await report(STAGE_ANALYSING)
+    segments = transcript.get("segments") if transcript else None
+    with timed("analysis"):
+        analysis = await run_blocking(analyze_content, content_for_analysis, persona, segments)
+    
+    response = video_response(video_id, analysis, platform, persona, transcript)
+    
+    await store_result(response, video_url, normalized_url, transcript, result_key, save_document)
+    return response
+
+def video_response(
+    video_id: str,
+    analysis: Dict[str, Any],
+    platform: str,
+    persona: str,
+    transcript: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """API response for a finished analysis"""
+    return {
+        "id": video_id,
+        "summary": analysis["summary"],
+        "hooks": analysis["hooks"],
+        "hook_scores": analysis["hook_scores"],
+        "keywords": analysis["keywords"],
+        "platform": platform,
+        "persona": persona,
+        "transcription_tier": transcript.get("tier") if transcript else None,
+        "viral_score": analysis["viral_score"]
+    }
+
+def video_document(response: Dict[str, Any], video_url: str, normalized_url: str) -> Dict[str, Any]:
+    """Database document for a finished analysis"""
+    return {
+        "id": response["id"],
+        "url": video_url,
+        "normalized_url": normalized_url,
+        "platform": response["platform"],
+        "persona": response["persona"],
+        "summary": response["summary"],
+        "hooks": response["hooks"],
+        "hook_scores": response["hook_scores"],
+        "keywords": response["keywords"],
+        "transcription_tier": response["transcription_tier"],
+        "viral_score": response["viral_score"],
+        "created_at": datetime.now(timezone.utc)
+    }
+
+async def store_result(
+    response: Dict[str, Any],
+    video_url: str,
+    normalized_url: str,
+    transcript: Optional[Dict[str, Any]],
+    result_key: str,
+    save_document: Optional[DocumentSaver] = None,
+) -> None:
+    """Save a finished analysis to the database (or hand it to save_document) and the result cache"""
+    document = video_document(response, video_url, normalized_url)
+    
+    # Only cache results built from a real transcript at the requested tier,
+    # never mock fallbacks or load-shedding downgrades
+    async def cache_result():
+        if is_real_transcript(transcript) and not transcript["tier"]["downgraded"]:
+            await result_cache.set(result_key, response)
+    
+    if save_document is not None:
+        # Bulk ingestion buffers documents for insert_many and caches each
+        # result once its document has been written
+        await save_document(document, cache_result)
+        return
+    if db is not None:
+        # Save to database if available, without holding up the response
+        async def insert():
+            with timed("db_write"):
+                await videos_collection.insert_one(document)
+        await background_writes.submit(insert, "video insert")
+    await cache_result()
+
+def ndjson(event: Dict[str, Any]) -> bytes:
+    return (json.dumps(event) + "\n").encode()
+
+async def stream_video_pipeline(video_url: str, persona: str, quality: str = "balanced", max_seconds: Optional[float] = None) -> AsyncIterator[bytes]:
+    """Yield NDJSON events: metadata, transcript segments as they decode, incremental and final analysis"""
+    platform = detect_platform(video_url)
+    normalized_url = normalize_video_url(video_url, platform)
+    cache_key = transcript_cache_key(normalized_url, quality, max_seconds)
+    video_id = str(uuid.uuid4())
+    pipeline_labels(platform, metrics_persona(persona))
+    yield ndjson({"type": "meta", "id": video_id, "platform": platform, "persona": persona})
+    
+    failed = False
+    transcript = await transcript_cache.get(cache_key)
+    if transcript is None:
+        transcript = await load_stored_transcript(normalized_url, quality, max_seconds)
+    if transcript is not None:
+        # Cached or stored transcript: replay its segments straight away
+        yield ndjson({"type": "info", "title": transcript["title"], "description": transcript["description"]})
+        for segment in transcript.get("segments", []):
+            yield ndjson({"type": "segment", **segment})
+    else:
         try:
-            logger.info(f"Processing video: {request.video_url}")
+            logger.info(f"Streaming video: {video_url}")
+            tier = select_transcription_tier(quality, max_seconds)
+            
+            # Download and transcription run in their own task, which holds the
+            # pipeline slot until Whisper has actually stopped, whatever happens
+            # to this generator. Whisper decodes on a worker thread and hands each
+            # segment to the loop; setting `stop` (client gone) makes it stop
+            # after the current segment
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            stop = threading.Event()
+            downloading = True
             
-            # Download video and extract audio
-            audio_file, title, description = await download_video(request.video_url)
+            def on_segment(segment: Dict[str, Any]) -> bool:
+                if stop.is_set():
+                    return False
+                loop.call_soon_threadsafe(queue.put_nowait, {"type": "segment", **segment})
+                return True
             
-            if audio_file:
-                # Transcribe audio
-                transcription = await transcribe_audio(audio_file)
-                
-                # Use real transcription for content analysis
-                content_for_analysis = f"{title}. {description}. {transcription}"
-                
-                # Clean up audio file
+            async def download_and_transcribe() -> Optional[Dict[str, Any]]:
+                nonlocal downloading
                 try:
-                    import os
-                    os.remove(audio_file)
-                    # Also remove parent directory if it's a temp directory
-                    parent_dir = os.path.dirname(audio_file)
-                    if "tmp" in parent_dir:
-                        import shutil
-                        shutil.rmtree(parent_dir, ignore_errors=True)
-                except Exception as e:
-                    logger.warning(f"Cleanup error: {str(e)}")
-                
-                logger.info(f"Video processed successfully: {title}")
-                
-            else:
-                # Fallback to mock content if download fails
-                logger.warning("Video download failed, using enhanced mock content")
-                content_for_analysis = f"Video analysis for {platform} content. Enhanced mock content for {request.persona} persona hook generation with viral patterns."
-                
-        except Exception as e:
-            logger.error(f"Video processing error: {str(e)}")
-            # Fallback to mock content if processing fails
-            content_for_analysis = f"Video analysis for {platform} content. Enhanced mock content for {request.persona} persona hook generation with viral patterns."
-        
-        # Generate enhanced hooks
-        hooks = generate_hooks(content_for_analysis, request.persona)
-        
-        # Generate enhanced keywords
-        persona_keywords = PERSONAS.get(request.persona, PERSONAS["viral-trends"])["keywords"]
-        content_keywords = extract_keywords_from_text(content_for_analysis)
-        all_keywords = persona_keywords + content_keywords
-        
-        # Remove duplicates while preserving order
-        unique_keywords = []
-        seen = set()
-        for keyword in all_keywords:
-            if keyword not in seen:
-                unique_keywords.append(keyword)
-                seen.add(keyword)
-        
-        # Generate enhanced summary
-        summary = generate_summary(content_for_analysis)
-        
-        # Create response
-        response = {
-            "id": video_id,
-            "summary": summary,
-            "hooks": hooks,
-            "keywords": unique_keywords,
-            "platform": platform,
-            "persona": request.persona
-        }
-        
-        # Save to database if available
-        if db is not None:
+                    async with pipeline_slot():
+                        with timed("download"):
+                            audio, title, description = await download_video(video_url, max_seconds)
+                        downloading = False
+                        if audio is None or stop.is_set():
+                            return None
+                        queue.put_nowait({"type": "info", "title": title, "description": description, "transcription_tier": tier})
+                        with timed("transcription"):
+                            transcribed = await transcribe_audio(audio, on_segment, tier)
+                        return {"title": title, "description": description, **transcribed}
+                finally:
+                    queue.put_nowait(None)
+            
+            transcription_task = asyncio.ensure_future(download_and_transcribe())
+            stream_transcriptions.add(transcription_task)
+            transcription_task.add_done_callback(stream_transcriptions.discard)
             try:
-                videos_collection.insert_one({
-                    "id": video_id,
-                    "url": request.video_url,
-                    "platform": platform,
-                    "persona": request.persona,
-                    "summary": summary,
-                    "hooks": hooks,
-                    "keywords": unique_keywords,
-                    "created_at": "2024-01-01T00:00:00Z"  # Would use datetime in production
-                })
-            except Exception as e:
-                logger.error(f"Database save error: {str(e)}")
+                # Partial analysis runs here, outside the pipeline slot
+                heading, texts = "", []
+                while True:
+                    event = await queue.get()
+                    if event is None:
+                        break
+                    yield ndjson(event)
+                    if event["type"] == "info":
+                        heading = f"{event['title']}. {event['description']}."
+                        continue
+                    
+                    texts.append(event["text"])
+                    if len(texts) % STREAM_ANALYSIS_EVERY == 0:
+                        partial = f"{heading} {' '.join(texts)}"
+                        analysis = await run_blocking(analyze_content, partial, persona)
+                        yield ndjson({"type": "analysis", "hooks": analysis["hooks"], "keywords": analysis["keywords"]})
+            finally:
+                if not transcription_task.done():
+                    # Abandoned stream: stop decoding, or stop a download in
+                    # progress (the downloader kills yt-dlp and ffmpeg)
+                    stop.set()
+                    if downloading:
+                        transcription_task.cancel()
+            
+            transcript = await transcription_task
+            if transcript is not None and is_real_transcript(transcript):
+                await transcript_cache.set(transcript_cache_key(normalized_url, tier["tier"], max_seconds), transcript)
+                await save_transcript(normalized_url, transcript)
+        except Exception as e:
+            logger.error(f"Video streaming error: {str(e)}")
+            transcript = None
+            failed = True
+    record_outcome(platform, persona, transcript, failed)
+    
+    if transcript is not None:
+        content_for_analysis = transcript_content(transcript)
+    else:
+        logger.warning("Video download failed, using enhanced mock content")
+        content_for_analysis = mock_content(platform, persona)
+    
+    segments = transcript.get("segments") if transcript else None
+    with timed("analysis"):
+        analysis = await run_blocking(analyze_content, content_for_analysis, persona, segments)
+    response = video_response(video_id, analysis, platform, persona, transcript)
+    await store_result(response, video_url, normalized_url, transcript, f"{cache_key}|{persona}")
+    yield ndjson({"type": "result", **response})
+
+async def run_job(job: Dict[str, Any], report_stage: StageReporter) -> Dict[str, Any]:
+    """Job queue runner: process the job's video through the shared pipeline, traced under the job id"""
+    async with traced("job", job["id"], SLOW_REQUEST_SECONDS, {"video_url": job["video_url"]}):
+        return await run_video_pipeline(job["video_url"], job["persona"], report_stage, **job.get("options", {}))
+
+if db is not None:
+    job_store = MongoJobStore(db.jobs)
+else:
+    job_store = SQLiteJobStore(os.environ.get("JOBS_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "ayovirals_jobs.db")))
+# Webhooks go to public addresses only, or only to WEBHOOK_ALLOWED_HOSTS (comma-separated) when set
+WEBHOOK_ALLOWED_HOSTS = frozenset(
+    host.strip().lower() for host in os.environ.get("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+)
+job_queue = JobQueue(job_store, run_job, workers=int(os.environ.get("JOB_WORKERS", "2")), webhook_hosts=WEBHOOK_ALLOWED_HOSTS)
+
+registry.gauge("ayovirals_pipeline_waiting", "Videos waiting for a pipeline slot", function=lambda: pipeline_waiting)
+registry.gauge("ayovirals_batch_waiting", "Batch videos waiting for a pipeline slot", function=lambda: batch_waiting)
+registry.gauge("ayovirals_job_queue_depth", "Jobs queued and not yet started", function=job_queue.depth)
+registry.gauge("ayovirals_jobs_active", "Jobs currently running", function=job_queue.active)
+registry.gauge(
+    "ayovirals_background_writes_pending", "Database writes not yet acknowledged",
+    function=lambda: background_writes.stats()["pending"],
+)
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post("/api/process-video")
+async def process_video(request: VideoRequest):
+    """Enhanced video processing with AI-powered analysis"""
+    try:
+        # Validate URL
+        if not request.video_url.strip():
+            raise HTTPException(status_code=400, detail="Video URL is required")
         
-        return response
+        return await run_video_pipeline(
+            request.video_url, request.persona, quality=request.quality, max_seconds=request.max_seconds
+        )
         
     except Exception as e:
         logger.error(f"Process video error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to process video: {str(e)}")
 
+@app.post("/api/process-video/stream")
+async def process_video_stream(request: VideoRequest):
+    """Stream transcript segments and analysis as newline-delimited JSON while the video is processed"""
+    if not request.video_url.strip():
+        raise HTTPException(status_code=400, detail="Video URL is required")
+    
+    return StreamingResponse(
+        stream_video_pipeline(request.video_url, request.persona, request.quality, request.max_seconds),
+        media_type="application/x-ndjson",
+    )
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """Queue a video for background processing and return the job id immediately"""
+    if not request.video_url.strip():
+        raise HTTPException(status_code=400, detail="Video URL is required")
+    if request.webhook_url:
+        try:
+            await asyncio.to_thread(validate_webhook_url, request.webhook_url, WEBHOOK_ALLOWED_HOSTS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    job = await job_queue.submit(
+        request.video_url,
+        request.persona,
+        request.webhook_url,
+        {"quality": request.quality, "max_seconds": request.max_seconds},
+    )
+    return {"job_id": job["id"], "stage": job["stage"], "queue_depth": job_queue.depth()}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get job stage, per-stage timings and, once done, the result"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job.pop("_id", None)
+    return job
+
+@app.post("/api/process-videos/batch")
+async def process_videos_batch(request: VideoBatchRequest):
+    """Process a list of videos and/or a playlist, streaming progress as newline-delimited JSON"""
+    urls = [url.strip() for url in request.video_urls if url.strip()]
+    if request.playlist_url:
+        try:
+            urls += await expand_playlist(YTDLP_BIN, request.playlist_url, MAX_BATCH_VIDEOS)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not list playlist: {e}")
+    
+    if not urls:
+        raise HTTPException(status_code=400, detail="At least one video URL or a playlist URL is required")
+    if len(urls) > MAX_BATCH_VIDEOS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_VIDEOS} videos per batch")
+    
+    async def process(video_url: str, save_document: DocumentSaver) -> Dict[str, Any]:
+        # Each video runs in its own task, so this only marks this video
+        batch_video.set(True)
+        return await run_video_pipeline(
+            video_url, request.persona,
+            quality=request.quality, max_seconds=request.max_seconds, save_document=save_document,
+        )
+    
+    writer = BatchWriter(videos_collection if db is not None else None, BATCH_INSERT_SIZE)
+    events = run_batch(urls, process, detect_platform, writer, BATCH_WORKERS, BATCH_PLATFORM_LIMITS)
+    
+    async def stream() -> AsyncIterator[bytes]:
+        async for event in events:
+            yield ndjson(event)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/api/keywords/batch")
+async def extract_keywords_batch(request: KeywordBatchRequest):
+    """Extract keywords for a batch of texts in one spaCy pass"""
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TEXTS} texts per batch")
+    
+    keywords = await run_blocking(batch_keyword_extraction, request.texts)
+    return {"keywords": keywords, "count": len(keywords)}
+
 @app.get("/api/personas")
 async def get_personas():
     """Get enhanced personas with viral patterns"""
@@ -573,6 +1370,82 @@ async def get_personas():
         ]
     }
 
+def serialize_video(video: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-safe copy of a stored video document"""
+    video.pop("_id", None)
+    if isinstance(video.get("created_at"), datetime):
+        video["created_at"] = video["created_at"].isoformat()
+    return video
+
+@app.get("/api/videos")
+async def list_videos(
+    platform: Optional[str] = None,
+    persona: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    keyword: Optional[str] = None,
+    fields: str = HISTORY_DEFAULT_FIELDS,
+    limit: int = Query(HISTORY_DEFAULT_LIMIT, ge=1),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+):
+    """Analysed videos, newest first, filtered and paginated with a keyset cursor"""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - HISTORY_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    limit = min(limit, HISTORY_MAX_LIMIT)
+    
+    try:
+        query = video_history_filter(platform, persona, since, until, keyword, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # created_at and id are always returned: they make up the next cursor
+    projection = {field: 1 for field in requested | {"id", "created_at"}}
+    projection["_id"] = 0
+    # One extra document tells whether there is a next page
+    videos_cursor = videos_collection.find(query, projection).sort(HISTORY_ORDER).limit(limit + 1)
+    
+    def next_cursor(last: Optional[Dict[str, Any]]) -> Optional[str]:
+        return encode_cursor(last["created_at"], last["id"]) if last is not None else None
+    
+    if stream:
+        async def stream_page() -> AsyncIterator[bytes]:
+            count, last = 0, None
+            try:
+                async for video in videos_cursor:
+                    if count == limit:
+                        yield ndjson({"type": "end", "count": count, "next_cursor": next_cursor(last)})
+                        return
+                    count, last = count + 1, dict(video)
+                    yield ndjson({"type": "video", **serialize_video(video)})
+            except Exception as e:
+                logger.error(f"List videos error: {str(e)}")
+                yield ndjson({"type": "error", "detail": "Failed to list videos"})
+                return
+            yield ndjson({"type": "end", "count": count, "next_cursor": None})
+        
+        return StreamingResponse(stream_page(), media_type="application/x-ndjson")
+    
+    try:
+        videos = await videos_cursor.to_list(length=limit + 1)
+    except Exception as e:
+        logger.error(f"List videos error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to list videos")
+    
+    has_more = len(videos) > limit
+    videos = videos[:limit]
+    cursor_after = next_cursor(videos[-1]) if has_more else None
+    return {
+        "videos": [serialize_video(video) for video in videos],
+        "count": len(videos),
+        "next_cursor": cursor_after,
+    }
+
 @app.get("/api/videos/{video_id}")
 async def get_video(video_id: str):
     """Get video analysis by ID"""
@@ -580,7 +1453,7 @@ async def get_video(video_id: str):
         raise HTTPException(status_code=503, detail="Database not available")
     
     try:
-        video = videos_collection.find_one({"id": video_id})
+        video = await videos_collection.find_one({"id": video_id})
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         
@@ -592,6 +1465,120 @@ async def get_video(video_id: str):
         logger.error(f"Get video error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve video")
 
+def stored_normalized_url(video: Dict[str, Any]) -> str:
+    """Normalized URL of a stored video (older documents may predate the field)"""
+    return video.get("normalized_url") or normalize_video_url(video["url"], detect_platform(video["url"]))
+
+def analysis_update(analysis: Dict[str, Any], persona: str) -> Dict[str, Any]:
+    return {
+        "persona": persona,
+        "summary": analysis["summary"],
+        "hooks": analysis["hooks"],
+        "hook_scores": analysis["hook_scores"],
+        "keywords": analysis["keywords"],
+        "viral_score": analysis["viral_score"],
+        "reanalyzed_at": datetime.now(timezone.utc),
+    }
+
+async def reanalyze_batch(videos: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Recompute analysis for stored videos from their stored transcripts and update them with one bulk_write"""
+    normalized_urls = [stored_normalized_url(video) for video in videos]
+    transcripts = await asyncio.gather(*(transcript_store.get(url) for url in normalized_urls), return_exceptions=True)
+    
+    ready = [
+        (video, transcript)
+        for video, transcript in zip(videos, transcripts)
+        if isinstance(transcript, dict)
+    ]
+    if not ready:
+        return {"updated": 0, "skipped": len(videos)}
+    
+    items = [
+        (transcript_content(transcript), video["persona"], transcript.get("segments"))
+        for video, transcript in ready
+    ]
+    analyses = await run_blocking(analyze_contents, items)
+    
+    operations = [
+        UpdateOne({"id": video["id"]}, {"$set": analysis_update(analysis, video["persona"])})
+        for (video, _), analysis in zip(ready, analyses)
+    ]
+    result = await videos_collection.bulk_write(operations, ordered=False)
+    
+    # Cached results for these links would still serve the old analysis
+    await result_cache.invalidate({f"{stored_normalized_url(video)}|" for video, _ in ready})
+    return {"updated": result.modified_count, "skipped": len(videos) - len(ready)}
+
+@app.post("/api/videos/reanalyze")
+async def reanalyze_videos(request: ReanalyzeBatchRequest):
+    """Re-run analysis over stored transcripts for many videos, streaming progress as newline-delimited JSON"""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    
+    query = video_history_filter(request.platform, request.persona, request.since, request.until)
+    if request.video_ids:
+        query = {"$and": [query, {"id": {"$in": request.video_ids}}]} if query else {"id": {"$in": request.video_ids}}
+    
+    async def stream() -> AsyncIterator[bytes]:
+        started = time.perf_counter()
+        totals = {"processed": 0, "updated": 0, "skipped": 0, "failed": 0}
+        cursor = videos_collection.find(query, {"_id": 0, "id": 1, "url": 1, "normalized_url": 1, "persona": 1})
+        if request.limit:
+            cursor = cursor.limit(request.limit)
+        
+        batch: List[Dict[str, Any]] = []
+        
+        async def flush() -> Dict[str, Any]:
+            try:
+                counts = await reanalyze_batch(batch)
+                totals["updated"] += counts["updated"]
+                totals["skipped"] += counts["skipped"]
+            except Exception as e:
+                logger.error(f"Re-analysis batch failed: {str(e)}")
+                totals["failed"] += len(batch)
+            totals["processed"] += len(batch)
+            batch.clear()
+            elapsed = time.perf_counter() - started
+            return {"type": "batch", **totals, "videos_per_minute": round(60.0 * totals["processed"] / max(elapsed, 1e-9), 2)}
+        
+        try:
+            async for video in cursor:
+                batch.append(video)
+                if len(batch) >= REANALYZE_BATCH_SIZE:
+                    yield ndjson(await flush())
+            if batch:
+                yield ndjson(await flush())
+        except Exception as e:
+            logger.error(f"Re-analysis error: {str(e)}")
+            yield ndjson({"type": "error", "detail": "Re-analysis stopped early"})
+        
+        yield ndjson({"type": "summary", **totals, "elapsed_seconds": round(time.perf_counter() - started, 3)})
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/api/videos/{video_id}/reanalyze")
+async def reanalyze_video(video_id: str, request: Optional[ReanalyzeRequest] = None):
+    """Recompute hooks, keywords and summary for a stored video from its stored transcript"""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    
+    video = await videos_collection.find_one({"id": video_id}, {"_id": 0})
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    normalized_url = stored_normalized_url(video)
+    transcript = await transcript_store.get(normalized_url)
+    if transcript is None:
+        raise HTTPException(status_code=409, detail="No stored transcript for this video; submit it again to transcribe it")
+    
+    persona = (request.persona if request else None) or video["persona"]
+    analysis = await run_blocking(analyze_content, transcript_content(transcript), persona, transcript.get("segments"))
+    update = analysis_update(analysis, persona)
+    await videos_collection.update_one({"id": video_id}, {"$set": update})
+    await result_cache.invalidate([f"{normalized_url}|"])
+    
+    return serialize_video({**video, **update})
+
 @app.get("/api/viral-patterns")
 async def get_viral_patterns():
     """Get viral patterns for analysis"""
@@ -600,6 +1587,68 @@ async def get_viral_patterns():
         "personas": {key: value["viral_triggers"] for key, value in PERSONAS.items()}
     }
 
+def require_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin API is disabled; set ADMIN_TOKEN to enable it")
+    if not admin_authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/api/admin/profile")
+async def profiling_status(x_admin_token: Optional[str] = Header(None)):
+    """The running profiling window (if any) and recently captured profiles"""
+    require_admin(x_admin_token)
+    window = profiler.window
+    return {
+        "window": window.summary() if window is not None else None,
+        "profiles": profiler.sessions(),
+    }
+
+@app.post("/api/admin/profile", status_code=201)
+async def start_profiling(request: ProfileWindowRequest, x_admin_token: Optional[str] = Header(None)):
+    """Profile every scoped block (process_video, analysis, transcription) for a time window"""
+    require_admin(x_admin_token)
+    if request.seconds > MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Profiling windows are limited to {MAX_PROFILE_SECONDS:g} seconds")
+    try:
+        session = profiler.start_window(request.mode, request.seconds, request.scopes, request.interval_ms / 1000.0)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return session.summary()
+
+@app.delete("/api/admin/profile")
+async def stop_profiling(x_admin_token: Optional[str] = Header(None)):
+    """Stop the profiling window early"""
+    require_admin(x_admin_token)
+    session = profiler.stop_window()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling window is running")
+    return session.summary()
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: Optional[Literal["pstats", "text", "speedscope"]] = None,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """A captured profile: pstats (binary) or text for cprofile, speedscope for sampling"""
+    require_admin(x_admin_token)
+    session = profiler.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    format = format or ("speedscope" if session.mode == "sampling" else "pstats")
+    if (format == "speedscope") != (session.mode == "sampling"):
+        raise HTTPException(status_code=400, detail=f"A {session.mode} profile cannot be exported as {format}")
+    if format == "text":
+        return PlainTextResponse(session.pstats_text())
+    if format == "pstats":
+        content, media_type, filename = session.pstats_bytes(), "application/octet-stream", f"{profile_id}.pstats"
+    else:
+        content, media_type, filename = json.dumps(session.speedscope()), "application/json", f"{profile_id}.speedscope.json"
+    return Response(content, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Extractive summarization of transcripts.
+
+Text is cut into sentence units (punctuation-aware, so decimals, URLs and
+common abbreviations do not split, with Whisper segment boundaries used when
+the transcript has no punctuation), each unit is weighted by TF-IDF, and
+units are scored by cosine similarity to the document centroid. All of it is
+sparse (one entry per distinct term per sentence) and built with NumPy
+bincount, so cost grows linearly with transcript length. The highest scoring
+non-redundant sentences that fit the length budget are returned in their
+original order.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from spacy.lang.en.stop_words import STOP_WORDS
+
+TERM_PATTERN = re.compile(r"[a-z0-9][a-z0-9']*")
+# Sentence-final punctuation (plus closing quotes/brackets) followed by whitespace;
+# "3.5" and "example.com" never match because nothing separates the dot
+BOUNDARY_PATTERN = re.compile(r"[.!?]+[\"')\]]*\s+")
+TERMINAL_PATTERN = re.compile(r"[.!?][\"')\]]*$")
+
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "approx", "no", "inc", "ltd"}
+
+# Units without punctuation are closed after this many words
+MAX_UNIT_WORDS = 40
+MIN_UNIT_TERMS = 3
+REDUNDANCY_THRESHOLD = 0.7
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text at sentence-final punctuation, ignoring abbreviations"""
+    sentences = []
+    start = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        preceding = text[start:match.start()].rsplit(None, 1)
+        last_word = preceding[-1].lower() if preceding else ""
+        if match.group(0).startswith(".") and last_word in ABBREVIATIONS:
+            continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def sentence_units(text: str, segments: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    """Sentence units from segment texts (or the plain text), merging or cutting unpunctuated runs"""
+    pieces = []
+    for chunk in ([segment["text"] for segment in segments] if segments else [text]):
+        pieces.extend(split_sentences(chunk))
+
+    units, current, current_words = [], [], 0
+    for piece in pieces:
+        words = piece.split()
+        # A piece without any punctuation (raw Whisper output) is cut into word windows
+        while len(words) > MAX_UNIT_WORDS:
+            units.append(" ".join(words[:MAX_UNIT_WORDS]))
+            words = words[MAX_UNIT_WORDS:]
+        current.extend(words)
+        current_words += len(words)
+        if TERMINAL_PATTERN.search(piece) or current_words >= MAX_UNIT_WORDS:
+            units.append(" ".join(current))
+            current, current_words = [], 0
+    if current:
+        units.append(" ".join(current))
+    return [unit for unit in units if unit]
+
+
+def _tfidf(units: List[str]):
+    """Sparse L2-normalized TF-IDF rows as (row, term, weight) arrays sorted by row"""
+    vocabulary: Dict[str, int] = {}
+    rows, terms = [], []
+    for index, unit in enumerate(units):
+        for term in TERM_PATTERN.findall(unit.lower()):
+            if term in STOP_WORDS:
+                continue
+            rows.append(index)
+            terms.append(vocabulary.setdefault(term, len(vocabulary)))
+
+    unit_count, vocabulary_size = len(units), max(1, len(vocabulary))
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0), unit_count, vocabulary_size
+
+    # Collapse duplicate (row, term) pairs into counts: the COO entries of the matrix
+    keys, counts = np.unique(np.asarray(rows, dtype=np.int64) * vocabulary_size + np.asarray(terms, dtype=np.int64), return_counts=True)
+    entry_rows, entry_terms = keys // vocabulary_size, keys % vocabulary_size
+
+    document_frequency = np.bincount(entry_terms, minlength=vocabulary_size)
+    idf = np.log((1.0 + unit_count) / (1.0 + document_frequency)) + 1.0
+    weights = (1.0 + np.log(counts)) * idf[entry_terms]
+
+    norms = np.sqrt(np.bincount(entry_rows, weights=weights * weights, minlength=unit_count))
+    weights = weights / np.maximum(norms[entry_rows], 1e-12)
+    return entry_rows, entry_terms, weights, unit_count, vocabulary_size
+
+
+def summarize(
+    text: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    max_sentences: int = 3,
+    max_chars: int = 400,
+) -> str:
+    """The most central sentences of the text within the length budget, in original order"""
+    units = sentence_units(text, segments)
+    if len(units) <= max_sentences and sum(len(unit) + 1 for unit in units) <= max_chars:
+        return " ".join(units)
+
+    rows, terms, weights, unit_count, vocabulary_size = _tfidf(units)
+    if len(rows) == 0:
+        return text[:max_chars]
+
+    # Cosine similarity of every sentence to the document centroid
+    centroid = np.bincount(terms, weights=weights, minlength=vocabulary_size) / unit_count
+    scores = np.bincount(rows, weights=weights * centroid[terms], minlength=unit_count)
+    term_counts = np.bincount(rows, minlength=unit_count)
+    scores[term_counts < MIN_UNIT_TERMS] *= 0.5
+
+    # Row slices of the (row-sorted) sparse matrix for the redundancy check
+    indptr = np.searchsorted(rows, np.arange(unit_count + 1))
+
+    def similarity(a: int, b: int) -> float:
+        terms_a, terms_b = terms[indptr[a]:indptr[a + 1]], terms[indptr[b]:indptr[b + 1]]
+        _, index_a, index_b = np.intersect1d(terms_a, terms_b, assume_unique=True, return_indices=True)
+        return float(np.dot(weights[indptr[a] + index_a], weights[indptr[b] + index_b]))
+
+    chosen: List[int] = []
+    used_chars = 0
+    for index in np.argsort(-scores, kind="stable"):
+        if len(chosen) >= max_sentences:
+            break
+        length = len(units[index]) + 1
+        if chosen and used_chars + length > max_chars:
+            continue
+        if any(similarity(index, other) > REDUNDANCY_THRESHOLD for other in chosen):
+            continue
+        chosen.append(int(index))
+        used_chars += length
+
+    parts = []
+    for index in sorted(chosen):
+        unit = units[index]
+        parts.append(unit if TERMINAL_PATTERN.search(unit) else unit + ".")
+    summary = " ".join(parts)
+    if len(summary) > max_chars:
+        # Leave room for the ellipsis so the budget holds
+        summary = summary[:max_chars - 3].rsplit(" ", 1)[0] + "..."
+    return summary
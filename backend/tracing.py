@@ -0,0 +1,253 @@
+"""
+Per-request tracing.
+
+Every HTTP request (and every queued job) gets a request id, taken from an
+incoming `X-Request-ID` header or generated, and echoed back in the response.
+Log records carry it, so all lines of one request can be correlated, and
+with `LOG_FORMAT=json` they are emitted as one JSON object per line.
+
+Code records spans with `span(name)` (stage timings from `metrics.timed`
+open one automatically) or `record_span` for intervals it measured itself.
+Spans nest through a context variable, so work on executor threads and
+gathered tasks attaches to the right parent. Requests slower than the
+configured threshold are written to the slow log with their full span
+breakdown.
+"""
+
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+import contextlib
+import contextvars
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("ayovirals.slow_requests")
+
+REQUEST_ID_HEADER = "x-request-id"
+MAX_SPANS_PER_TRACE = 1000
+
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+
+class Trace:
+    """Spans recorded for one request or job"""
+
+    def __init__(self, request_id: str, name: str):
+        self.request_id = request_id
+        self.name = name
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def new_span_id(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    def add(self, span: Dict[str, Any]) -> None:
+        # Spans may finish on executor threads
+        with self._lock:
+            if len(self.spans) < MAX_SPANS_PER_TRACE:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def finish(self) -> float:
+        self.duration = time.perf_counter() - self.started
+        return self.duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: (span["start_ms"], span["id"]))
+        return {
+            "request_id": self.request_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((self.duration or 0.0) * 1000, 2),
+            "spans": spans,
+            "dropped_spans": self.dropped,
+        }
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+def record_span(name: str, started: float, ended: float, **attributes: Any) -> None:
+    """Add an interval measured with time.perf_counter() as a child of the current span"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.add({
+        "id": trace.new_span_id(),
+        "parent": _current_span.get(),
+        "name": name,
+        "start_ms": round((started - trace.started) * 1000, 2),
+        "duration_ms": round((ended - started) * 1000, 2),
+        **attributes,
+    })
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Record the block as a span; spans opened inside it become its children"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    span_id = trace.new_span_id()
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.add({
+            "id": span_id,
+            "parent": parent,
+            "name": name,
+            "start_ms": round((started - trace.started) * 1000, 2),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "status": status,
+            **attributes,
+        })
+
+
+def valid_request_id(value: Optional[str]) -> Optional[str]:
+    """A client-supplied request id, if it is short and safe to log"""
+    if value and _REQUEST_ID_PATTERN.match(value):
+        return value
+    return None
+
+
+@contextlib.asynccontextmanager
+async def traced(
+    name: str,
+    request_id: Optional[str] = None,
+    slow_seconds: Optional[float] = None,
+    fields: Optional[Dict[str, Any]] = None,
+):
+    """Run the block under a new trace, then log its completion (and the slow log entry if needed)
+
+    `fields` are added to both log lines; the block may still update them.
+    """
+    fields = fields if fields is not None else {}
+    trace = Trace(request_id or uuid.uuid4().hex, name)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        duration = trace.finish()
+        logger.info(
+            f"{name} finished in {duration * 1000:.0f}ms",
+            extra={"duration_ms": round(duration * 1000, 2), "spans": len(trace.spans), **fields},
+        )
+        if slow_seconds is not None and duration >= slow_seconds:
+            slow_logger.warning(
+                f"Slow request {trace.request_id}: {name} took {duration:.1f}s",
+                extra={"trace": trace.to_dict(), **fields},
+            )
+        _current_trace.reset(trace_token)
+
+
+class TracingMiddleware:
+    """ASGI middleware: one trace per HTTP request, kept open until a streamed body finishes"""
+
+    def __init__(self, app, slow_seconds: Optional[float] = None, untraced_paths: Sequence[str] = ()):
+        self.app = app
+        self.slow_seconds = slow_seconds
+        self.untraced_paths = set(untraced_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.untraced_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = valid_request_id(headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1"))
+        fields = {"method": scope["method"], "path": scope["path"], "status": 500}
+
+        async with traced(f"{scope['method']} {scope['path']}", request_id, self.slow_seconds, fields) as trace:
+            async def send_with_request_id(message):
+                if message["type"] == "http.response.start":
+                    fields["status"] = message["status"]
+                    message = {
+                        **message,
+                        "headers": [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), trace.request_id.encode())],
+                    }
+                await send(message)
+
+            await self.app(scope, receive, send_with_request_id)
+
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the request id of the context it was logged from"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id() or "-"
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including the request id and any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(log_format: str = "json", level: int = logging.INFO, slow_log_path: Optional[str] = None) -> None:
+    """Root logging setup; the slow log also goes to its own JSON lines file when a path is given"""
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:[%(request_id)s] %(message)s"))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+    if slow_log_path:
+        slow_handler = logging.FileHandler(slow_log_path, encoding="utf-8")
+        slow_handler.addFilter(RequestIdFilter())
+        slow_handler.setFormatter(JsonFormatter())
+        slow_logger.addHandler(slow_handler)
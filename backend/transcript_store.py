@@ -0,0 +1,119 @@
+"""
+Durable transcript storage.
+
+Transcripts (title, description, full text and timestamped Whisper segments)
+are kept per normalized video URL, gzip-compressed JSON, in MongoDB GridFS or
+in local files when no database is configured. Unlike the TTL transcript
+cache they never expire, so re-analysing a video with another persona or an
+improved analyser is a CPU-only pass over stored text.
+"""
+
+import os
+import gzip
+import json
+import asyncio
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVEL = 6
+
+
+def encode_transcript(transcript: Dict[str, Any]) -> bytes:
+    return gzip.compress(json.dumps(transcript, separators=(",", ":")).encode(), COMPRESSION_LEVEL)
+
+
+def decode_transcript(data: bytes) -> Dict[str, Any]:
+    return json.loads(gzip.decompress(data))
+
+
+def transcript_metadata(normalized_url: str, transcript: Dict[str, Any], size: int) -> Dict[str, Any]:
+    tier = transcript.get("tier") or {}
+    return {
+        "normalized_url": normalized_url,
+        "tier": tier.get("tier"),
+        "model": tier.get("model"),
+        "max_seconds": tier.get("max_seconds"),
+        "segments": len(transcript.get("segments") or []),
+        "compressed_bytes": size,
+        "stored_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class GridFSTranscriptStore:
+    """Transcripts as gzip files in a GridFS bucket, one current revision per URL"""
+
+    def __init__(self, db, bucket_name: str = "transcripts"):
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+        self.files = db[f"{bucket_name}.files"]
+
+    async def info(self, normalized_url: str) -> Optional[Dict[str, Any]]:
+        document = await self.files.find_one(
+            {"filename": normalized_url}, {"metadata": 1}, sort=[("uploadDate", -1)]
+        )
+        return document["metadata"] if document else None
+
+    async def get(self, normalized_url: str) -> Optional[Dict[str, Any]]:
+        try:
+            stream = await self.bucket.open_download_stream_by_name(normalized_url)
+        except NoFile:
+            return None
+        return decode_transcript(await stream.read())
+
+    async def put(self, normalized_url: str, transcript: Dict[str, Any]) -> Dict[str, Any]:
+        data = encode_transcript(transcript)
+        metadata = transcript_metadata(normalized_url, transcript, len(data))
+        file_id = await self.bucket.upload_from_stream(normalized_url, data, metadata=metadata)
+
+        # Older revisions are superseded by the new upload
+        async for old in self.bucket.find({"filename": normalized_url, "_id": {"$ne": file_id}}):
+            await self.bucket.delete(old._id)
+        return metadata
+
+
+class FileTranscriptStore:
+    """Transcripts as gzip files in a local directory, used when MongoDB is unavailable"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, normalized_url: str, suffix: str) -> str:
+        name = hashlib.sha256(normalized_url.encode()).hexdigest()
+        return os.path.join(self.directory, name + suffix)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, data: bytes) -> None:
+        # Write-then-rename so readers never see a partial file
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary, path)
+
+    async def info(self, normalized_url: str) -> Optional[Dict[str, Any]]:
+        data = await asyncio.to_thread(self._read, self._path(normalized_url, ".meta.json"))
+        return json.loads(data) if data else None
+
+    async def get(self, normalized_url: str) -> Optional[Dict[str, Any]]:
+        data = await asyncio.to_thread(self._read, self._path(normalized_url, ".json.gz"))
+        return decode_transcript(data) if data else None
+
+    async def put(self, normalized_url: str, transcript: Dict[str, Any]) -> Dict[str, Any]:
+        data = encode_transcript(transcript)
+        metadata = transcript_metadata(normalized_url, transcript, len(data))
+        await asyncio.to_thread(self._write, self._path(normalized_url, ".json.gz"), data)
+        await asyncio.to_thread(self._write, self._path(normalized_url, ".meta.json"), json.dumps(metadata).encode())
+        return metadata
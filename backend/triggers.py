@@ -0,0 +1,108 @@
+"""
+Single-pass trigger phrase matching.
+
+All trigger phrases (hook triggers, VIRAL_PATTERNS, persona viral triggers)
+are compiled into one trie-shaped regular expression at startup. A scan walks
+the text once, matches whole words/phrases only ("new" does not match "news"),
+and reports the matches and hit counts per category. One scan can be shared
+by hook ranking and viral scoring.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+END = ""
+
+
+def _normalize_phrase(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+
+def _trie_to_pattern(node: Dict[str, dict]) -> str:
+    """Regex for a character trie; longer phrases are preferred over their prefixes"""
+    branches = []
+    for char in sorted(key for key in node if key != END):
+        atom = r"\s+" if char == " " else re.escape(char)
+        branches.append(atom + _trie_to_pattern(node[char]))
+
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if END in node:
+        # Greedy optional: try the longer phrase first, fall back to this prefix
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+Match = Tuple[int, int, Tuple[int, ...]]
+
+
+class TriggerScan:
+    """Phrase matches and per-category hit counts from one scan of a text"""
+
+    def __init__(self, text: str, matches: List[Match], counts: Dict[str, int]):
+        self.text = text
+        self.matches = matches
+        self.counts = counts
+
+    def matches_in_suffix(self, suffix: str) -> Optional[List[Match]]:
+        """Matches within `suffix`, relative to its start, or None if the scanned text does not end with it"""
+        if not self.text.endswith(suffix):
+            return None
+        offset = len(self.text) - len(suffix)
+        return [(start - offset, end - offset, ids) for start, end, ids in self.matches if start >= offset]
+
+
+class TriggerMatcher:
+    """Compiled automaton over every trigger phrase of every category"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories: List[str] = list(categories)
+        self.category_index = {category: index for index, category in enumerate(self.categories)}
+
+        phrase_map = defaultdict(set)
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                normalized = _normalize_phrase(phrase)
+                if normalized:
+                    phrase_map[normalized].add(self.category_index[category])
+
+        # The scan reports the longest phrase at each position, so a phrase also
+        # carries the categories of shorter triggers inside it ("hidden secret"
+        # counts as "secret" too)
+        for phrase in phrase_map:
+            for other, ids in phrase_map.items():
+                if other != phrase and other in phrase and re.search(r"(?<!\w)" + re.escape(other) + r"(?!\w)", phrase):
+                    phrase_map[phrase] = phrase_map[phrase] | ids
+        self.phrase_categories: Dict[str, Tuple[int, ...]] = {
+            phrase: tuple(sorted(ids)) for phrase, ids in phrase_map.items()
+        }
+
+        trie: Dict[str, dict] = {}
+        for phrase in self.phrase_categories:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[END] = {}
+
+        body = _trie_to_pattern(trie) or r"(?!x)x"
+        self.pattern = re.compile(r"(?<!\w)" + body + r"(?!\w)", re.IGNORECASE)
+
+    def matches(self, text: str) -> List[Match]:
+        """(start, end, category ids) for every phrase match, in text order"""
+        phrase_categories = self.phrase_categories
+        found = []
+        for match in self.pattern.finditer(text):
+            phrase = _normalize_phrase(match.group(0))
+            found.append((match.start(), match.end(), phrase_categories[phrase]))
+        return found
+
+    def scan(self, text: str) -> TriggerScan:
+        matches = self.matches(text)
+        counts: Dict[str, int] = {}
+        for _, _, category_ids in matches:
+            for category_id in category_ids:
+                category = self.categories[category_id]
+                counts[category] = counts.get(category, 0) + 1
+        return TriggerScan(text, matches, counts)
@@ -0,0 +1,124 @@
+"""
+Viral-pattern scoring over timestamped transcript segments.
+
+One trigger scan over the joined transcript (or a scan of a text ending
+with it, shared with hook ranking) is bucketed into a
+(segments x categories) hit matrix with NumPy. The composite score of a
+segment or time window is its weighted trigger hits per 100 tokens.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from triggers import TriggerMatcher, TriggerScan
+
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)?")
+
+
+class ViralScorer:
+    """Scores transcripts against weighted trigger categories"""
+
+    def __init__(self, matcher: TriggerMatcher, weights: Dict[str, float], persona_weight: float = 1.5):
+        self.matcher = matcher
+        self.persona_weight = persona_weight
+        self.base_weights = np.zeros(len(matcher.categories), dtype=np.float64)
+        for category, weight in weights.items():
+            self.base_weights[matcher.category_index[category]] = weight
+
+    def _weights_for(self, persona: Optional[str]) -> np.ndarray:
+        weights = self.base_weights
+        category = f"persona:{persona}"
+        if persona and category in self.matcher.category_index:
+            weights = weights.copy()
+            weights[self.matcher.category_index[category]] = self.persona_weight
+        return weights
+
+    def score(
+        self,
+        segments: List[Dict[str, Any]],
+        persona: Optional[str] = None,
+        window_seconds: float = 30.0,
+        top_k: int = 3,
+        max_text_chars: int = 280,
+        scan: Optional[TriggerScan] = None,
+    ) -> Dict[str, Any]:
+        """Per-category densities, composite score and the top-scoring time windows
+
+        `scan` is reused when its text ends with the joined segment texts, e.g. a
+        scan of "title. description. transcript"; otherwise the segments are scanned.
+        """
+        segment_count = len(segments)
+        if segment_count == 0:
+            return {"score": 0.0, "tokens": 0, "densities": {}, "counts": {}, "top_windows": []}
+
+        # Join segments once and remember where each one starts in the joined text
+        texts = [segment["text"] for segment in segments]
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=segment_count)
+        char_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        text = " ".join(texts)
+
+        # Tokens per segment
+        token_positions = np.fromiter((match.start() for match in TOKEN_PATTERN.finditer(text)), dtype=np.int64)
+        token_segments = np.searchsorted(char_starts, token_positions, side="right") - 1
+        tokens = np.bincount(token_segments, minlength=segment_count).astype(np.float64)
+
+        # Trigger hits per (segment, category)
+        category_count = len(self.matcher.categories)
+        hits = np.zeros((segment_count, category_count), dtype=np.float64)
+        matches = scan.matches_in_suffix(text) if scan is not None else None
+        if matches is None:
+            matches = self.matcher.matches(text)
+        if matches:
+            match_starts = np.fromiter((start for start, _, ids in matches for _ in ids), dtype=np.int64)
+            match_categories = np.fromiter((category for _, _, ids in matches for category in ids), dtype=np.int64)
+            match_segments = np.searchsorted(char_starts, match_starts, side="right") - 1
+            hits = np.bincount(
+                match_segments * category_count + match_categories,
+                minlength=segment_count * category_count,
+            ).reshape(segment_count, category_count).astype(np.float64)
+
+        weights = self._weights_for(persona)
+        weighted_hits = hits @ weights
+        total_tokens = float(tokens.sum())
+        category_totals = hits.sum(axis=0)
+        scored = np.flatnonzero(weights)
+
+        # Sliding time windows via prefix sums: window i spans segments [i, end_i)
+        starts = np.fromiter((segment.get("start", 0.0) for segment in segments), dtype=np.float64, count=segment_count)
+        ends = np.fromiter((segment.get("end", 0.0) for segment in segments), dtype=np.float64, count=segment_count)
+        window_ends = np.maximum(np.searchsorted(starts, starts + window_seconds, side="left"), np.arange(1, segment_count + 1))
+        hit_prefix = np.concatenate(([0.0], np.cumsum(weighted_hits)))
+        token_prefix = np.concatenate(([0.0], np.cumsum(tokens)))
+        indices = np.arange(segment_count)
+        window_tokens = token_prefix[window_ends] - token_prefix[indices]
+        window_scores = 100.0 * (hit_prefix[window_ends] - hit_prefix[indices]) / np.maximum(window_tokens, 1.0)
+
+        # Greedily keep the best non-overlapping windows
+        top_windows = []
+        taken_until = np.full(segment_count, False)
+        for index in np.argsort(-window_scores, kind="stable"):
+            if len(top_windows) >= top_k or window_scores[index] <= 0:
+                break
+            end_index = window_ends[index]
+            if taken_until[index:end_index].any():
+                continue
+            taken_until[index:end_index] = True
+            top_windows.append({
+                "start": round(float(starts[index]), 2),
+                "end": round(float(ends[end_index - 1]), 2),
+                "score": round(float(window_scores[index]), 2),
+                "text": " ".join(texts[index:end_index])[:max_text_chars],
+            })
+
+        return {
+            "score": round(100.0 * float(weighted_hits.sum()) / max(total_tokens, 1.0), 2),
+            "tokens": int(total_tokens),
+            "densities": {
+                self.matcher.categories[i]: round(100.0 * float(category_totals[i]) / max(total_tokens, 1.0), 3)
+                for i in scored
+            },
+            "counts": {self.matcher.categories[i]: int(category_totals[i]) for i in scored if category_totals[i]},
+            "top_windows": top_windows,
+        }
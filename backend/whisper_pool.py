@@ -0,0 +1,215 @@
+"""
+Process-wide registry of warm faster-whisper models.
+
+Loading a WhisperModel costs hundreds of milliseconds to seconds and ~150MB of
+allocations, so models are built once per (size, compute_type) and handed out
+to concurrent transcriptions from a bounded pool. Load times, wait times and
+models in use are exported per (size, compute_type) on `/api/metrics`.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str]
+
+load_seconds = registry.histogram(
+    "ayovirals_whisper_load_seconds",
+    "Time to load a Whisper model into the pool",
+    ("model", "compute_type"),
+)
+wait_seconds = registry.histogram(
+    "ayovirals_whisper_wait_seconds",
+    "Time spent waiting to borrow a pooled Whisper model, including loading a new instance",
+    ("model", "compute_type"),
+)
+models_in_use = registry.gauge(
+    "ayovirals_whisper_models_in_use",
+    "Pooled Whisper models currently borrowed",
+    ("model", "compute_type"),
+)
+
+
+def _cpu_count() -> int:
+    return os.cpu_count() or 1
+
+
+class WhisperModelPool:
+    """Bounded pool of warm WhisperModel instances for one (size, compute_type)"""
+
+    def __init__(self, size: str, compute_type: str, max_instances: int, cpu_threads: int, device: str = "cpu"):
+        self.size = size
+        self.compute_type = compute_type
+        self.device = device
+        self.cpu_threads = cpu_threads
+        self.max_instances = max(1, max_instances)
+        self.labels = {"model": size, "compute_type": compute_type}
+
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._instances = 0
+        self._in_use = 0
+
+        # Metrics
+        self.load_count = 0
+        self.load_seconds_total = 0.0
+        self.last_load_seconds = 0.0
+        self.acquire_count = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _load_model(self):
+        """Construct a new WhisperModel and record its load time"""
+        from faster_whisper import WhisperModel
+
+        started = time.perf_counter()
+        model = WhisperModel(
+            self.size,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+        )
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.load_count += 1
+            self.load_seconds_total += elapsed
+            self.last_load_seconds = elapsed
+        load_seconds.observe(elapsed, **self.labels)
+
+        logger.info(f"Loaded Whisper model {self.size}/{self.compute_type} in {elapsed:.2f}s")
+        return model
+
+    def warm(self, instances: int = 1) -> None:
+        """Eagerly load up to `instances` models into the idle pool"""
+        while True:
+            with self._lock:
+                if self._instances >= min(instances, self.max_instances):
+                    return
+                self._instances += 1
+            try:
+                self._idle.put(self._load_model())
+            except Exception:
+                with self._lock:
+                    self._instances -= 1
+                raise
+
+    def _take(self, timeout: Optional[float]):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        grow = False
+        with self._lock:
+            if self._instances < self.max_instances:
+                self._instances += 1
+                grow = True
+
+        if grow:
+            try:
+                return self._load_model()
+            except Exception:
+                with self._lock:
+                    self._instances -= 1
+                raise
+
+        return self._idle.get(timeout=timeout)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """Borrow a model from the pool, blocking while all instances are busy"""
+        started = time.perf_counter()
+        model = self._take(timeout)
+        waited = time.perf_counter() - started
+
+        with self._lock:
+            self.acquire_count += 1
+            self.wait_seconds_total += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self._in_use += 1
+        wait_seconds.observe(waited, **self.labels)
+
+        try:
+            with models_in_use.track(**self.labels):
+                yield model
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(model)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "model": self.size,
+                "compute_type": self.compute_type,
+                "instances": self._instances,
+                "max_instances": self.max_instances,
+                "in_use": self._in_use,
+                "loads": self.load_count,
+                "load_seconds_total": round(self.load_seconds_total, 4),
+                "last_load_seconds": round(self.last_load_seconds, 4),
+                "acquires": self.acquire_count,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+            }
+
+
+class WhisperModelRegistry:
+    """Lazily creates one WhisperModelPool per (size, compute_type)"""
+
+    def __init__(self, max_instances: Optional[int] = None, cpu_threads: Optional[int] = None, device: str = "cpu"):
+        self.cpu_threads = cpu_threads or int(os.environ.get("WHISPER_CPU_THREADS", "2"))
+        default_instances = max(1, _cpu_count() // self.cpu_threads)
+        self.max_instances = max_instances or int(os.environ.get("WHISPER_POOL_SIZE", str(default_instances)))
+        self.device = device
+        self._pools: Dict[ModelKey, WhisperModelPool] = {}
+        self._lock = threading.Lock()
+
+    def pool(self, size: str = "base", compute_type: str = "int8") -> WhisperModelPool:
+        key = (size, compute_type)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = WhisperModelPool(size, compute_type, self.max_instances, self.cpu_threads, self.device)
+                self._pools[key] = pool
+            return pool
+
+    def acquire(self, size: str = "base", compute_type: str = "int8", timeout: Optional[float] = None):
+        return self.pool(size, compute_type).acquire(timeout=timeout)
+
+    def preload(self, specs: List[ModelKey], instances: int = 1) -> None:
+        """Warm the given (size, compute_type) pairs; failures are logged, not raised"""
+        for size, compute_type in specs:
+            try:
+                self.pool(size, compute_type).warm(instances)
+            except Exception as e:
+                logger.error(f"Failed to preload Whisper model {size}/{compute_type}: {e}")
+
+    def stats(self) -> List[Dict[str, object]]:
+        with self._lock:
+            pools = list(self._pools.values())
+        return [pool.stats() for pool in pools]
+
+
+def parse_model_specs(value: str) -> List[ModelKey]:
+    """Parse "base:int8,small:int8" into [("base", "int8"), ("small", "int8")]"""
+    specs = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        size, _, compute_type = item.partition(":")
+        specs.append((size.strip(), compute_type.strip() or "int8"))
+    return specs
+
+
+whisper_models = WhisperModelRegistry()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import threading
+import contextlib
+
+import pytest
+
+# The backend modules import each other as top-level modules (as when run from backend/)
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """The API module running offline: no MongoDB, generated fixture audio, no Whisper preload"""
+    root = tmp_path_factory.mktemp("server")
+    os.environ.update({
+        "MONGO_URL": "none",
+        "DOWNLOADER": "fixture",
+        "FIXTURE_DIR": str(root / "fixtures"),
+        "TRANSCRIPT_DIR": str(root / "transcripts"),
+        "JOBS_SQLITE_PATH": str(root / "jobs.db"),
+        "WHISPER_PRELOAD": "",
+        "LOG_FORMAT": "text",
+    })
+    import server as module
+    return module
+
+
+class FakeSegment:
+    def __init__(self, index: int):
+        self.start = float(index)
+        self.end = float(index + 1)
+        self.text = f"Segment {index} talks about money and a secret."
+
+
+class FakeWhisper:
+    """Stands in for the Whisper pool: decodes `segments` segments, `delay` seconds each"""
+
+    def __init__(self, segments: int = 5, delay: float = 0.0):
+        self.segments = segments
+        self.delay = delay
+        self.decoded = 0
+        self.in_use = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def transcribe(self, audio, beam_size=5):
+        def decode():
+            for index in range(self.segments):
+                self.release.wait(5)
+                time.sleep(self.delay)
+                self.decoded += 1
+                yield FakeSegment(index)
+        return decode(), None
+
+    @contextlib.contextmanager
+    def acquire(self, size="base", compute_type="int8", timeout=None):
+        self.in_use += 1
+        try:
+            yield self
+        finally:
+            self.in_use -= 1
+
+
+@pytest.fixture
+def fake_whisper(server, monkeypatch):
+    whisper = FakeWhisper()
+    monkeypatch.setattr(server.whisper_models, "acquire", whisper.acquire)
+    return whisper
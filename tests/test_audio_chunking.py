@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from audio_chunking import split_on_silence
+
+SAMPLE_RATE = 16000
+
+
+def speech_with_pauses(seed: int, sentences: int = 20) -> np.ndarray:
+    """Noise bursts of 5-25s separated by 0.6s near-silent gaps"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for _ in range(sentences):
+        parts.append(rng.normal(0.0, 0.3, int(SAMPLE_RATE * rng.uniform(5, 25))))
+        parts.append(rng.normal(0.0, 0.0005, int(SAMPLE_RATE * 0.6)))
+    return np.concatenate(parts).astype(np.float32)
+
+
+def assert_covers(chunks, total):
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == total
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+    assert all(start < end for start, end in chunks)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_chunks_cover_audio_without_gaps_and_respect_max_length(seed):
+    audio = speech_with_pauses(seed)
+    chunks = split_on_silence(audio, SAMPLE_RATE, target_seconds=30, max_seconds=45)
+    assert len(chunks) > 1
+    assert_covers(chunks, len(audio))
+    assert all(end - start <= 45 * SAMPLE_RATE for start, end in chunks)
+
+
+def test_cuts_land_in_silences():
+    audio = speech_with_pauses(7)
+    chunks = split_on_silence(audio, SAMPLE_RATE, target_seconds=30, max_seconds=45)
+    for _, end in chunks[:-1]:
+        assert np.abs(audio[end - 160:end + 160]).max() < 0.01
+
+
+def test_audio_without_silence_is_cut_at_max_length():
+    audio = np.random.default_rng(0).normal(0.0, 0.3, SAMPLE_RATE * 100).astype(np.float32)
+    chunks = split_on_silence(audio, SAMPLE_RATE, target_seconds=30, max_seconds=40)
+    assert_covers(chunks, len(audio))
+    assert [end - start for start, end in chunks] == [40 * SAMPLE_RATE, 40 * SAMPLE_RATE, 20 * SAMPLE_RATE]
+
+
+def test_short_audio_is_one_chunk():
+    audio = np.zeros(SAMPLE_RATE * 10, dtype=np.float32)
+    assert split_on_silence(audio, SAMPLE_RATE) == [(0, len(audio))]
@@ -0,0 +1,157 @@
+import asyncio
+import types
+
+import anyio
+import pytest
+
+from batch import BatchWriter, run_batch
+
+
+class FakeCollection:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+
+    async def insert_many(self, documents, ordered=True):
+        if self.fail:
+            raise RuntimeError("database down")
+        self.batches.append([document["id"] for document in documents])
+        return types.SimpleNamespace(inserted_ids=[document["id"] for document in documents])
+
+
+def platform_of(url: str) -> str:
+    return url.split("://", 1)[1].split("/", 1)[0]
+
+
+def make_processor(delays, saved=None, active=None):
+    """A fake pipeline: sleeps per URL, then buffers a document whose callback records the id"""
+    async def process(url, save_document):
+        if active is not None:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        try:
+            await asyncio.sleep(delays.get(url, 0.0))
+            if url.endswith("/bad"):
+                raise RuntimeError("download failed")
+            video_id = f"id-{url.rsplit('/', 1)[1]}"
+
+            async def on_saved():
+                if saved is not None:
+                    saved.append(video_id)
+            await save_document({"id": video_id, "url": url}, on_saved)
+            return {"id": video_id, "transcription_tier": {"tier": "fast"}}
+        finally:
+            if active is not None:
+                active["now"] -= 1
+    return process
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_batch_writer_flushes_full_batches_then_runs_callbacks():
+    async def main():
+        collection = FakeCollection()
+        writer = BatchWriter(collection, batch_size=2)
+        saved = []
+
+        def callback(name):
+            async def on_saved():
+                saved.append(name)
+            return on_saved
+
+        await writer.add({"id": "a"}, callback("a"))
+        assert saved == [] and collection.batches == []
+        await writer.add({"id": "b"}, callback("b"))
+        await writer.add({"id": "c"})
+        await writer.flush()
+        return collection.batches, saved, writer.inserted
+
+    batches, saved, inserted = asyncio.run(main())
+    assert batches == [["a", "b"], ["c"]]
+    assert saved == ["a", "b"]
+    assert inserted == 3
+
+
+def test_batch_writer_skips_callbacks_of_failed_inserts():
+    async def main():
+        writer = BatchWriter(FakeCollection(fail=True), batch_size=10)
+        saved = []
+
+        async def on_saved():
+            saved.append(1)
+        await writer.add({"id": "a"}, on_saved)
+        await writer.flush()
+        return saved, writer.failed
+
+    assert asyncio.run(main()) == ([], 1)
+
+
+def test_run_batch_reports_progress_and_a_summary():
+    urls = ["https://a/1", "https://a/bad", "https://b/2", "https://b/3"]
+    saved = []
+
+    async def main():
+        collection = FakeCollection()
+        writer = BatchWriter(collection, batch_size=10)
+        events = await collect(run_batch(urls, make_processor({}, saved), platform_of, writer, 2, {}))
+        return events, collection
+
+    events, collection = asyncio.run(main())
+    assert events[0] == {"type": "start", "total": 4}
+    videos = [event for event in events if event["type"] == "video"]
+    assert sorted(event["index"] for event in videos) == [0, 1, 2, 3]
+    assert [event["completed"] + event["failed"] for event in videos] == [1, 2, 3, 4]
+    failed = [event for event in videos if event["status"] == "failed"]
+    assert [(event["url"], event["error"]) for event in failed] == [("https://a/bad", "download failed")]
+
+    summary = events[-1]
+    assert summary["type"] == "summary"
+    assert (summary["completed"], summary["failed"], summary["inserted"]) == (3, 1, 3)
+    assert sorted(collection.batches[0]) == ["id-1", "id-2", "id-3"]
+    assert sorted(saved) == ["id-1", "id-2", "id-3"]
+
+
+def test_run_batch_respects_worker_and_platform_limits():
+    urls = [f"https://slow/{index}" for index in range(6)] + [f"https://fast/{index}" for index in range(6, 9)]
+    delays = {url: 0.02 for url in urls}
+    overall = {"now": 0, "peak": 0}
+
+    async def main():
+        writer = BatchWriter(None)
+        await collect(run_batch(urls, make_processor(delays, active=overall), platform_of, writer, 3, {"slow": 1}))
+
+    asyncio.run(main())
+    assert overall["peak"] == 3
+
+
+@pytest.mark.parametrize("batch_size", [1, 100])
+def test_disconnect_still_writes_finished_videos(batch_size):
+    """Starlette cancels a disconnected stream through an anyio task group"""
+    urls = ["https://a/1", "https://a/2", "https://a/3", "https://a/4"]
+    delays = {"https://a/1": 0.0, "https://a/2": 0.0, "https://a/3": 10.0, "https://a/4": 10.0}
+    saved = []
+
+    async def main():
+        collection = FakeCollection()
+        writer = BatchWriter(collection, batch_size=batch_size)
+        events = run_batch(urls, make_processor(delays, saved), platform_of, writer, 4, {})
+        done = 0
+
+        async def consume(cancel_scope):
+            nonlocal done
+            async for event in events:
+                if event["type"] == "video":
+                    done += 1
+                    if done == 2:
+                        # The client goes away mid-batch
+                        cancel_scope.cancel()
+
+        async with anyio.create_task_group() as group:
+            group.start_soon(consume, group.cancel_scope)
+        return collection
+
+    collection = asyncio.run(main())
+    assert sorted(id for batch in collection.batches for id in batch) == ["id-1", "id-2"]
+    assert sorted(saved) == ["id-1", "id-2"]
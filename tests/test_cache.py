@@ -0,0 +1,147 @@
+import types
+import asyncio
+
+import pytest
+
+import cache
+from cache import TTLLRUCache, TieredCache, detect_platform, normalize_video_url
+from metrics import registry
+
+
+@pytest.mark.parametrize("url", [
+    "https://youtu.be/dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ?si=abc123&t=42",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://m.youtube.com/watch?v=dQw4w9WgXcQ&feature=share&utm_source=x",
+    "youtube.com/watch?feature=youtu.be&v=dQw4w9WgXcQ",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://youtube.com/shorts/dQw4w9WgXcQ/?feature=share",
+    "https://music.youtube.com/watch?v=dQw4w9WgXcQ&pp=ygU",
+])
+def test_youtube_links_share_one_form(url):
+    assert normalize_video_url(url, "youtube") == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    "https://twitter.com/someone/status/1234567890",
+    "https://x.com/someone/status/1234567890?s=20&t=abc",
+    "https://mobile.twitter.com/someone/status/1234567890/",
+    "https://x.com/other/status/1234567890/photo/1",
+])
+def test_x_and_twitter_status_links_share_one_form(url):
+    assert normalize_video_url(url, "twitter") == "https://twitter.com/i/status/1234567890"
+
+
+def test_x_links_without_a_status_keep_their_host():
+    assert normalize_video_url("https://x.com/someone", "twitter") == "https://x.com/someone"
+    assert normalize_video_url("https://twitter.com/someone", "twitter") == "https://twitter.com/someone"
+
+
+def test_tracking_params_are_stripped_on_known_platforms():
+    url = "https://www.tiktok.com/@user/video/123?is_from_webapp=1&sender_device=pc&utm_campaign=x"
+    assert normalize_video_url(url, "tiktok") == "https://www.tiktok.com/@user/video/123"
+
+    url = "https://www.instagram.com/reel/Cabc123/?igsh=xyz&utm_medium=copy_link"
+    assert normalize_video_url(url, "instagram") == "https://www.instagram.com/p/Cabc123/"
+
+    url = "https://www.facebook.com/watch/?v=987&ref=sharing&fbclid=abc"
+    assert normalize_video_url(url, "facebook") == "https://facebook.com/watch?v=987"
+
+
+@pytest.mark.parametrize("url, platform", [
+    ("https://m.youtube.com/watch?v=abc", "youtube"),
+    ("youtu.be/abc", "youtube"),
+    ("https://vm.tiktok.com/ZM123/", "tiktok"),
+    ("https://x.com/user/status/1", "twitter"),
+    ("https://mobile.twitter.com/user/status/1", "twitter"),
+    ("https://fb.com/watch/?v=1", "facebook"),
+    ("https://WWW.Instagram.com:443/reel/abc/", "instagram"),
+    ("https://www.dropbox.com/s/abc/video.mp4", "unknown"),
+    ("https://app.box.com/s/abc", "unknown"),
+    ("https://www.netflix.com/watch/1", "unknown"),
+    ("https://example.com/?next=youtube.com", "unknown"),
+    ("https://notyoutube.com/watch?v=abc", "unknown"),
+])
+def test_platform_is_detected_from_the_hostname(url, platform):
+    assert detect_platform(url) == platform
+
+
+def test_lookalike_hosts_keep_platform_params():
+    url = "https://app.box.com/v?t=5&id=1"
+    assert normalize_video_url(url, detect_platform(url)) == "https://app.box.com/v?id=1&t=5"
+
+
+def test_unknown_hosts_only_lose_utm_and_click_ids():
+    url = "https://videos.example.com/play?id=7&t=30&source=feed&utm_source=news&gclid=abc&fbclid=def"
+    assert normalize_video_url(url, "unknown") == "https://videos.example.com/play?id=7&source=feed&t=30"
+
+
+def test_unknown_hosts_sort_remaining_params():
+    assert (
+        normalize_video_url("https://example.com/v?b=2&a=1", "unknown")
+        == normalize_video_url("https://www.example.com/v/?a=1&b=2", "unknown")
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+def test_ttl_cache_entries_expire(clock):
+    store = TTLLRUCache(max_entries=10, ttl_seconds=60)
+    store.set("a", 1)
+    clock.now += 59
+    assert store.get("a") == 1
+    clock.now += 1
+    assert store.get("a") is None
+    assert store.expirations == 1
+    assert len(store) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    store = TTLLRUCache(max_entries=2, ttl_seconds=60)
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1  # "b" is now the least recently used
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+    assert store.evictions == 1
+
+
+def test_ttl_cache_discard_prefixes(clock):
+    store = TTLLRUCache(max_entries=10, ttl_seconds=60)
+    store.set("https://a|storytime", 1)
+    store.set("https://a|viral-trends", 2)
+    store.set("https://b|storytime", 3)
+    assert store.discard_prefixes(["https://a|"]) == 2
+    assert store.get("https://b|storytime") == 3
+    assert len(store) == 1
+
+
+def test_tiered_cache_lookups_are_exported_per_cache(clock):
+    async def main():
+        store = TieredCache("exported", max_entries=10, ttl_seconds=60)
+        await store.get("a")
+        await store.set("a", 1)
+        await store.get("a")
+        await store.get("a")
+        return store.stats()
+
+    stats = asyncio.run(main())
+    assert (stats["memory_hits"], stats["misses"]) == (2, 1)
+    rendered = registry.render()
+    assert 'ayovirals_cache_lookups_total{cache="exported",result="memory"} 2' in rendered
+    assert 'ayovirals_cache_lookups_total{cache="exported",result="miss"} 1' in rendered
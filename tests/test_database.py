@@ -0,0 +1,196 @@
+import types
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from pymongo import UpdateOne
+
+import database
+from database import (
+    LEGACY_CREATED_AT,
+    BackgroundWriter,
+    backfill_normalized_urls,
+    decode_cursor,
+    encode_cursor,
+    migrate_created_at,
+    migrate_videos,
+    video_history_filter,
+)
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, "video-1")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "video-1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "eyJ0IjogIm5vcGUifQ", encode_cursor(datetime.now(timezone.utc), "x")[:-6]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_empty_filter():
+    assert video_history_filter() == {}
+
+
+def test_single_clause_is_not_wrapped():
+    assert video_history_filter(platform="youtube") == {"platform": "youtube"}
+
+
+def test_filter_combines_clauses():
+    since = datetime(2024, 1, 1)
+    until = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    assert video_history_filter(persona="storytime", since=since, until=until, keyword="#Money") == {"$and": [
+        {"persona": "storytime"},
+        {"keywords": "#money"},
+        {"created_at": {"$gte": since.replace(tzinfo=timezone.utc), "$lt": until}},
+    ]}
+
+
+def test_cursor_filter_pages_past_the_last_item():
+    created_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert video_history_filter(cursor=encode_cursor(created_at, "video-9")) == {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": "video-9"}},
+    ]}
+
+
+def test_background_writer_runs_writes_without_waiting():
+    async def main():
+        writer = BackgroundWriter(max_pending=10)
+        release = asyncio.Event()
+        written = []
+
+        async def write():
+            await release.wait()
+            written.append(1)
+
+        await writer.submit(write)
+        await writer.submit(write)
+        pending = writer.stats()
+        release.set()
+        await writer.drain()
+        return pending, writer.stats(), written
+
+    pending, drained, written = asyncio.run(main())
+    assert pending == {"pending": 2, "completed": 0, "failed": 0}
+    assert drained == {"pending": 0, "completed": 2, "failed": 0}
+    assert written == [1, 1]
+
+
+def test_background_writer_writes_inline_when_full():
+    async def main():
+        writer = BackgroundWriter(max_pending=1)
+        release = asyncio.Event()
+        order = []
+
+        async def slow():
+            await release.wait()
+            order.append("slow")
+
+        async def inline():
+            order.append("inline")
+
+        await writer.submit(slow)
+        # The second write runs before submit returns instead of queueing behind the first
+        await writer.submit(inline)
+        assert order == ["inline"]
+        release.set()
+        await writer.drain()
+        return order
+
+    assert asyncio.run(main()) == ["inline", "slow"]
+
+
+def test_background_writer_counts_failures():
+    async def main():
+        writer = BackgroundWriter()
+
+        async def fail():
+            raise RuntimeError("database down")
+
+        async def succeed():
+            pass
+
+        await writer.submit(fail, "insert")
+        await writer.submit(succeed)
+        await writer.drain()
+        return writer.stats()
+
+    assert asyncio.run(main()) == {"pending": 0, "completed": 1, "failed": 1}
+
+
+class FakeVideos:
+    """The slice of a motor collection the migrations use"""
+
+    def __init__(self, documents, fail_updates: bool = False):
+        self.documents = {document["_id"]: dict(document) for document in documents}
+        self.fail_updates = fail_updates
+        self.updates = []
+        self.bulk_writes = []
+
+    async def update_many(self, query, update):
+        if self.fail_updates:
+            raise RuntimeError("database down")
+        self.updates.append((query, update))
+        return types.SimpleNamespace(modified_count=len(self.documents))
+
+    def find(self, query, projection):
+        assert query == {"normalized_url": {"$exists": False}, "url": {"$type": "string"}}
+
+        async def cursor():
+            for document in list(self.documents.values()):
+                if "normalized_url" not in document and isinstance(document.get("url"), str):
+                    yield {"_id": document["_id"], "url": document["url"]}
+        return cursor()
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(list(operations))
+        return types.SimpleNamespace(modified_count=len(operations))
+
+
+def test_migrate_created_at_only_touches_string_dates():
+    collection = FakeVideos([{"_id": 1}])
+    assert asyncio.run(migrate_created_at(collection)) == 1
+    (query, pipeline), = collection.updates
+    assert query == {"created_at": {"$type": "string"}}
+    condition = pipeline[0]["$set"]["created_at"]["$cond"]
+    # The legacy placeholder becomes the document's insertion time
+    assert condition[0] == {"$eq": ["$created_at", LEGACY_CREATED_AT]}
+    assert condition[1] == {"$toDate": "$_id"}
+    assert condition[2]["$dateFromString"]["onError"] == {"$toDate": "$_id"}
+
+
+def test_backfill_normalized_urls_in_batches(monkeypatch):
+    monkeypatch.setattr(database, "MIGRATION_BATCH_SIZE", 2)
+    collection = FakeVideos([
+        {"_id": 1, "url": "https://A/1"},
+        {"_id": 2, "url": "https://A/2"},
+        {"_id": 3, "url": "https://A/3", "normalized_url": "kept"},
+        {"_id": 4, "url": "https://A/4"},
+        {"_id": 5},
+    ])
+    assert asyncio.run(backfill_normalized_urls(collection, str.lower)) == 3
+
+    def backfill(document_id):
+        return UpdateOne({"_id": document_id}, {"$set": {"normalized_url": f"https://a/{document_id}"}})
+    assert collection.bulk_writes == [[backfill(1), backfill(2)], [backfill(4)]]
+
+
+def test_backfill_without_missing_urls_writes_nothing():
+    collection = FakeVideos([{"_id": 1, "url": "https://a/1", "normalized_url": "https://a/1"}])
+    assert asyncio.run(backfill_normalized_urls(collection, str.lower)) == 0
+    assert collection.bulk_writes == []
+
+
+def test_migrate_videos_reports_each_step():
+    collection = FakeVideos([{"_id": 1, "url": "https://A/1"}])
+    assert asyncio.run(migrate_videos(collection, str.lower)) == {"created_at": 1, "normalized_url": 1}
+
+
+def test_migrate_videos_stops_at_the_first_failure():
+    collection = FakeVideos([{"_id": 1, "url": "https://A/1"}], fail_updates=True)
+    assert asyncio.run(migrate_videos(collection, str.lower)) == {}
+    assert collection.bulk_writes == []
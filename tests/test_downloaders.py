@@ -0,0 +1,103 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from downloaders import (
+    FAILED,
+    SAMPLE_RATE,
+    FixtureDownloader,
+    YtDlpDownloader,
+    create_downloader,
+    read_wav,
+    synthetic_speech,
+    write_wav,
+)
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    return FixtureDownloader(str(tmp_path / "fixtures"), default_seconds=4, variants=2, max_fixture_seconds=6)
+
+
+def test_generated_fixture_end_to_end(downloader):
+    audio, title, description = asyncio.run(downloader.fetch("https://youtu.be/abc?fixture_seconds=3"))
+    assert audio.dtype == np.float32
+    assert len(audio) == 3 * SAMPLE_RATE
+    assert 0.05 < float(np.abs(audio).max()) <= 1.0
+    assert title.startswith("Fixture ") and title.endswith("(3s)")
+    assert description.startswith("Local fixture ")
+
+    # The fixture is written once and reused for the same variant and length
+    files = os.listdir(downloader.directory)
+    again, _, _ = asyncio.run(downloader.fetch("https://youtu.be/abc?fixture_seconds=3"))
+    assert os.listdir(downloader.directory) == files
+    np.testing.assert_array_equal(audio, again)
+
+
+def test_fetch_stops_at_max_seconds(downloader):
+    audio, _, _ = asyncio.run(downloader.fetch("https://youtu.be/abc", max_seconds=1.5))
+    assert len(audio) == int(1.5 * SAMPLE_RATE)
+
+
+def test_fixture_length_is_capped(downloader):
+    variant, seconds = downloader.fixture_for("https://youtu.be/abc?fixture_seconds=100000")
+    assert seconds == 6
+    assert downloader.fixture_for("https://youtu.be/abc")[1] == 4
+    assert variant in (0, 1)
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "nan", "lots"])
+def test_invalid_fixture_lengths_fail(downloader, value):
+    assert asyncio.run(downloader.fetch(f"https://youtu.be/abc?fixture_seconds={value}")) == FAILED
+
+
+def test_local_files_inside_the_root_are_read(downloader):
+    path = os.path.join(downloader.directory, "clip.wav")
+    write_wav(path, synthetic_speech(2, seed=3))
+    for url in (f"file://{path}", path):
+        audio, title, _ = asyncio.run(downloader.fetch(url))
+        assert len(audio) == 2 * SAMPLE_RATE
+        assert title == "clip"
+
+
+def test_local_files_outside_the_root_are_refused(downloader, tmp_path):
+    outside = str(tmp_path / "outside.wav")
+    write_wav(outside, synthetic_speech(1))
+    for url in (
+        f"file://{outside}",
+        outside,
+        f"file://{downloader.directory}/../outside.wav",
+        "/etc/passwd",
+    ):
+        assert asyncio.run(downloader.fetch(url)) == FAILED
+
+    link = os.path.join(downloader.directory, "link.wav")
+    os.symlink(outside, link)
+    assert asyncio.run(downloader.fetch(f"file://{link}")) == FAILED
+
+
+def test_wav_round_trip_mixes_down_and_resamples(tmp_path):
+    import wave
+
+    path = str(tmp_path / "stereo.wav")
+    frames = np.full((8000, 2), [8192, -8192], dtype=np.int16)
+    frames[:, 0] = 16384
+    with wave.open(path, "wb") as handle:
+        handle.setnchannels(2)
+        handle.setsampwidth(2)
+        handle.setframerate(8000)
+        handle.writeframes(frames.tobytes())
+
+    audio = read_wav(path)
+    assert len(audio) == SAMPLE_RATE
+    np.testing.assert_allclose(audio, 0.125, atol=1e-6)
+
+
+def test_create_downloader():
+    assert isinstance(create_downloader("ytdlp", "yt-dlp"), YtDlpDownloader)
+    with pytest.raises(ValueError):
+        create_downloader("fixture", "yt-dlp")
+    with pytest.raises(ValueError):
+        create_downloader("curl", "yt-dlp")
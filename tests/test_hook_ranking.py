@@ -0,0 +1,66 @@
+import pytest
+
+from hook_ranking import HookRanker, extract_numbers
+from triggers import TriggerMatcher
+
+
+@pytest.fixture
+def ranker():
+    matcher = TriggerMatcher({
+        "hook:money": ["money", "price", "expensive"],
+        "hook:secret": ["secret", "hidden"],
+    })
+    return HookRanker(
+        matcher,
+        {
+            "finance": ["How I save money every month...", "The budget rule nobody follows..."],
+            "storytime": ["You won't believe what happened next..."],
+        },
+        {
+            "hook:money": ["The price of this will shock you..."],
+            "hook:secret": ["I found a secret that changes everything..."],
+        },
+        {"topic": ["Nobody talks about this side of {topic}..."], "number": ["{number} - and that's not all..."]},
+    )
+
+
+def test_extract_numbers_prefers_repeated_amounts():
+    text = "It cost $1,200 then $1,200 again, a 15% jump in 30 days, and 2 cats."
+    assert extract_numbers(text) == ["$1,200", "15%"]
+    assert extract_numbers("no numbers here") == []
+
+
+def test_trigger_hooks_only_appear_when_their_category_is_present(ranker):
+    plain = {candidate["hook"] for candidate in ranker.rank("a calm walk in the park", "finance")}
+    assert "The price of this will shock you..." not in plain
+    assert "I found a secret that changes everything..." not in plain
+
+    hooks = {candidate["hook"] for candidate in ranker.rank("the hidden secret of money", "finance")}
+    assert "The price of this will shock you..." in hooks
+    assert "I found a secret that changes everything..." in hooks
+
+
+def test_persona_templates_come_from_the_requested_persona(ranker):
+    sources = {(candidate["hook"], candidate["source"]) for candidate in ranker.rank("a story", "storytime")}
+    assert ("You won't believe what happened next...", "persona") in sources
+    assert all(hook != "How I save money every month..." for hook, _ in sources)
+
+
+def test_ranking_is_sorted_unique_and_limited(ranker):
+    ranked = ranker.rank("money money money and the secret price", "finance", ["budgets"], top_k=3)
+    assert len(ranked) == 3
+    scores = [candidate["score"] for candidate in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert len({candidate["hook"] for candidate in ranked}) == 3
+
+
+def test_relevant_hooks_outrank_unrelated_ones(ranker):
+    ranked = ranker.rank("how to save money with a monthly budget", "finance", top_k=8)
+    hooks = [candidate["hook"] for candidate in ranked]
+    assert hooks.index("How I save money every month...") < hooks.index("The budget rule nobody follows...")
+
+
+def test_entity_templates_are_filled_from_the_content(ranker):
+    ranked = ranker.rank("I paid $500 for crypto, then $500 more", "finance", ["crypto"], top_k=10)
+    entity_hooks = {candidate["hook"] for candidate in ranked if candidate["source"] == "entity"}
+    assert entity_hooks == {"Nobody talks about this side of crypto...", "$500 - and that's not all..."}
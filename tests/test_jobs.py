@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from jobs import (
+    STAGE_ANALYSING,
+    STAGE_DONE,
+    STAGE_DOWNLOADING,
+    STAGE_FAILED,
+    STAGE_QUEUED,
+    STAGE_TRANSCRIBING,
+    JobQueue,
+    SQLiteJobStore,
+    validate_webhook_url,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+
+def test_sqlite_store_round_trip(store):
+    async def main():
+        await store.setup()
+        job = {"id": "job-1", "stage": STAGE_QUEUED, "created_at": "2024-01-01T00:00:00+00:00", "result": None}
+        await store.create(job)
+        await store.update("job-1", {"stage": STAGE_DONE, "result": {"id": "video-1"}})
+        await store.update("missing", {"stage": STAGE_DONE})
+        return await store.get("job-1"), await store.get("missing")
+
+    job, missing = asyncio.run(main())
+    assert job == {"id": "job-1", "stage": STAGE_DONE, "created_at": "2024-01-01T00:00:00+00:00", "result": {"id": "video-1"}}
+    assert missing is None
+
+
+def test_sqlite_store_lists_unfinished_jobs_oldest_first(store):
+    async def main():
+        await store.setup()
+        for job_id, stage, created_at in [
+            ("c", STAGE_QUEUED, "2024-01-03"),
+            ("a", STAGE_TRANSCRIBING, "2024-01-01"),
+            ("b", STAGE_DONE, "2024-01-02"),
+            ("d", STAGE_FAILED, "2024-01-04"),
+        ]:
+            await store.create({"id": job_id, "stage": stage, "created_at": created_at})
+        return [job["id"] for job in await store.pending()]
+
+    assert asyncio.run(main()) == ["a", "c"]
+
+
+async def wait_for_stage(queue, job_id, stages):
+    for _ in range(200):
+        job = await queue.get(job_id)
+        if job["stage"] in stages:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} never reached {stages}")
+
+
+def test_job_queue_records_stage_timings(store):
+    async def runner(job, report):
+        for stage in (STAGE_DOWNLOADING, STAGE_TRANSCRIBING, STAGE_ANALYSING):
+            await report(stage)
+            await asyncio.sleep(0.02)
+        return {"id": "video-1", "persona": job["persona"]}
+
+    async def main():
+        queue = JobQueue(store, runner, workers=1)
+        await queue.start()
+        try:
+            job = await queue.submit("https://youtu.be/abc", "storytime")
+            return await wait_for_stage(queue, job["id"], {STAGE_DONE, STAGE_FAILED})
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(main())
+    assert job["stage"] == STAGE_DONE
+    assert job["result"] == {"id": "video-1", "persona": "storytime"}
+    assert job["error"] is None
+    assert job["started_at"] and job["finished_at"]
+    timings = job["stage_timings"]
+    assert list(timings) == [STAGE_QUEUED, STAGE_DOWNLOADING, STAGE_TRANSCRIBING, STAGE_ANALYSING]
+    assert all(timings[stage] >= 0.015 for stage in (STAGE_DOWNLOADING, STAGE_TRANSCRIBING, STAGE_ANALYSING))
+
+
+def test_job_queue_records_failures(store):
+    async def runner(job, report):
+        await report(STAGE_DOWNLOADING)
+        raise RuntimeError("download failed")
+
+    async def main():
+        queue = JobQueue(store, runner, workers=1)
+        await queue.start()
+        try:
+            job = await queue.submit("https://youtu.be/abc", "storytime")
+            return await wait_for_stage(queue, job["id"], {STAGE_DONE, STAGE_FAILED})
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(main())
+    assert job["stage"] == STAGE_FAILED
+    assert job["error"] == "download failed"
+    assert list(job["stage_timings"]) == [STAGE_QUEUED, STAGE_DOWNLOADING]
+
+
+def test_job_queue_resumes_unfinished_jobs_on_start(store):
+    async def runner(job, report):
+        return {"id": job["id"]}
+
+    async def main():
+        await store.setup()
+        await store.create({
+            "id": "interrupted", "stage": STAGE_TRANSCRIBING, "created_at": "2024-01-01T00:00:00+00:00",
+            "stage_timings": {STAGE_QUEUED: 1.0}, "webhook_url": None,
+        })
+        queue = JobQueue(store, runner, workers=1)
+        await queue.start()
+        try:
+            return await wait_for_stage(queue, "interrupted", {STAGE_DONE, STAGE_FAILED})
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(main())
+    assert job["stage"] == STAGE_DONE
+    assert job["result"] == {"id": "interrupted"}
+
+
+def test_jobs_sharing_a_video_all_report_its_stages(server, fake_whisper, store):
+    """Only one job downloads and transcribes; the others still see it happen"""
+    fake_whisper.release.clear()
+    url = "https://youtu.be/shared-by-jobs?fixture_seconds=2"
+
+    async def main():
+        queue = JobQueue(store, server.run_job, workers=3)
+        await queue.start()
+        try:
+            # Two jobs share the result flight, the third only the transcript flight
+            jobs = [await queue.submit(url, persona) for persona in ("storytime", "storytime", "fitness-guru")]
+            for job in jobs:
+                await wait_for_stage(queue, job["id"], {STAGE_TRANSCRIBING})
+            fake_whisper.release.set()
+            return [await wait_for_stage(queue, job["id"], {STAGE_DONE, STAGE_FAILED}) for job in jobs]
+        finally:
+            fake_whisper.release.set()
+            await queue.stop()
+
+    finished = asyncio.run(main())
+    assert [job["stage"] for job in finished] == [STAGE_DONE] * 3
+    for job in finished:
+        assert {STAGE_TRANSCRIBING, STAGE_ANALYSING} <= set(job["stage_timings"])
+    assert finished[0]["result"]["id"] == finished[1]["result"]["id"]
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/hook",
+    "http://127.0.0.1/hook",
+    "http://10.0.0.5:8080/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://localhost/hook",
+])
+def test_webhooks_to_private_addresses_are_rejected(url):
+    with pytest.raises(ValueError):
+        validate_webhook_url(url)
+
+
+def test_allowed_webhook_hosts_skip_the_address_check():
+    assert validate_webhook_url("http://localhost:9000/hook", {"localhost"}) == "http://localhost:9000/hook"
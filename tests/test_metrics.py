@@ -0,0 +1,70 @@
+import contextvars
+
+import pytest
+
+from metrics import Registry, pipeline_labels, registry, timed
+
+
+def test_counter_renders_one_sample_per_label_set():
+    metrics = Registry()
+    videos = metrics.counter("videos_total", "Videos processed", ("platform", "outcome"))
+    videos.inc(platform="youtube", outcome="cached")
+    videos.inc(2, platform="youtube", outcome="cached")
+    videos.inc(platform="tiktok", outcome="failed")
+    assert metrics.render().splitlines() == [
+        "# HELP videos_total Videos processed",
+        "# TYPE videos_total counter",
+        'videos_total{platform="tiktok",outcome="failed"} 1',
+        'videos_total{platform="youtube",outcome="cached"} 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    metrics = Registry()
+    errors = metrics.counter("errors_total", "Errors", ("reason",))
+    errors.inc(reason='bad "quote"\\path\nline')
+    assert metrics.render().splitlines()[-1] == r'errors_total{reason="bad \"quote\"\\path\nline"} 1'
+
+
+def test_gauges_track_blocks_and_read_functions():
+    metrics = Registry()
+    in_flight = metrics.gauge("in_flight", "Blocks running", ("stage",))
+    metrics.gauge("depth", "Queue depth", function=lambda: 7)
+    with in_flight.track(stage="download"):
+        with in_flight.track(stage="download"):
+            assert 'in_flight{stage="download"} 2' in metrics.render()
+    in_flight.set(0.5, stage="analysis")
+    lines = metrics.render().splitlines()
+    assert 'in_flight{stage="analysis"} 0.5' in lines
+    assert 'in_flight{stage="download"} 0' in lines
+    assert lines[-3:] == ["# HELP depth Queue depth", "# TYPE depth gauge", "depth 7"]
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Registry()
+    latency = metrics.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, stage="download")
+    assert metrics.render().splitlines()[2:] == [
+        'latency_seconds_bucket{stage="download",le="0.1"} 2',
+        'latency_seconds_bucket{stage="download",le="1"} 3',
+        'latency_seconds_bucket{stage="download",le="+Inf"} 4',
+        'latency_seconds_sum{stage="download"} 3.65',
+        'latency_seconds_count{stage="download"} 4',
+    ]
+
+
+def test_timed_attributes_stages_to_the_pipeline_labels():
+    def run():
+        pipeline_labels("tiktok", "metrics-test")
+        with timed("download"):
+            pass
+        with pytest.raises(RuntimeError):
+            with timed("download"):
+                raise RuntimeError("boom")
+
+    contextvars.copy_context().run(run)
+    lines = registry.render().splitlines()
+    labels = 'stage="download",platform="tiktok",persona="metrics-test"'
+    assert f"ayovirals_stage_seconds_count{{{labels}}} 2" in lines
+    assert f"ayovirals_stage_errors_total{{{labels}}} 1" in lines
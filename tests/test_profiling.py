@@ -0,0 +1,121 @@
+import time
+import marshal
+import asyncio
+
+import httpx
+import pytest
+
+from profiling import ProfileSession, Profiler, ProfilingMiddleware
+
+
+def busy_work(seconds: float = 0.0) -> int:
+    total, ends = 0, time.perf_counter() + seconds
+    while True:
+        total += sum(range(500))
+        if time.perf_counter() >= ends:
+            return total
+
+
+@pytest.mark.parametrize("mode, scopes", [("perf", None), ("cprofile", ["analysis", "everything"])])
+def test_unknown_modes_and_scopes_are_rejected(mode, scopes):
+    with pytest.raises(ValueError):
+        ProfileSession(mode, scopes)
+
+
+def test_cprofile_window_covers_only_its_scopes():
+    profiler = Profiler()
+    window = profiler.start_window("cprofile", 60, ["analysis"])
+    with profiler.profiled("analysis"):
+        busy_work()
+        # Nested blocks are part of the running profile, not a second one
+        with profiler.profiled("analysis"):
+            busy_work()
+    with profiler.profiled("transcription"):
+        busy_work()
+    with pytest.raises(RuntimeError):
+        profiler.start_window("sampling", 60)
+    assert profiler.stop_window() is window
+
+    summary = window.summary()
+    assert (summary["blocks"], summary["skipped"], summary["active"]) == (1, 0, False)
+    assert "busy_work" in window.pstats_text()
+    stats = marshal.loads(window.pstats_bytes())
+    assert [calls[1] for (_, _, name), calls in stats.items() if name == "busy_work"] == [2]
+    assert profiler.sessions()[0]["id"] == window.id
+
+
+def test_sampling_window_records_stacks_inside_profiled_blocks():
+    profiler = Profiler()
+    window = profiler.start_window("sampling", 60, interval=0.001)
+    with profiler.profiled("analysis"):
+        busy_work(0.1)
+    busy_work(0.05)
+    profiler.stop_window()
+
+    assert window.summary()["samples"] > 0
+    speedscope = window.speedscope()
+    names = {frame["name"] for frame in speedscope["shared"]["frames"]}
+    assert "busy_work" in names
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    assert len(speedscope["profiles"][0]["samples"]) == len(speedscope["profiles"][0]["weights"])
+
+
+def test_windows_end_by_themselves():
+    profiler = Profiler()
+    window = profiler.start_window("cprofile", 0.01)
+    time.sleep(0.02)
+    with profiler.profiled("analysis"):
+        busy_work()
+    assert window.blocks == 0 and not window.active
+    # A new window may start once the previous one has ended
+    profiler.start_window("cprofile", 60)
+
+
+profiler_under_test = Profiler()
+
+
+async def analyse(scope, receive, send):
+    with profiler_under_test.profiled("analysis"):
+        busy_work()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def get(path, headers=None):
+    app = ProfilingMiddleware(analyse, profiler_under_test, authorized=lambda token: token == "secret")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path, headers=headers)
+
+
+def test_middleware_profiles_one_request_for_admins():
+    plain = asyncio.run(get("/api/keywords"))
+    assert plain.status_code == 200 and "x-profile-id" not in plain.headers
+
+    assert asyncio.run(get("/api/keywords", {"X-Profile": "cprofile"})).status_code == 403
+    assert asyncio.run(get("/api/keywords?profile=1", {"X-Admin-Token": "wrong"})).status_code == 403
+    assert asyncio.run(get("/api/keywords", {"X-Profile": "perf", "X-Admin-Token": "secret"})).status_code == 400
+
+    profiled = asyncio.run(get("/api/keywords?profile=1", {"X-Admin-Token": "secret"}))
+    assert profiled.status_code == 200
+    session = profiler_under_test.get(profiled.headers["x-profile-id"])
+    assert (session.mode, session.label, session.blocks, session.active) == ("cprofile", "GET /api/keywords", 1, False)
+
+
+def test_admin_api_is_disabled_without_a_token(server, monkeypatch):
+    async def call(method, path, token=None, **kwargs):
+        headers = {"X-Admin-Token": token} if token else {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            return await client.request(method, path, headers=headers, **kwargs)
+
+    monkeypatch.setattr(server, "ADMIN_TOKEN", None)
+    assert asyncio.run(call("GET", "/api/admin/profile", "anything")).status_code == 404
+
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "secret")
+    assert asyncio.run(call("GET", "/api/admin/profile", "wrong")).status_code == 403
+    started = asyncio.run(call("POST", "/api/admin/profile", "secret", json={"mode": "cprofile", "seconds": 60}))
+    assert started.status_code == 201
+    assert asyncio.run(call("POST", "/api/admin/profile", "secret", json={"seconds": 60})).status_code == 409
+    assert asyncio.run(call("DELETE", "/api/admin/profile", "secret")).json()["id"] == started.json()["id"]
+    download = asyncio.run(call("GET", f"/api/admin/profiles/{started.json()['id']}", "secret", params={"format": "text"}))
+    assert download.status_code == 200
+    assert asyncio.run(call("GET", f"/api/admin/profiles/{started.json()['id']}", "secret", params={"format": "speedscope"})).status_code == 400
@@ -0,0 +1,134 @@
+import json
+import types
+import asyncio
+
+import httpx
+import pytest
+
+
+def matches(document, query):
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict) and "$in" in condition:
+            if document.get(field) not in condition["$in"]:
+                return False
+        elif document.get(field) != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def limit(self, count):
+        return FakeCursor(self.documents[:count])
+
+    async def __aiter__(self):
+        for document in self.documents:
+            yield document
+
+
+class FakeVideos:
+    """The slice of the motor videos collection the re-analysis endpoints use"""
+
+    def __init__(self, documents):
+        self.documents = {document["id"]: dict(document) for document in documents}
+        self.bulk_writes = []
+
+    async def find_one(self, query, projection=None):
+        return next((dict(document) for document in self.documents.values() if matches(document, query)), None)
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(document) for document in self.documents.values() if matches(document, query)])
+
+    async def update_one(self, query, update):
+        self.documents[query["id"]].update(update["$set"])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(len(operations))
+        return types.SimpleNamespace(modified_count=len(operations))
+
+
+def stored_transcript(text):
+    segments = [{"start": 0.0, "end": 5.0, "text": text}]
+    return {
+        "title": "Stored video",
+        "description": "",
+        "transcription": text,
+        "segments": segments,
+        "tier": {"tier": "balanced", "model": "base", "beam_size": 5, "max_seconds": None},
+    }
+
+
+@pytest.fixture
+def videos(server, monkeypatch):
+    collection = FakeVideos([
+        {"id": f"video-{index}", "url": f"https://youtu.be/reanalyze-{index}", "platform": "youtube",
+         "persona": "storytime", "summary": "old", "hooks": ["old hook"], "keywords": ["#old"]}
+        for index in range(5)
+    ])
+    monkeypatch.setattr(server, "db", object())
+    monkeypatch.setattr(server, "videos_collection", collection)
+
+    async def store():
+        # video-4 was never transcribed
+        for index in range(4):
+            url = server.normalize_video_url(f"https://youtu.be/reanalyze-{index}", "youtube")
+            await server.transcript_store.put(url, stored_transcript("The secret money trick nobody tells you about."))
+    asyncio.run(store())
+    return collection
+
+
+async def request(server, method, path, **kwargs):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, path, **kwargs)
+
+
+def test_reanalyze_one_video_from_its_stored_transcript(server, videos):
+    async def main():
+        key = server.normalize_video_url("https://youtu.be/reanalyze-0", "youtube") + "|balanced|storytime"
+        await server.result_cache.set(key, {"id": "video-0"})
+        response = await request(server, "POST", "/api/videos/video-0/reanalyze", json={"persona": "fitness-guru"})
+        return response, await server.result_cache.get(key)
+
+    response, cached = asyncio.run(main())
+    assert response.status_code == 200
+    video = response.json()
+    assert video["persona"] == "fitness-guru"
+    assert video["summary"] != "old" and video["hooks"] != ["old hook"]
+    assert videos.documents["video-0"]["persona"] == "fitness-guru"
+    assert "reanalyzed_at" in videos.documents["video-0"]
+    # The cached result for the link would still serve the old analysis
+    assert cached is None
+
+
+def test_reanalyze_needs_a_stored_transcript(server, videos):
+    assert asyncio.run(request(server, "POST", "/api/videos/video-4/reanalyze")).status_code == 409
+    assert asyncio.run(request(server, "POST", "/api/videos/missing/reanalyze")).status_code == 404
+
+
+def test_reanalyze_many_streams_batches_and_a_summary(server, videos, monkeypatch):
+    monkeypatch.setattr(server, "REANALYZE_BATCH_SIZE", 2)
+    response = asyncio.run(request(server, "POST", "/api/videos/reanalyze", json={"platform": "youtube"}))
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["type"] for event in events] == ["batch", "batch", "batch", "summary"]
+    assert [event["processed"] for event in events[:3]] == [2, 4, 5]
+    summary = events[-1]
+    assert (summary["processed"], summary["updated"], summary["skipped"], summary["failed"]) == (5, 4, 1, 0)
+    assert videos.bulk_writes == [2, 2]
+
+
+def test_reanalyze_many_by_id_and_limit(server, videos):
+    response = asyncio.run(request(
+        server, "POST", "/api/videos/reanalyze", json={"video_ids": ["video-1", "video-3", "video-4"], "limit": 2}
+    ))
+    summary = json.loads(response.text.splitlines()[-1])
+    assert (summary["processed"], summary["updated"], summary["skipped"]) == (2, 2, 0)
+
+
+def test_reanalyze_needs_a_database(server):
+    assert asyncio.run(request(server, "POST", "/api/videos/reanalyze", json={})).status_code == 503
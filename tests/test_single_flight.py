@@ -0,0 +1,156 @@
+import asyncio
+
+from cache import SingleFlight
+from metrics import registry
+
+
+def test_single_flight_shares_one_result():
+    calls = []
+
+    async def main():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return 42
+
+        tasks = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        return results, flight.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == [42, 42, 42]
+    assert len(calls) == 1
+    assert stats == {"in_flight": 0, "executions": 1, "coalesced": 2}
+
+
+def test_single_flight_shares_one_exception():
+    async def main():
+        flight = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("download failed")
+
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(2)), return_exceptions=True), flight
+
+    results, flight = asyncio.run(main())
+    assert [str(result) for result in results] == ["download failed", "download failed"]
+    assert results[0] is results[1]
+    assert flight.executions == 1
+
+
+def test_single_flight_runs_again_after_finishing():
+    async def main():
+        flight = SingleFlight("test")
+        counter = iter(range(10))
+
+        async def work():
+            return next(counter)
+
+        return [await flight.do("key", work), await flight.do("key", work)]
+
+    assert asyncio.run(main()) == [0, 1]
+
+
+def test_single_flight_survives_the_first_caller_being_cancelled():
+    async def main():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        leader = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await follower
+
+    leader, result = asyncio.run(main())
+    assert leader.cancelled()
+    assert result == 42
+
+
+def test_single_flight_cancels_work_once_every_caller_is_gone():
+    async def main():
+        flight = SingleFlight("test")
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(flight.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        callers[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+        callers[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        return flight.stats()
+
+    assert asyncio.run(main())["in_flight"] == 0
+
+
+def test_single_flight_calls_are_exported_per_flight():
+    async def main():
+        flight = SingleFlight("exported")
+
+        async def work():
+            await asyncio.sleep(0.01)
+            return 1
+
+        await asyncio.gather(*(flight.do("key", work) for _ in range(3)))
+
+    asyncio.run(main())
+    rendered = registry.render()
+    assert 'ayovirals_single_flight_calls_total{flight="exported",outcome="executed"} 1' in rendered
+    assert 'ayovirals_single_flight_calls_total{flight="exported",outcome="coalesced"} 2' in rendered
+
+
+def test_single_flight_reports_stages_to_every_waiting_caller():
+    heard = {"first": [], "joiner": [], "gone": []}
+
+    async def main():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def work(report):
+            await report("downloading")
+            await release.wait()
+            await report("transcribing")
+            return 1
+
+        def reporter(name):
+            async def report(stage):
+                heard[name].append(stage)
+            return report
+
+        first = asyncio.create_task(flight.do("key", work, reporter("first")))
+        await asyncio.sleep(0.01)
+        joiner = asyncio.create_task(flight.do("key", work, reporter("joiner")))
+        gone = asyncio.create_task(flight.do("key", work, reporter("gone")))
+        await asyncio.sleep(0.01)
+        gone.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(first, joiner)
+
+    assert asyncio.run(main()) == [1, 1]
+    assert heard["first"] == ["downloading", "transcribing"]
+    # A late caller first hears the stage already reached, then the rest
+    assert heard["joiner"] == ["downloading", "transcribing"]
+    assert heard["gone"] == ["downloading"]
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import anyio
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition never became true")
+
+
+def test_stream_emits_segments_partial_analysis_and_result(server, fake_whisper, monkeypatch):
+    monkeypatch.setattr(server, "STREAM_ANALYSIS_EVERY", 2)
+    fake_whisper.segments = 4
+
+    async def main():
+        return [json.loads(event) async for event in server.stream_video_pipeline(
+            "https://youtu.be/stream-full?fixture_seconds=2", "storytime"
+        )]
+
+    events = asyncio.run(main())
+    assert [event["type"] for event in events] == [
+        "meta", "info", "segment", "segment", "analysis", "segment", "segment", "analysis", "result",
+    ]
+    assert events[1]["transcription_tier"]["tier"] == "balanced"
+    assert [event["start"] for event in events if event["type"] == "segment"] == [0.0, 1.0, 2.0, 3.0]
+    result = events[-1]
+    assert result["id"] == events[0]["id"]
+    assert result["transcription_tier"]["tier"] == "balanced"
+    assert result["hooks"]
+
+
+def test_disconnect_holds_the_slot_until_whisper_stops(server, fake_whisper):
+    """Starlette cancels a disconnected stream through an anyio task group"""
+    fake_whisper.segments = 50
+    fake_whisper.delay = 0.02
+    free_slots = server.PIPELINE_CONCURRENCY
+
+    async def main():
+        events = server.stream_video_pipeline("https://youtu.be/stream-disconnect?fixture_seconds=2", "storytime")
+        segments = 0
+
+        async def consume(cancel_scope):
+            nonlocal segments
+            async for event in events:
+                if json.loads(event)["type"] == "segment":
+                    segments += 1
+                    if segments == 3:
+                        cancel_scope.cancel()
+
+        async with anyio.create_task_group() as group:
+            group.start_soon(consume, group.cancel_scope)
+
+        # The client is gone but Whisper is still inside a segment: the slot stays taken
+        assert fake_whisper.in_use == 1
+        assert server.pipeline_semaphore._value == free_slots - 1
+
+        await wait_until(lambda: not server.stream_transcriptions)
+        assert server.pipeline_semaphore._value == free_slots
+
+    asyncio.run(main())
+    assert fake_whisper.in_use == 0
+    # Decoding stopped right after the disconnect instead of running through all 50 segments
+    assert fake_whisper.decoded < 10
@@ -0,0 +1,67 @@
+from summarizer import MAX_UNIT_WORDS, sentence_units, split_sentences, summarize
+
+
+def test_decimals_and_domains_do_not_split():
+    assert split_sentences("Revenue grew 3.5 percent on example.com last year. Then it fell!") == [
+        "Revenue grew 3.5 percent on example.com last year.",
+        "Then it fell!",
+    ]
+
+
+def test_abbreviations_do_not_split():
+    assert split_sentences("Dr. Smith met Mr. Jones vs. the board. It went well.") == [
+        "Dr. Smith met Mr. Jones vs. the board.",
+        "It went well.",
+    ]
+
+
+def test_unpunctuated_segments_are_merged_into_units():
+    segments = [
+        {"text": "so today we are going to talk"},
+        {"text": "about the best way to save money"},
+        {"text": "and it is easier than you think."},
+        {"text": "first open a savings account"},
+    ]
+    assert sentence_units("", segments) == [
+        "so today we are going to talk about the best way to save money and it is easier than you think.",
+        "first open a savings account",
+    ]
+
+
+def test_long_unpunctuated_text_is_cut_into_word_windows():
+    text = " ".join(f"word{index}" for index in range(MAX_UNIT_WORDS * 2 + 5))
+    units = sentence_units(text)
+    assert [len(unit.split()) for unit in units] == [MAX_UNIT_WORDS, MAX_UNIT_WORDS, 5]
+
+
+def test_short_text_is_returned_as_is():
+    assert summarize("One idea. Another idea.") == "One idea. Another idea."
+
+
+def test_summary_picks_central_sentences_in_order():
+    text = (
+        "Saving money starts with a budget. "
+        "My cat likes the sofa. "
+        "A budget shows where your money goes each month. "
+        "The weather was nice. "
+        "Track every expense in the budget to keep saving money. "
+        "Pizza is tasty."
+    )
+    summary = summarize(text, max_sentences=2)
+    assert summary == (
+        "Saving money starts with a budget. Track every expense in the budget to keep saving money."
+    )
+
+
+def test_summary_respects_the_length_budget():
+    sentences = [f"Topic {index} covers money budgets and savings plans in detail number {index}." for index in range(30)]
+    text = " ".join(sentences)
+    for max_chars in (40, 120, 300):
+        assert len(summarize(text, max_sentences=3, max_chars=max_chars)) <= max_chars
+
+
+def test_unpunctuated_whisper_transcript_still_summarizes():
+    words = ("money " * 3 + "budget plan saving tips for everyone today ").split()
+    text = " ".join(words * 20)
+    summary = summarize(text, max_sentences=2, max_chars=200)
+    assert 0 < len(summary) <= 200
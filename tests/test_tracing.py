@@ -0,0 +1,128 @@
+import json
+import time
+import asyncio
+import logging
+import contextvars
+
+import httpx
+import pytest
+
+from tracing import (
+    JsonFormatter,
+    RequestIdFilter,
+    TracingMiddleware,
+    current_request_id,
+    record_span,
+    span,
+    traced,
+    valid_request_id,
+)
+
+
+def test_spans_nest_and_record_failures():
+    async def main():
+        async with traced("job", "job-1") as trace:
+            with span("download"):
+                with span("probe", attempt=1):
+                    pass
+            with pytest.raises(ValueError):
+                with span("analysis"):
+                    raise ValueError("bad transcript")
+            started = time.perf_counter()
+            record_span("transcription", started, started + 0.25, chunks=3)
+        return trace.to_dict()
+
+    trace = asyncio.run(main())
+    spans = {item["name"]: item for item in trace["spans"]}
+    assert trace["request_id"] == "job-1"
+    assert spans["download"]["parent"] is None
+    assert spans["probe"]["parent"] == spans["download"]["id"]
+    assert spans["probe"]["attempt"] == 1
+    assert spans["analysis"]["status"] == "ValueError"
+    assert spans["transcription"]["duration_ms"] == 250.0 and spans["transcription"]["chunks"] == 3
+    assert current_request_id() is None
+
+
+def test_spans_on_executor_threads_attach_to_the_caller():
+    async def main():
+        async with traced("request") as trace:
+            with span("analysis"):
+                def work():
+                    with span("keywords"):
+                        pass
+                await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, work)
+        return trace.to_dict()
+
+    spans = {item["name"]: item for item in asyncio.run(main())["spans"]}
+    assert spans["keywords"]["parent"] == spans["analysis"]["id"]
+
+
+def test_spans_outside_a_trace_are_ignored():
+    with span("orphan"):
+        record_span("orphan", 0.0, 1.0)
+
+
+def test_slow_traces_go_to_the_slow_log(caplog):
+    async def main(slow_seconds):
+        async with traced("POST /api/process-video", "slow-1", slow_seconds, {"path": "/api/process-video"}):
+            with span("download"):
+                pass
+
+    with caplog.at_level(logging.INFO):
+        asyncio.run(main(slow_seconds=60))
+        assert not [record for record in caplog.records if record.name == "ayovirals.slow_requests"]
+        asyncio.run(main(slow_seconds=0))
+    slow, = [record for record in caplog.records if record.name == "ayovirals.slow_requests"]
+    assert slow.trace["request_id"] == "slow-1"
+    assert [item["name"] for item in slow.trace["spans"]] == ["download"]
+    assert slow.path == "/api/process-video"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("abc-123", "abc-123"),
+    ("trace.id:1_2", "trace.id:1_2"),
+    ("", None),
+    (None, None),
+    ("x" * 65, None),
+    ("bad id\nwith newline", None),
+])
+def test_client_request_ids_are_validated(value, expected):
+    assert valid_request_id(value) == expected
+
+
+async def echo_request_id(scope, receive, send):
+    body = json.dumps({"request_id": current_request_id()}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def get(app, path, headers=None):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get(path, headers=headers)
+
+
+def test_middleware_echoes_the_request_id():
+    app = TracingMiddleware(echo_request_id, untraced_paths=("/api/health",))
+    given = asyncio.run(get(app, "/api/videos", {"X-Request-ID": "client-42"}))
+    assert given.headers["x-request-id"] == "client-42"
+    assert given.json() == {"request_id": "client-42"}
+
+    generated = asyncio.run(get(app, "/api/videos", {"X-Request-ID": "not valid!"}))
+    assert generated.headers["x-request-id"] == generated.json()["request_id"] != "not valid!"
+
+    untraced = asyncio.run(get(app, "/api/health"))
+    assert "x-request-id" not in untraced.headers
+    assert untraced.json() == {"request_id": None}
+
+
+def test_json_formatter_includes_the_request_id_and_extra_fields():
+    record = logging.makeLogRecord({"name": "server", "levelname": "INFO", "msg": "done in %sms", "args": (12,)})
+    record.duration_ms = 12.5
+
+    async def main():
+        async with traced("job", "job-7"):
+            RequestIdFilter().filter(record)
+
+    asyncio.run(main())
+    entry = json.loads(JsonFormatter().format(record))
+    assert (entry["message"], entry["request_id"], entry["duration_ms"], entry["level"]) == ("done in 12ms", "job-7", 12.5, "INFO")
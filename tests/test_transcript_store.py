@@ -0,0 +1,80 @@
+import os
+import asyncio
+
+import pytest
+
+from transcript_store import FileTranscriptStore, decode_transcript, encode_transcript
+
+
+def transcript(tier="balanced", max_seconds=None, segments=3):
+    segments = [{"start": float(index), "end": float(index + 1), "text": f"Line {index}."} for index in range(segments)]
+    return {
+        "title": "A title",
+        "description": "A description",
+        "transcription": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "tier": {"tier": tier, "model": "base", "beam_size": 5, "max_seconds": max_seconds},
+    }
+
+
+def test_transcripts_are_stored_compressed():
+    original = transcript(segments=200)
+    data = encode_transcript(original)
+    assert data[:2] == b"\x1f\x8b"
+    assert len(data) < len(str(original)) / 4
+    assert decode_transcript(data) == original
+
+
+def test_file_store_round_trip(tmp_path):
+    store = FileTranscriptStore(str(tmp_path / "transcripts"))
+
+    async def main():
+        missing = await store.get("https://a/1"), await store.info("https://a/1")
+        metadata = await store.put("https://a/1", transcript("accurate", 30.0))
+        return missing, metadata, await store.get("https://a/1"), await store.info("https://a/1")
+
+    missing, metadata, stored, info = asyncio.run(main())
+    assert missing == (None, None)
+    assert stored == transcript("accurate", 30.0)
+    assert info == metadata
+    assert (info["normalized_url"], info["tier"], info["model"], info["max_seconds"], info["segments"]) == (
+        "https://a/1", "accurate", "base", 30.0, 3,
+    )
+    assert info["compressed_bytes"] > 0
+    # Only the transcript and its metadata are left; no temporary files
+    assert sorted(name.split(".", 1)[1] for name in os.listdir(tmp_path / "transcripts")) == ["json.gz", "meta.json"]
+
+
+def test_file_store_replaces_the_previous_transcript(tmp_path):
+    store = FileTranscriptStore(str(tmp_path))
+
+    async def main():
+        await store.put("https://a/1", transcript("fast"))
+        await store.put("https://a/1", transcript("accurate", segments=5))
+        await store.put("https://a/2", transcript("fast", segments=1))
+        return await store.get("https://a/1"), await store.info("https://a/1")
+
+    stored, info = asyncio.run(main())
+    assert stored == transcript("accurate", segments=5)
+    assert (info["tier"], info["segments"]) == ("accurate", 5)
+
+
+@pytest.mark.parametrize("info, quality, max_seconds, covers", [
+    (None, "fast", None, False),
+    ({"tier": "balanced", "max_seconds": None}, "fast", None, True),
+    ({"tier": "balanced", "max_seconds": None}, "balanced", 60.0, True),
+    ({"tier": "balanced", "max_seconds": None}, "accurate", None, False),
+    ({"tier": "accurate", "max_seconds": 60.0}, "balanced", 30.0, True),
+    ({"tier": "accurate", "max_seconds": 30.0}, "balanced", 60.0, False),
+    ({"tier": "accurate", "max_seconds": 30.0}, "balanced", None, False),
+])
+def test_stored_transcript_covers(server, info, quality, max_seconds, covers):
+    assert server.stored_transcript_covers(info, quality, max_seconds) is covers
+
+
+def test_stored_transcripts_are_trimmed_to_the_requested_length(server):
+    trimmed = server.trim_transcript(transcript(segments=5), 2.0)
+    assert [segment["start"] for segment in trimmed["segments"]] == [0.0, 1.0]
+    assert trimmed["transcription"] == "Line 0. Line 1."
+    assert trimmed["tier"]["max_seconds"] == 2.0
+    assert server.trim_transcript(transcript(segments=5), None) == transcript(segments=5)
@@ -0,0 +1,39 @@
+from triggers import TriggerMatcher
+
+
+def make_matcher():
+    return TriggerMatcher({
+        "hook:new": ["new", "brand new"],
+        "hook:secret": ["secret"],
+        "viral:curiosity": ["hidden secret", "nobody talks about"],
+    })
+
+
+def test_whole_words_only():
+    matcher = make_matcher()
+    assert matcher.scan("Read the news and the newsletter").counts == {}
+    assert matcher.scan("A NEW way, brand-new ideas").counts == {"hook:new": 2}
+
+
+def test_longer_phrase_also_counts_its_shorter_triggers():
+    scan = make_matcher().scan("The hidden secret of money")
+    assert scan.counts == {"viral:curiosity": 1, "hook:secret": 1}
+    assert [(start, end) for start, end, _ in scan.matches] == [(4, 17)]
+
+
+def test_prefers_longest_phrase_and_tolerates_extra_whitespace():
+    scan = make_matcher().scan("a brand   new secret that nobody\ntalks about")
+    assert scan.counts == {"hook:new": 1, "hook:secret": 1, "viral:curiosity": 1}
+    assert len(scan.matches) == 3
+
+
+def test_matches_in_suffix_are_relative_to_the_suffix():
+    transcript = "this secret is new"
+    scan = make_matcher().scan(f"Title. A secret description. {transcript}")
+    matches = scan.matches_in_suffix(transcript)
+    assert [transcript[start:end] for start, end, _ in matches] == ["secret", "new"]
+    assert scan.matches_in_suffix("not the scanned text") is None
+
+
+def test_no_phrases_never_matches():
+    assert TriggerMatcher({"empty": []}).scan("anything at all").counts == {}
@@ -0,0 +1,58 @@
+import pytest
+
+from triggers import TriggerMatcher
+from viral_scoring import ViralScorer
+
+
+@pytest.fixture
+def scorer():
+    matcher = TriggerMatcher({
+        "viral:urgency": ["right now", "stop"],
+        "viral:curiosity": ["secret"],
+        "persona:storytime": ["plot twist"],
+    })
+    return ViralScorer(matcher, {"viral:urgency": 2.0, "viral:curiosity": 1.0}, persona_weight=1.5)
+
+
+def segment(start, text):
+    return {"start": float(start), "end": float(start) + 5.0, "text": text}
+
+
+def test_empty_transcript_scores_zero(scorer):
+    assert scorer.score([]) == {"score": 0.0, "tokens": 0, "densities": {}, "counts": {}, "top_windows": []}
+
+
+def test_score_is_weighted_hits_per_hundred_tokens(scorer):
+    # 10 tokens, one urgency hit (weight 2) and one curiosity hit (weight 1)
+    result = scorer.score([segment(0, "stop scrolling and hear the secret of this odd trick")])
+    assert result["tokens"] == 10
+    assert result["score"] == 30.0
+    assert result["counts"] == {"viral:urgency": 1, "viral:curiosity": 1}
+    assert result["densities"] == {"viral:urgency": 10.0, "viral:curiosity": 10.0}
+
+
+def test_persona_triggers_only_count_for_that_persona(scorer):
+    segments = [segment(0, "what a plot twist that was")]
+    assert scorer.score(segments)["score"] == 0.0
+    assert scorer.score(segments, persona="storytime")["score"] == 25.0  # 1.5 per 6 tokens
+    assert scorer.score(segments, persona="unknown-persona")["score"] == 0.0
+
+
+def test_top_windows_are_the_densest_non_overlapping_spans(scorer):
+    segments = [
+        segment(0, "a calm introduction about nothing much at all"),
+        segment(5, "stop and listen right now"),
+        segment(40, "more filler words that carry no weight"),
+        segment(80, "here is the secret"),
+    ]
+    windows = scorer.score(segments, window_seconds=10, top_k=3)["top_windows"]
+    assert [window["start"] for window in windows] == [5.0, 80.0]
+    assert windows[0]["text"] == "stop and listen right now"
+    assert windows[0]["score"] > windows[1]["score"] > 0
+
+
+def test_shared_scan_gives_the_same_score(scorer):
+    segments = [segment(0, "stop right now"), segment(5, "the secret is out")]
+    transcript = " ".join(item["text"] for item in segments)
+    scan = scorer.matcher.scan(f"The secret title. A description. {transcript}")
+    assert scorer.score(segments, scan=scan) == scorer.score(segments)